@@ -1,8 +1,18 @@
 import asyncio, ccxt.async_support as ccxt, pandas as pd
+import importlib.util, os
 from datetime import datetime, timezone, timedelta
 from aiohttp import TCPConnector, ClientSession
 from aiohttp.resolver import ThreadedResolver
 
+# Ana bot modülü — pump kararı ortak dedektörden (rolling_pump_scan)
+_spec = importlib.util.spec_from_file_location(
+    "bot_module",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "canlı işlem", "18.02.2026.py"),
+)
+bot = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(bot)
+N = bot.Config.PUMP_WINDOW_CANDLES
+
 async def check():
     resolver = ThreadedResolver()
     connector = TCPConnector(resolver=resolver)
@@ -14,7 +24,7 @@ async def check():
     })
     try:
         for sym in ['COLLECT/USDT:USDT','BULLA/USDT:USDT','AKE/USDT:USDT','PIPPIN/USDT:USDT']:
-            data = await ex.fetch_ohlcv(sym, '4h', limit=10)
+            data = await ex.fetch_ohlcv(sym, '4h', limit=N + 3)
             df = pd.DataFrame(data, columns=['ts','o','h','l','c','v'])
             df['dt'] = pd.to_datetime(df['ts'], unit='ms', utc=True)
             df['color'] = df.apply(lambda r: 'GREEN' if r['c']>r['o'] else 'RED', axis=1)
@@ -24,13 +34,13 @@ async def check():
                 mark = '<<CANLI>>' if idx == len(df)-1 else ''
                 print(f"  {r['dt'].strftime('%m/%d %H:%M')}  {r['color']:5}  O:{r['o']:.6f}  C:{r['c']:.6f}  body:{r['body_pct']:+.2f}%  {mark}")
             closed = df.iloc[:-1]
-            last6 = closed.tail(6)
-            greens = (last6['color']=='GREEN').sum()
-            pump_h = last6['h'].max()
-            pump_l = last6['l'].min()
-            gain = (pump_h - pump_l)/pump_l*100
-            print(f'  Son 6 kapanmis mum: {greens} yesil, gain: {gain:.1f}%')
-            print(f'  Pump kosullari: min_green=4 {"OK" if greens>=4 else "FAIL"}, min_pump=30% {"OK" if gain>=30 else "FAIL"}')
+            scan = bot.rolling_pump_scan(closed['o'], closed['h'], closed['l'], closed['c'])
+            greens = int(scan['green_count'][-1])
+            gain = scan['pump_pct'][-1]
+            min_g, min_p = bot.Config.PUMP_MIN_GREEN_COUNT, bot.Config.PUMP_MIN_PCT
+            print(f'  Son kapanan mumdan onceki {N} mum: {greens} yesil, gain: {gain:.1f}%')
+            print(f'  Pump kosullari: min_green={min_g} {"OK" if greens>=min_g else "FAIL"}, '
+                  f'min_pump={min_p:.0f}% {"OK" if gain>=min_p else "FAIL"}  → {"PUMP" if scan["is_pump"][-1] else "-"}')
     finally:
         await ex.close()
         await session.close()
@@ -19,11 +19,17 @@ KULLANIM:
 
 # ── Standart Kütüphaneler ────────────────────────────────────────────────
 import asyncio
+import heapq
+import itertools
+import json
 import logging
+import random
 import sys
 import time
 import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime, timedelta, timezone
+from multiprocessing import shared_memory
 from dataclasses import dataclass, field
 from typing import List, Dict, Optional, Tuple
 
@@ -37,6 +43,18 @@ try:
 except ImportError:
     HAS_PANDAS_TA = False
 
+try:
+    import pyarrow as pa            # opsiyonel; yoksa CandleStore .npy + mmap kullanır
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+try:
+    from numba import njit          # opsiyonel; yoksa intra-bar çekirdeği saf Python döngüsüyle çalışır
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
 import aiohttp
 import ccxt.async_support as ccxt
 
@@ -210,6 +228,86 @@ def calc_volume_avg(volume: pd.Series, length: int = 5) -> pd.Series:
     return volume.rolling(window=length).mean()
 
 
+# ── Rolling pump dedektörü (canlı + backtest + tarama scriptleri ortak) ──────
+
+def rolling_pump_scan(open_: np.ndarray, high: np.ndarray, low: np.ndarray,
+                      close: np.ndarray, window: int = None,
+                      min_pct: float = None, min_green: int = None,
+                      cfg: type = None) -> Dict[str, np.ndarray]:
+    """
+    Module 1 — THE RADAR'ın dizi versiyonu: TÜM barlar için pump kararını tek geçişte (O(n)) verir.
+
+    Bar k için pencere = k'dan önceki `window` mum (k-window … k-1), giriş kapanışı = close[k]:
+      • pencerede low ≤ 0 veya NaN high yok
+      • yeşil mum sayısı ≥ min_green            (kayan toplam — cumsum farkı)
+      • pump_high = penceredeki max high          (kayan max)
+      • pump_pct  = (close[k] - gövde_tabanı) / gövde_tabanı × 100 ≥ min_pct
+        gövde_tabanı = min(open, close) — pencerenin 1. mumu (wick dahil değil)
+
+    Parametreler None ise cfg (varsayılan Config) değerleri kullanılır. NaN davranışı eski
+    satır-satır döngüyle aynıdır. Döndürür: is_pump, pump_pct, pump_high,
+    pump_low, green_count dizileri (pencere dolmayan barlarda NaN / False).
+    """
+    from numpy.lib.stride_tricks import sliding_window_view
+
+    cfg       = cfg or Config
+    n         = cfg.PUMP_WINDOW_CANDLES if window is None else window
+    min_pct   = cfg.PUMP_MIN_PCT if min_pct is None else min_pct
+    min_green = cfg.PUMP_MIN_GREEN_COUNT if min_green is None else min_green
+
+    o = np.asarray(open_, dtype=float)
+    h = np.asarray(high, dtype=float)
+    l = np.asarray(low, dtype=float)
+    c = np.asarray(close, dtype=float)
+    m = len(c)
+
+    out = {
+        "is_pump":     np.zeros(m, dtype=bool),
+        "pump_pct":    np.full(m, np.nan),
+        "pump_high":   np.full(m, np.nan),
+        "pump_low":    np.full(m, np.nan),
+        "green_count": np.zeros(m, dtype=np.int64),
+    }
+    if m <= n:
+        return out
+
+    k      = np.arange(n, m)
+    greens = np.concatenate(([0], np.cumsum(c > o)))
+    bads   = np.concatenate(([0], np.cumsum((l <= 0) | np.isnan(h))))
+    g_cnt  = greens[k] - greens[k - n]
+    b_cnt  = bads[k] - bads[k - n]
+    o0, c0 = o[k - n], c[k - n]
+    ref    = np.where(c0 < o0, c0, o0)                 # min(open, close) — gövde tabanı
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gain = (c[k] - ref) / ref * 100.0
+
+    out["green_count"][k] = g_cnt
+    out["pump_high"][k]   = sliding_window_view(h, n).max(axis=1)[:m - n]
+    out["pump_low"][k]    = l[k - n]
+    out["pump_pct"][k]    = gain
+    out["is_pump"][k]     = ((b_cnt == 0)
+                             & ~(g_cnt < min_green)
+                             & ~(ref <= 0)
+                             & ~(gain < min_pct))
+    return out
+
+
+def rolling_pump_scan_df(df: pd.DataFrame, **kwargs) -> Dict[str, np.ndarray]:
+    """rolling_pump_scan'in DataFrame (open/high/low/close sütunları) kısayolu."""
+    return rolling_pump_scan(df["open"].to_numpy(dtype=float), df["high"].to_numpy(dtype=float),
+                             df["low"].to_numpy(dtype=float), df["close"].to_numpy(dtype=float),
+                             **kwargs)
+
+
+def pump_info_at(scan: Dict[str, np.ndarray], k: int) -> Optional[dict]:
+    """rolling_pump_scan çıktısından k. bar için pump_info dict'i (pump yoksa None)."""
+    if k < 0 or k >= len(scan["is_pump"]) or not scan["is_pump"][k]:
+        return None
+    return {"pump_pct": scan["pump_pct"][k],
+            "pump_low": scan["pump_low"][k],
+            "pump_high": scan["pump_high"][k]}
+
+
 # ══════════════════════════════════════════════════════════════════════════
 #  BÖLÜM 0.5 — VERİ MODELLERİ (Dataclass'lar)
 # ══════════════════════════════════════════════════════════════════════════
@@ -252,6 +350,8 @@ class TradeRecord:
     reentry_count: int = 0          # Bu pump döngüsünde kaçıncı giriş
     consec_green_loss: int = 0      # Zararda arka arkaya yeşil mum sayacı (2'de çık)
     _last_checked_ts: str = ""       # Son değerlendirilen kapanmış mum timestamp'i (aynı mumu tekrar saymamak için)
+    exchange_stop_loss: float = 0.0  # Borsaya en son gönderilen SL (RAM stop_loss'tan geride kalabilir)
+    _sl_pushed_at: float = 0.0       # Son borsa SL gönderiminin monotonic zamanı
 
     # Backtest ekstra alanları
     pump_pct: float = 0.0
@@ -312,6 +412,8 @@ class Config:
     GREEN_LOSS_SINGLE_BODY_PCT   = _p("GREEN_LOSS_SINGLE_BODY_PCT",  10.0)
     ANTI_ROCKET_SINGLE_CANDLE_PCT = _p("ANTI_ROCKET_SINGLE_CANDLE_PCT", 22.0)
     MIN_VOLUME_USDT              = _p("MIN_VOLUME_USDT",             10_000_000.0)
+    PUMP_PREFILTER_RATIO         = _p("PUMP_PREFILTER_RATIO",        0.0)   # >0 → kayıplı 24h fiyat ön filtresi (opt-in)
+    PUMP_PREFILTER_VOLUME        = _p("PUMP_PREFILTER_VOLUME",       False) # True → 24h hacim < MIN_VOLUME_USDT ele (opt-in)
 
     # ── Module 3 — TRADE MANAGEMENT ─────────────────────────────────
     LEVERAGE                     = _p("LEVERAGE",                    int(os.environ.get("LEVERAGE", "3")))
@@ -325,6 +427,8 @@ class Config:
     BREAKEVEN_DROP_PCT           = _p("BREAKEVEN_DROP_PCT",          5.0)
     TSL_ACTIVATION_DROP_PCT      = _p("TSL_ACTIVATION_DROP_PCT",     8.0)
     TSL_TRAIL_PCT                = _p("TSL_TRAIL_PCT",               4.0)
+    SL_PUSH_MIN_STEP_BPS         = _p("SL_PUSH_MIN_STEP_BPS",        25.0)  # Borsa SL'i en az bu kadar (bps) oynarsa gönder
+    SL_PUSH_MAX_DELAY_SEC        = _p("SL_PUSH_MAX_DELAY_SEC",       30.0)  # Bekleyen küçük değişim en geç bu sürede gönderilir
 
     # ── Module 4 — Çıkış yalnızca SL / BE / TSL ile ─────────────────
     # ── Module 5 — RE-ENTRY (Fresh Pump Koşulu) ─────────────────────
@@ -336,6 +440,552 @@ class Config:
         "TRB/USDT", "GAS/USDT", "CYBER/USDT", "LOOM/USDT",
         "YGG/USDT", "VANRY/USDT", "ORDI/USDT", "BIGTIME/USDT",
     ])
+    BACKTEST_VECTORIZED      = _p("BACKTEST_VECTORIZED",      True)   # FullUniverse: NumPy motoru
+    BACKTEST_EVENT_5M        = _p("BACKTEST_EVENT_5M",        False)  # FullUniverse: 5m olay saatli motor
+    CANDLE_STORE_ENABLED     = _p("CANDLE_STORE_ENABLED",     True)   # Yerel mum deposu (CandleStore)
+    CANDLE_STORE_DIR         = _p("CANDLE_STORE_DIR",         "")     # "" → <proje>/data/candle_store
+    DOWNLOAD_WEIGHT_BUDGET   = _p("DOWNLOAD_WEIGHT_BUDGET",   2000)   # Backtest indirme: weight / dk (limit 2400)
+    DOWNLOAD_CONCURRENCY     = _p("DOWNLOAD_CONCURRENCY",     8)      # Backtest indirme: eşzamanlı sembol
+
+    # ── Canlı piyasa akışı (WebSocket) ────────────────────────────────
+    WS_MARKET_DATA           = _p("WS_MARKET_DATA",           True)   # kline + markPrice stream; False → REST polling
+    WS_BUFFER_CANDLES        = _p("WS_BUFFER_CANDLES",        100)    # Sembol başına bellekteki mum sayısı
+    WS_STALE_SEC             = _p("WS_STALE_SEC",             10)     # Bu süredir mesaj yoksa veri bayat → REST
+    CANDLE_CACHE_SIZE        = _p("CANDLE_CACHE_SIZE",        200)    # fetch_ohlcv önbelleği: (sym, tf) başına mum; 0 → kapalı
+    ORDER_RATE_PER_MIN       = _p("ORDER_RATE_PER_MIN",       300)    # Emir + iptal çağrısı / dk (tüm semboller ortak)
+    BALANCE_CACHE_SEC        = _p("BALANCE_CACHE_SEC",        60)     # Manager bakiye önbelleği (sn)
+    USER_STREAM              = _p("USER_STREAM",              True)   # listenKey akışı: dolum / pozisyon / bakiye
+    USER_STREAM_KEEPALIVE_MIN = _p("USER_STREAM_KEEPALIVE_MIN", 30)   # listenKey uzatma aralığı (dk, ömür 60)
+    MARKET_META_REFRESH_SEC  = _p("MARKET_META_REFRESH_SEC",  3600)   # Market bilgisi yenileme aralığı (sn)
+    PREARM_ENTRY             = _p("PREARM_ENTRY",             True)   # PREP'te margin/kaldıraç/emir temizliği
+
+    @classmethod
+    def derive(cls, **overrides) -> type:
+        """
+        Çalıştırma başına bağımsız konfig: override'lı Config alt sınıfı döndürür,
+        global Config değişmez. Backtester(cfg=...) ile kullanılır (parametre taraması).
+        Bilinmeyen parametre adı → ValueError (yazım hatası sessizce yutulmasın).
+        """
+        unknown = [k for k in overrides if not hasattr(cls, k)]
+        if unknown:
+            raise ValueError(f"Bilinmeyen Config parametresi: {', '.join(unknown)}")
+        return type(cls.__name__, (cls,), dict(overrides))
+
+
+# ══════════════════════════════════════════════════════════════════════════
+#  BÖLÜM 1.5 — CANLI VERİ AKIŞLARI  (WebSocket kline + markPrice, user-data)
+# ══════════════════════════════════════════════════════════════════════════
+
+def timeframe_ms(timeframe: str) -> int:
+    """'5m' / '4h' / '1d' → milisaniye cinsinden mum süresi."""
+    tf = timeframe.lower()
+    unit = {"m": 60_000, "h": 3_600_000, "d": 86_400_000}.get(tf[-1], 3_600_000)
+    return int(tf[:-1]) * unit
+
+
+class MarketStream:
+    """
+    Binance Futures combined stream (<sym>@kline_<tf> + <sym>@markPrice@1s) üzerinden
+    canlı botun piyasa verisi.
+
+    • Sembol başına bellekte kayan mum tamponu (en fazla WS_BUFFER_CANDLES mum);
+      kline mesajındaki 'x' bayrağı mumun kapandığını işaretler.
+    • Yeni takip edilen sembol tek seferlik REST fetch_ohlcv ile tohumlanır,
+      sonrası yalnızca WebSocket'ten güncellenir. Yeniden bağlanınca aradaki
+      boşluk kaçmasın diye tüm semboller tekrar tohumlanır.
+    • Takip kümesi (watchlist ∪ açık trade'ler) run()'a verilen fonksiyondan
+      okunur; fark SUBSCRIBE / UNSUBSCRIBE mesajlarıyla bağlantı kopmadan uygulanır.
+    • candles() / mark_price() veri eksik veya bayatsa None döndürür —
+      çağıran taraf REST'e düşer (eski davranış).
+    """
+
+    URLS = {
+        False: "wss://fstream.binance.com",          # Canlı Binance Futures
+        True:  "wss://fstream.binancefuture.com",    # Demo Trading / testnet
+    }
+
+    def __init__(self, exchange, timeframe: str = None, demo: bool = None):
+        self.exchange   = exchange
+        self.timeframe  = (timeframe or Config.TIMEFRAME).lower()
+        self.tf_ms      = timeframe_ms(self.timeframe)
+        self.base_url   = self.URLS[bool(Config.DEMO_MODE if demo is None else demo)]
+        self.maxlen     = int(Config.WS_BUFFER_CANDLES)
+        self.stale_sec  = float(Config.WS_STALE_SEC)
+        self._bars: Dict[str, Dict[int, list]] = {}        # sym → {open_ms: [o, h, l, c, v, closed]}
+        self._seeded: set = set()
+        self._seeding: set = set()
+        self._seed_tasks: set = set()                      # Çalışan _seed görevleri (GC'ye karşı güçlü referans)
+        self._mark: Dict[str, Tuple[float, float]] = {}    # sym → (fiyat, monotonic zaman)
+        self._ids: Dict[str, str] = {}                     # 'TRBUSDT' → 'TRB/USDT:USDT'
+        self._subscribed: set = set()
+        self._closed_cond: Optional[asyncio.Condition] = None
+        self._last_msg   = 0.0
+        self._msg_id     = 0
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.connected   = False
+
+    # ── Sembol / stream adları ─────────────────────────────────────────
+    def _market_id(self, symbol: str) -> str:
+        mid = self.exchange.market(symbol)["id"]
+        self._ids[mid] = symbol
+        return mid
+
+    def _streams(self, symbol: str) -> List[str]:
+        mid = self._market_id(symbol).lower()
+        return [f"{mid}@kline_{self.timeframe}", f"{mid}@markPrice@1s"]
+
+    # ── Okuma API'si (trigger / manager) ──────────────────────────────
+    @property
+    def healthy(self) -> bool:
+        """Bağlı ve son WS_STALE_SEC içinde mesaj alınmış mı?"""
+        return self.connected and (time.monotonic() - self._last_msg) < self.stale_sec
+
+    def mark_price(self, symbol: str) -> Optional[float]:
+        """Son mark price; yoksa veya WS_STALE_SEC'ten eskiyse None."""
+        rec = self._mark.get(symbol)
+        if rec is None or time.monotonic() - rec[1] > self.stale_sec:
+            return None
+        return rec[0]
+
+    def _expected_last_closed(self) -> int:
+        now_ms = int(time.time() * 1000)
+        return now_ms // self.tf_ms * self.tf_ms - self.tf_ms
+
+    def candles(self, symbol: str, limit: int) -> Optional[pd.DataFrame]:
+        """
+        Son `limit` KAPANMIŞ mum — fetch_ohlcv + _remove_live_candle ile aynı biçim
+        (UTC timestamp index; open, high, low, close, volume).
+        Tampon tohumlanmamışsa, son kapanan mum henüz gelmediyse veya seride
+        boşluk varsa None döner.
+        """
+        bars = self._bars.get(symbol)
+        if symbol not in self._seeded or not bars:
+            return None
+        keys = [ts for ts, row in bars.items() if row[5]]
+        if not keys or keys[-1] != self._expected_last_closed():
+            return None
+        keys = keys[-limit:]
+        if len(keys) > 1 and (keys[-1] - keys[0]) != (len(keys) - 1) * self.tf_ms:
+            return None
+        df = pd.DataFrame([bars[ts][:5] for ts in keys],
+                          columns=["open", "high", "low", "close", "volume"],
+                          index=pd.to_datetime(keys, unit="ms", utc=True))
+        df.index.name = "timestamp"
+        return df
+
+    async def wait_closed(self, symbols: List[str], bar_open_ms: int, timeout: float) -> bool:
+        """bar_open_ms mumunun tüm `symbols` için kapanış mesajı gelene kadar bekle (ms tepki)."""
+        if self._closed_cond is None or not self.healthy:
+            return False
+
+        symbols = [s for s in symbols if s in self._subscribed]
+
+        def _ready():
+            return all(self._bars.get(s, {}).get(bar_open_ms, [0] * 6)[5] for s in symbols)
+
+        try:
+            async with self._closed_cond:
+                await asyncio.wait_for(self._closed_cond.wait_for(_ready), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    # ── Tampon güncelleme ─────────────────────────────────────────────
+    def _put(self, symbol: str, ts: int, row: list, overwrite: bool = True):
+        bars = self._bars.setdefault(symbol, {})
+        if ts in bars and not overwrite:
+            return
+        if bars and ts < next(reversed(bars)):
+            bars[ts] = row
+            self._bars[symbol] = bars = dict(sorted(bars.items()))
+        else:
+            bars[ts] = row
+        while len(bars) > self.maxlen:
+            del bars[next(iter(bars))]
+
+    async def _seed(self, symbol: str):
+        """Tek seferlik REST tohumlama; WS'ten gelmiş daha taze mumların üzerine yazmaz."""
+        try:
+            raw = await self.exchange.fetch_ohlcv(symbol, self.timeframe, limit=self.maxlen)
+            now_ms = int(time.time() * 1000)
+            for t, o, h, l, c, v in raw:
+                self._put(symbol, int(t),
+                          [float(o), float(h), float(l), float(c), float(v), t + self.tf_ms <= now_ms],
+                          overwrite=False)
+            self._seeded.add(symbol)
+        except Exception as e:
+            log.debug(f"  [WS] {symbol} tohumlama başarısız: {e}")
+        finally:
+            self._seeding.discard(symbol)
+
+    async def _handle(self, msg: dict):
+        data = msg.get("data", msg)
+        event = data.get("e")
+        symbol = self._ids.get(data.get("s", ""))
+        if symbol is None:
+            return
+        if event == "kline":
+            k = data["k"]
+            closed = bool(k["x"])
+            self._put(symbol, int(k["t"]), [float(k["o"]), float(k["h"]), float(k["l"]),
+                                            float(k["c"]), float(k["v"]), closed])
+            if closed:
+                async with self._closed_cond:
+                    self._closed_cond.notify_all()
+        elif event == "markPriceUpdate":
+            self._mark[symbol] = (float(data["p"]), time.monotonic())
+
+    # ── Bağlantı döngüsü ──────────────────────────────────────────────
+    async def _sync(self, ws, wanted: set):
+        """Takip kümesi değiştiyse SUBSCRIBE / UNSUBSCRIBE gönder, yenileri tohumla."""
+        add, drop = wanted - self._subscribed, self._subscribed - wanted
+        for method, syms in (("SUBSCRIBE", add), ("UNSUBSCRIBE", drop)):
+            if not syms:
+                continue
+            self._msg_id += 1
+            params = [s for sym in sorted(syms) for s in self._streams(sym)]
+            await ws.send_json({"method": method, "params": params, "id": self._msg_id})
+        for sym in drop:
+            self._bars.pop(sym, None)
+            self._mark.pop(sym, None)
+            self._seeded.discard(sym)
+        self._subscribed = set(wanted)
+        for sym in wanted - self._seeded - self._seeding:
+            self._seeding.add(sym)
+            task = asyncio.create_task(self._seed(sym))
+            self._seed_tasks.add(task)
+            task.add_done_callback(self._seed_tasks.discard)
+
+    async def run(self, symbols_fn, is_running=lambda: True):
+        """
+        Akış görevi: symbols_fn() → takip edilecek semboller (ör. watchlist ∪ açık trade).
+        Bağlantı koparsa (Binance 24 saatte bir keser) artan beklemeyle yeniden bağlanır.
+        """
+        self._closed_cond = asyncio.Condition()
+        backoff = 1.0
+        while is_running():
+            wanted = {s for s in symbols_fn() if s in self.exchange.markets} if self.exchange.markets else set()
+            if not wanted:
+                await asyncio.sleep(1.0)
+                continue
+            if self._session is None or self._session.closed:
+                self._session = aiohttp.ClientSession()
+            url = f"{self.base_url}/stream?streams=" + "/".join(
+                s for sym in sorted(wanted) for s in self._streams(sym))
+            try:
+                async with self._session.ws_connect(url, heartbeat=30) as ws:
+                    self.connected, backoff = True, 1.0
+                    self._last_msg = time.monotonic()
+                    self._subscribed = set(wanted)
+                    # Kopukluk boşluğu → tamponu at ve yeniden tohumla (kopukken kapanan mum
+                    # closed=False / yarım OHLC ile kalmasın; tohum onun üzerine yazamaz)
+                    self._bars.clear()
+                    self._mark.clear()
+                    self._seeded.clear()
+                    await self._sync(ws, wanted)
+                    log.info(f"📶 [WS] Piyasa akışı bağlandı — {len(wanted)} sembol")
+                    last_sync = time.monotonic()
+                    while is_running():
+                        if time.monotonic() - last_sync >= 1.0:
+                            await self._sync(ws, {s for s in symbols_fn() if s in self.exchange.markets})
+                            last_sync = time.monotonic()
+                        try:
+                            m = await ws.receive(timeout=1.0)
+                        except asyncio.TimeoutError:
+                            continue
+                        if m.type == aiohttp.WSMsgType.TEXT:
+                            self._last_msg = time.monotonic()
+                            await self._handle(json.loads(m.data))
+                        elif m.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.CLOSING,
+                                        aiohttp.WSMsgType.ERROR):
+                            break
+            except Exception as e:
+                log.warning(f"⚠️ [WS] Piyasa akışı hatası: {e}")
+            self.connected = False
+            if is_running():
+                log.info(f"📶 [WS] {backoff:.0f}s sonra yeniden bağlanılıyor…")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+    async def close(self):
+        self.connected = False
+        for task in list(self._seed_tasks):
+            task.cancel()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+
+class UserDataStream:
+    """
+    Binance Futures user-data stream (listenKey) — emir dolumları, stop tetiklenmeleri,
+    pozisyon ve cüzdan bakiyesi anlık olarak bot durumuna akar.
+
+    • listenKey fapiPrivatePostListenKey ile alınır, USER_STREAM_KEEPALIVE_MIN'de bir
+      fapiPrivatePutListenKey ile uzatılır; süresi dolarsa / bağlantı koparsa yenisi alınır.
+    • ORDER_TRADE_UPDATE → kapanış yönlü (BUY, reduceOnly / closePosition / stop) FILLED
+      emirlerin ortalama fiyatı exit_fill() ile okunur (gerçek çıkış fiyatı).
+    • ACCOUNT_UPDATE     → pozisyon miktarları (position) ve USDT cüzdan bakiyesi (wallet).
+    • Her bağlantıda pozisyonlar bir kez REST ile tohumlanır; bağlantı yokken
+      position() None döner → çağıran taraf REST'e düşer.
+    • Yerel açık emir defteri: ALGO_UPDATE (koşullu / stop emirleri) ve ORDER_TRADE_UPDATE
+      ile tutulur. Bir sembolün defteri ancak o bağlantıda bir kez doğrulanmış temizlikten
+      sonra (mark_orders_synced) güvenilir sayılır; bağlantı koparsa tüm defter geçersizleşir.
+    """
+
+    CLOSE_TYPES = {"STOP_MARKET", "STOP", "TAKE_PROFIT_MARKET", "TAKE_PROFIT", "TRAILING_STOP_MARKET"}
+    OPEN_STATUS = {"NEW", "PARTIALLY_FILLED", "TRIGGERING"}
+
+    def __init__(self, exchange, demo: bool = None):
+        self.exchange  = exchange
+        self.base_url  = MarketStream.URLS[bool(Config.DEMO_MODE if demo is None else demo)]
+        self.keepalive = float(Config.USER_STREAM_KEEPALIVE_MIN) * 60.0
+        self.positions: Dict[str, float] = {}      # sym → pozisyon miktarı (short < 0)
+        self.fills: Dict[str, dict] = {}           # sym → son kapanış dolumu
+        self.wallet: Optional[float] = None        # USDT cüzdan bakiyesi (wb)
+        self.fill_event = asyncio.Event()          # Kapanış dolumu geldi → manager'ı erken uyandır
+        self.orders: Dict[str, Dict[str, bool]] = {}   # sym → {emir id: algo (koşullu) mu}
+        self._orders_synced: set = set()               # Defteri güvenilir semboller
+        self.connected = False
+        self._synced   = False                     # Pozisyonlar bu bağlantıda tohumlandı mı?
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    # ── Okuma API'si ──────────────────────────────────────────────────
+    @property
+    def healthy(self) -> bool:
+        return self.connected and self._synced
+
+    def position(self, symbol: str) -> Optional[float]:
+        """Akıştan bilinen pozisyon miktarı; akış sağlıklı değilse None."""
+        if not self.healthy:
+            return None
+        return self.positions.get(symbol, 0.0)
+
+    def exit_fill(self, symbol: str, after_ms: int = 0) -> Optional[dict]:
+        """after_ms'ten sonra gerçekleşen son kapanış dolumu: {'price', 'qty', 'type', 'pnl', 'time'}."""
+        fill = self.fills.get(symbol)
+        if fill is None or fill["time"] < after_ms:
+            return None
+        return fill
+
+    # ── Yerel açık emir defteri ───────────────────────────────────────
+    def orders_synced(self, symbol: str) -> bool:
+        return self.healthy and symbol in self._orders_synced
+
+    def mark_orders_synced(self, symbol: str):
+        """REST ile doğrulanmış temiz durum → defter boş ve bundan sonra olaylarla güncel."""
+        if self.healthy:
+            self.orders[symbol] = {}
+            self._orders_synced.add(symbol)
+
+    def unsync_orders(self, symbol: str):
+        self._orders_synced.discard(symbol)
+        self.orders.pop(symbol, None)
+
+    def track_order(self, symbol: str, order_id, algo: bool):
+        """Emir yanıtından gelen id'yi deftere ekle (olay henüz gelmemiş olabilir)."""
+        if order_id and symbol in self._orders_synced:
+            self.orders.setdefault(symbol, {})[str(order_id)] = algo
+
+    def drop_order(self, symbol: str, order_id):
+        self.orders.get(symbol, {}).pop(str(order_id), None)
+
+    def _order_event(self, symbol: str, order_id, status: str, algo: bool):
+        if not order_id or symbol not in self._orders_synced:
+            return
+        if status in self.OPEN_STATUS:
+            self.orders.setdefault(symbol, {})[str(order_id)] = algo
+        else:
+            self.drop_order(symbol, order_id)
+
+    # ── Olaylar ───────────────────────────────────────────────────────
+    def _symbol(self, market_id: str) -> Optional[str]:
+        for mkt in (self.exchange.markets_by_id or {}).get(market_id) or []:
+            if mkt.get("linear") and mkt.get("swap"):
+                return mkt["symbol"]
+        return None
+
+    def _handle(self, data: dict) -> bool:
+        """Bir akış mesajını işle; False → listenKey düştü, yeniden bağlan."""
+        event = data.get("e")
+        if event == "ALGO_UPDATE":
+            o = data["o"]
+            sym = self._symbol(o.get("s", ""))
+            if sym:
+                self._order_event(sym, o.get("aid"), o.get("X", ""), True)
+        elif event == "ORDER_TRADE_UPDATE":
+            o = data["o"]
+            sym = self._symbol(o.get("s", ""))
+            if sym and o.get("o") != "MARKET":
+                self._order_event(sym, o.get("i"), o.get("X", ""), False)
+            closing = o.get("R") or o.get("cp") or o.get("ot") in self.CLOSE_TYPES
+            if sym and o.get("S") == "BUY" and o.get("X") == "FILLED" and closing:
+                self.fills[sym] = {
+                    "price": float(o.get("ap") or o.get("L") or 0.0),
+                    "qty":   float(o.get("z") or 0.0),
+                    "type":  o.get("ot", ""),
+                    "pnl":   float(o.get("rp") or 0.0),
+                    "time":  int(o.get("T") or data.get("E") or 0),
+                }
+                log.info(f"  📨 [USER] {sym} kapanış dolumu: {o.get('ot')} @ {self.fills[sym]['price']}")
+                self.fill_event.set()
+        elif event == "ACCOUNT_UPDATE":
+            a = data.get("a", {})
+            for b in a.get("B", []):
+                if b.get("a") == "USDT":
+                    self.wallet = float(b["wb"])
+            for p in a.get("P", []):
+                sym = self._symbol(p.get("s", ""))
+                if sym and p.get("ps", "BOTH") in ("BOTH", "SHORT"):
+                    self.positions[sym] = float(p["pa"])
+        elif event == "listenKeyExpired":
+            return False
+        return True
+
+    async def _sync_positions(self):
+        """Bağlantı başında açık pozisyonların REST tohumlaması (tek çağrı)."""
+        positions = await self.exchange.fetch_positions()
+        self.positions = {}
+        for pos in positions or []:
+            qty = float(pos.get("contracts") or 0.0)
+            if qty and pos.get("side") != "long":
+                self.positions[pos["symbol"]] = -qty
+        self._synced = True
+
+    # ── Bağlantı döngüsü ──────────────────────────────────────────────
+    async def run(self, is_running=lambda: True):
+        backoff = 1.0
+        while is_running():
+            try:
+                if not self.exchange.markets:
+                    await self.exchange.load_markets()
+                key = (await self.exchange.fapiPrivatePostListenKey())["listenKey"]
+                if self._session is None or self._session.closed:
+                    self._session = aiohttp.ClientSession()
+                async with self._session.ws_connect(f"{self.base_url}/ws/{key}", heartbeat=30) as ws:
+                    self.connected, backoff = True, 1.0
+                    await self._sync_positions()
+                    log.info("📨 [USER] Kullanıcı veri akışı bağlandı (dolum / pozisyon / bakiye)")
+                    renew_at = time.monotonic() + self.keepalive
+                    while is_running():
+                        if time.monotonic() >= renew_at:
+                            await self.exchange.fapiPrivatePutListenKey()
+                            renew_at = time.monotonic() + self.keepalive
+                        try:
+                            m = await ws.receive(timeout=5.0)
+                        except asyncio.TimeoutError:
+                            continue
+                        if m.type == aiohttp.WSMsgType.TEXT:
+                            if not self._handle(json.loads(m.data)):
+                                log.info("📨 [USER] listenKey süresi doldu — yenileniyor")
+                                break
+                        elif m.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.CLOSING,
+                                        aiohttp.WSMsgType.ERROR):
+                            break
+            except Exception as e:
+                log.warning(f"⚠️ [USER] Kullanıcı veri akışı hatası: {e}")
+            self.connected, self._synced = False, False
+            self._orders_synced.clear()                # Kopuklukta kaçan olaylar → defter geçersiz
+            self.orders.clear()
+            if is_running():
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 60.0)
+
+    async def close(self):
+        self.connected = False
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+
+# ══════════════════════════════════════════════════════════════════════════
+#  BÖLÜM 1.6 — PİYASA METADATA TABLOSU  (tick / step / maxQty / minNotional)
+# ══════════════════════════════════════════════════════════════════════════
+
+@dataclass
+class SymbolSpec:
+    """Sembol başına önceden hesaplanmış emir kuralları (MarketMeta tablosu)."""
+    tick_size: float                 # precision.price  (ör. 0.0001)
+    step_size: float                 # precision.amount (ör. 0.1)
+    price_digits: int                # get_digits(tick_size)
+    amount_digits: int               # get_digits(step_size)
+    max_qty: Optional[float] = None  # min(limits.amount.max, limits.market.max) — -4005 koruması
+    min_notional: float = 0.0        # limits.cost.min (yoksa Config.MIN_NOTIONAL_USDT)
+
+
+class MarketMeta:
+    """
+    Market bilgisini bir kez yükleyip emir yolunda gereken her şeyi tabloya çevirir.
+
+    • load(): MARKET_META_REFRESH_SEC dolmadıysa istek atmaz; dolduysa veya force=True
+      ise load_markets(reload=True) ile yeniler ve tabloyu baştan kurar.
+    • -1121 (geçersiz sembol) / -4005 (maxQty) hatalarında invalidate → sonraki
+      load() yeniden çeker (on_error).
+    • round_price / round_qty: eski round(x, get_digits(precision)) ile birebir aynı sonuç,
+      ama precision her emirde yeniden ayrıştırılmaz.
+    """
+
+    REFRESH_ERRORS = ("-1121", "-4005")
+
+    def __init__(self, exchange):
+        self.exchange = exchange
+        self.specs: Dict[str, SymbolSpec] = {}
+        self._loaded_at = 0.0
+
+    @staticmethod
+    def build_spec(market: dict) -> SymbolSpec:
+        prec   = market.get("precision") or {}
+        limits = market.get("limits") or {}
+        caps = [v for v in ((limits.get("amount") or {}).get("max"),
+                            (limits.get("market") or {}).get("max")) if v is not None]
+        min_cost = (limits.get("cost") or {}).get("min")
+        return SymbolSpec(
+            tick_size=float(prec.get("price") or 0.0),
+            step_size=float(prec.get("amount") or 0.0),
+            price_digits=get_digits(prec.get("price")),
+            amount_digits=get_digits(prec.get("amount")),
+            max_qty=float(min(caps)) if caps else None,
+            min_notional=float(min_cost) if min_cost else Config.MIN_NOTIONAL_USDT,
+        )
+
+    @property
+    def fresh(self) -> bool:
+        return bool(self.specs) and time.monotonic() - self._loaded_at < Config.MARKET_META_REFRESH_SEC
+
+    async def load(self, force: bool = False) -> dict:
+        """Market sözlüğünü döndür; gerekirse yenileyip tabloyu yeniden kur."""
+        if self.fresh and not force:
+            return self.exchange.markets
+        markets = await self.exchange.load_markets(True)
+        self.specs = {sym: self.build_spec(mkt) for sym, mkt in markets.items()}
+        self._loaded_at = time.monotonic()
+        return markets
+
+    def invalidate(self):
+        self._loaded_at = 0.0
+
+    def on_error(self, err: Exception) -> bool:
+        """Market bilgisinin eskidiğini gösteren hata mı? Öyleyse tabloyu geçersiz kıl."""
+        if any(code in str(err) for code in self.REFRESH_ERRORS):
+            log.info(f"  🔁 Market bilgisi yenilenecek ({str(err)[:60]})")
+            self.invalidate()
+            return True
+        return False
+
+    def spec(self, symbol: str) -> Optional[SymbolSpec]:
+        return self.specs.get(symbol)
+
+    def round_price(self, symbol: str, price: float) -> float:
+        spec = self.specs.get(symbol)
+        return round(price, spec.price_digits) if spec else price
+
+    def round_qty(self, symbol: str, qty: float) -> float:
+        """Adım hassasiyetine yuvarla ve maxQty ile sınırla."""
+        spec = self.specs.get(symbol)
+        if spec is None:
+            return qty
+        qty = round(qty, spec.amount_digits)
+        if spec.max_qty and qty > spec.max_qty:
+            qty = round(spec.max_qty, spec.amount_digits)
+        return qty
 
 
 # ══════════════════════════════════════════════════════════════════════════
@@ -367,6 +1017,18 @@ class PumpSnifferBot:
         self._processed_signals: Dict[str, str] = {}    # sym → son sinyal timestamp (Tekilleştirme)
         self._prep_done: Optional[asyncio.Event] = None  # PREP→TRIGGER senkronizasyonu
         self._hedge_mode: Optional[bool] = None          # Hedge/One-way mode cache
+        self._candle_cache: Dict[Tuple[str, str], pd.DataFrame] = {}  # (sym, tf) → son mumlar
+        self._sym_locks: Dict[str, asyncio.Lock] = {}    # sym → emir kilidi
+        self._equity: Optional[float] = None             # Son bilinen USDT bakiye (fetch_equity)
+        self._equity_at = 0.0                            # _equity'nin alındığı monotonic zaman
+        self._manage_tasks: Dict[str, asyncio.Task] = {} # sym → çalışan _manage_trade görevi
+        self._order_limiter = WeightLimiter(Config.ORDER_RATE_PER_MIN)  # Emir / iptal hız bütçesi
+        self.market: Optional[MarketStream] = (           # WebSocket mum/mark tamponu (None → REST)
+            MarketStream(self.exchange) if Config.WS_MARKET_DATA else None)
+        self.user: Optional[UserDataStream] = (           # listenKey akışı (API anahtarı gerekir)
+            UserDataStream(self.exchange) if Config.USER_STREAM and api_key else None)
+        self.meta = MarketMeta(self.exchange)             # tick / step / maxQty tablosu
+        self._armed: Dict[str, int] = {}                 # sym → PREP'te kurulan kaldıraç (ön hazırlık)
         self.running = False
 
     # ─────────────────────────────────────────────────────────────────
@@ -431,6 +1093,28 @@ class PumpSnifferBot:
         
         raise ccxt.NetworkError(f"{retries} deneme sonrası başarısız oldu.")
 
+    async def _order_call(self, coro_func, *args, **kwargs):
+        """
+        Emir oluşturma / iptal çağrısı: ORDER_RATE_PER_MIN bütçesinden pay al, sonra _safe_call.
+        -1121 / -4005 hatası market tablosunu geçersiz kılar (sonraki emirde yenilenir).
+        """
+        await self._order_limiter.acquire(1)
+        try:
+            return await self._safe_call(coro_func, *args, **kwargs)
+        except Exception as e:
+            self.meta.on_error(e)
+            raise
+
+    async def _symbol_spec(self, symbol: str) -> SymbolSpec:
+        """Sembolün emir kuralları; tabloda yoksa / tablo eskidiyse market bilgisini yenile."""
+        spec = self.meta.spec(symbol)
+        if spec is None or not self.meta.fresh:
+            await self._safe_call(self.meta.load, spec is None)
+            spec = self.meta.spec(symbol)
+        if spec is None:
+            raise ccxt.BadSymbol(f"{symbol}: market bilgisi bulunamadı")
+        return spec
+
     # ─────────────────────────────────────────────────────────────────
     # 2.1  MODÜL 1 — UNIVERSE & RADAR
     # ─────────────────────────────────────────────────────────────────
@@ -441,7 +1125,7 @@ class PumpSnifferBot:
         Major-cap coinleri hariç tut.
         Döndürür: ['SYMBOL/USDT', ...] listesi
         """
-        markets = await self._safe_call(self.exchange.load_markets, True)
+        markets = await self._safe_call(self.meta.load)
         universe = []
         for sym, mkt in markets.items():
             if not mkt.get("active"):
@@ -464,15 +1148,117 @@ class PumpSnifferBot:
         """
         Mum verilerini çek ve DataFrame olarak döndür.
         Sütunlar: timestamp, open, high, low, close, volume
+
+        (symbol, timeframe) başına bellek içi önbellek: tekrar istekte yalnızca son
+        önbellekteki mumdan (canlı mum dahil, yeniden çekilir) sonrası since= ile
+        çekilir, örtüşen kısım bellekten verilir. Önbellek isteği karşılayacak kadar
+        uzun değilse veya arada `limit`ten fazla mum kaçtıysa tam çekime düşer.
+        CANDLE_CACHE_SIZE = 0 → önbellek kapalı (eski davranış).
         """
+        size   = Config.CANDLE_CACHE_SIZE
+        key    = (symbol, timeframe)
+        cached = self._candle_cache.get(key) if size > 0 else None
+        tf_ms  = timeframe_ms(timeframe)
+
+        if cached is not None and len(cached) >= limit:
+            last_ms = int(cached.index[-1].timestamp() * 1000)
+            missing = (int(time.time() * 1000) - last_ms) // tf_ms + 1
+            if missing < limit:
+                raw = await self._safe_call(
+                    self.exchange.fetch_ohlcv, symbol, timeframe, since=last_ms, limit=missing + 1
+                )
+                tail = self._ohlcv_frame(raw)
+                df = pd.concat([cached[cached.index < tail.index[0]], tail]) if len(tail) else cached
+                self._candle_cache[key] = df.iloc[-max(size, limit):]
+                return df.iloc[-limit:]
+
         raw = await self._safe_call(
             self.exchange.fetch_ohlcv, symbol, timeframe, limit=limit
         )
+        df = self._ohlcv_frame(raw)
+        if size > 0 and len(df):
+            self._candle_cache[key] = df.iloc[-max(size, limit):]
+        return df
+
+    @staticmethod
+    def _ohlcv_frame(raw: list) -> pd.DataFrame:
+        """ccxt OHLCV listesi → UTC timestamp index'li DataFrame."""
         df = pd.DataFrame(raw, columns=["timestamp", "open", "high", "low", "close", "volume"])
         df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms", utc=True)
         df.set_index("timestamp", inplace=True)
         return df
 
+    async def fetch_closed_candles(self, symbol: str, limit: int) -> pd.DataFrame:
+        """
+        Son KAPANMIŞ mumlar (Config.TIMEFRAME). Önce WebSocket tamponu (REST yok);
+        tampon hazır/taze değilse fetch_ohlcv + _remove_live_candle'a düşer.
+        """
+        if self.market is not None:
+            df = self.market.candles(symbol, limit)
+            if df is not None:
+                return df
+        df = await self.fetch_ohlcv(symbol, Config.TIMEFRAME, limit=limit + 1)
+        return self._remove_live_candle(df, Config.TIMEFRAME).iloc[-limit:]
+
+    async def fetch_mark_snapshot(self, symbols: List[str]) -> Dict[str, float]:
+        """
+        Manager turu için tek seferlik mark price anlık görüntüsü.
+        WS akışı tüm semboller için tazeyse REST yok; değilse tek bir
+        fapiPublicGetPremiumIndex çağrısı (tüm semboller, tek istek).
+        Alınamayan semboller sözlükte yer almaz → fetch_mark_price ile tekil REST.
+        """
+        marks: Dict[str, float] = {}
+        if self.market is not None:
+            for sym in symbols:
+                price = self.market.mark_price(sym)
+                if price is not None:
+                    marks[sym] = price
+        missing = [sym for sym in symbols if sym not in marks]
+        if not missing:
+            return marks
+        try:
+            ids = {self.exchange.market(sym)["id"]: sym for sym in missing}
+            rows = await self._safe_call(self.exchange.fapiPublicGetPremiumIndex)
+            for row in rows or []:
+                sym = ids.get(row.get("symbol"))
+                if sym is not None and row.get("markPrice"):
+                    marks[sym] = float(row["markPrice"])
+        except Exception as e:
+            log.debug(f"  Mark price snapshot alınamadı: {e}")
+        return marks
+
+    async def fetch_equity(self, max_age: float = 0.0) -> float:
+        """
+        USDT toplam bakiye. max_age saniyeden taze önbellek varsa REST yok
+        (manager); max_age=0 → her zaman fetch_balance (trigger pozisyon boyutu).
+        User-data akışı bağlıysa manager ACCOUNT_UPDATE cüzdan bakiyesini kullanır.
+        """
+        if max_age > 0 and self.user is not None and self.user.healthy and self.user.wallet is not None:
+            return self.user.wallet                      # ACCOUNT_UPDATE ile anlık güncel
+        if self._equity is not None and time.monotonic() - self._equity_at <= max_age:
+            return self._equity
+        try:
+            balance = await self._safe_call(self.exchange.fetch_balance)
+            self._equity = float(balance.get("total", {}).get("USDT", 10_000))
+            self._equity_at = time.monotonic()
+            return self._equity
+        except Exception:
+            return self._equity if self._equity is not None else 10_000
+
+    async def fetch_mark_price(self, symbol: str, snapshot: Dict[str, float] = None) -> Optional[float]:
+        """Anlık mark price: manager snapshot'ı, WebSocket markPrice@1s, yoksa REST ticker (mark / last)."""
+        if snapshot and symbol in snapshot:
+            return snapshot[symbol]
+        if self.market is not None:
+            price = self.market.mark_price(symbol)
+            if price is not None:
+                return price
+        ticker = await self._safe_call(self.exchange.fetch_ticker, symbol)
+        if not ticker:
+            return None
+        price = ticker.get("mark") or ticker.get("last")
+        return float(price) if price is not None else None
+
     def _remove_live_candle(self, df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
         """
         Eğer son mum henüz kapanmamışsa (canlı mum), onu DataFrame'den at.
@@ -536,29 +1322,14 @@ class PumpSnifferBot:
         if len(df_4h) < n + 1:
             return None
 
-        # Son n kapanan mum (en son mum canlı olabilir — haricel)
-        window = [df_4h.iloc[-(n + 1) + k] for k in range(n)]
-
-        if any(c["low"] <= 0 or pd.isna(c["high"]) for c in window):
-            return None
-
-        # Koşul 1: En az 4 yeşil mum (sıralı olması şart değil)
-        green_count = sum(1 for c in window if c["close"] > c["open"])
-        if green_count < Config.PUMP_MIN_GREEN_COUNT:  # 4
-            return None
-
-        # Koşul 2: 1. mumun gövde tabanı → giriş mumunun kapanışı >= PUMP_MIN_PCT
-        # pump_start_ref : 1. mum kırmızıysa close, yeşilse open  (wick dahil etme)
-        # entry_close    : giriş kırmızı mumunun kapanışı — pump hala ayakta mı diye kontrol
-        pump_high      = max(c["high"] for c in window)
-        pump_start_ref = min(window[0]["open"], window[0]["close"])  # Gövde tabanı
-        pump_start_low = window[0]["low"]   # WatchlistItem/rapor için saklanır
-        entry_close    = df_4h.iloc[-1]["close"]   # giriş mumu kapanışı
-        if pump_start_ref <= 0:
-            return None
-        net_gain_pct   = (entry_close - pump_start_ref) / pump_start_ref * 100.0
-        if net_gain_pct < Config.PUMP_MIN_PCT:
+        # Son kapanan mum = giriş mumu; pencere = ondan önceki n mum (ortak dedektör)
+        scan = rolling_pump_scan_df(df_4h.iloc[-(n + 1):])
+        info = pump_info_at(scan, n)
+        if info is None:
             return None
+        pump_high      = info["pump_high"]
+        pump_start_low = info["pump_low"]
+        net_gain_pct   = info["pump_pct"]
 
         return WatchlistItem(
             symbol=symbol,
@@ -569,12 +1340,65 @@ class PumpSnifferBot:
         )
 
 
+    async def prefilter_universe(self, universe: List[str]) -> List[str]:
+        """
+        Radar 1. aşama: tek bir toplu fetch_tickers (24h ticker) çağrısıyla
+        pump olamayacak coinleri OHLCV çekmeden ele.
+
+        Eleme koşulları (ikisi de opt-in, varsayılan kapalı → tam tarama):
+          • PUMP_PREFILTER_VOLUME = True ise: 24h quoteVolume ≥ MIN_VOLUME_USDT
+          • PUMP_PREFILTER_RATIO > 0 ise: max(24h değişim %, 24h high/low aralığı %)
+            ≥ PUMP_MIN_PCT × PUMP_PREFILTER_RATIO
+        DİKKAT: İkisi de canlı coin seçimini backtest'ten farklılaştırır — backtest
+        universe'ü hacim eşiği uygulamaz. Fiyat testi ayrıca kayıplıdır: pump referansı
+        (k-7 mumunun gövde tabanı) 28–32 saat geridedir, 24h ticker onu görmez.
+        Watchlist / açık trade coinleri ve ticker'ı gelmeyen coinler her zaman geçer.
+        Ticker çağrısı başarısız olursa tüm universe döndürülür (eski davranış).
+        """
+        ratio      = Config.PUMP_PREFILTER_RATIO
+        use_volume = bool(Config.PUMP_PREFILTER_VOLUME)
+        if not universe or (ratio <= 0 and not use_volume):
+            return universe
+        try:
+            tickers = await self._safe_call(self.exchange.fetch_tickers)
+        except Exception as e:
+            log.warning(f"  ⚠️  Ticker ön filtresi atlandı (tam tarama): {e}")
+            return universe
+
+        min_move = Config.PUMP_MIN_PCT * ratio
+        keep     = set(self.watchlist) | set(self.active_trades)
+        out: List[str] = []
+        for sym in universe:
+            t = tickers.get(sym)
+            if t is None or sym in keep:
+                out.append(sym)
+                continue
+            qv = t.get("quoteVolume")
+            if use_volume and qv is not None and qv < Config.MIN_VOLUME_USDT:
+                continue
+            if ratio <= 0:
+                out.append(sym)
+                continue
+            high, low = t.get("high"), t.get("low")
+            move = abs(t.get("percentage") or 0.0)
+            if high and low and low > 0:
+                move = max(move, (high - low) / low * 100.0)
+            if move >= min_move:
+                out.append(sym)
+        rules = ([f"hacim ≥ {Config.MIN_VOLUME_USDT / 1e6:.0f}M"] if use_volume else []) \
+              + ([f"hareket ≥ %{min_move:.1f}"] if ratio > 0 else [])
+        log.info(f"  🧹 Ticker ön filtresi: {len(universe)} → {len(out)} coin "
+                 f"({', '.join(rules)})")
+        return out
+
     async def scan_universe(self):
         """
         Module 1 — THE RADAR: Tüm universe'ü tara → Top 10 rolling pump (24H/6×4H) → watchlist.
         Son 6×4H mumda (24 saat) en yüksek %30+ pump yapan 10 coin izlenir.
+        Önce prefilter_universe (tek ticker isteği) adayları daraltır; OHLCV
+        yalnızca kalanlar için çekilir.
         """
-        universe = await self.fetch_universe()
+        universe = await self.prefilter_universe(await self.fetch_universe())
         log.info(f"🔍 {len(universe)} coin taranıyor "
                  f"(pump ≥ %{Config.PUMP_MIN_PCT}, "
                  f"{Config.PUMP_WINDOW_CANDLES}×{Config.TIMEFRAME.upper()} bazlı)…")
@@ -757,7 +1581,16 @@ class PumpSnifferBot:
                                               explicit fetch → ID bazı tek tek)
         Aşama 3 → Ultimate Nuke             (fapiPrivateDeleteAllOpenOrders)
         Doğrulama → Temiz mi? Değilse retry döngüsü (max 3 tur)
+
+        HIZLI YOL: User-data akışının yerel emir defteri bu sembol için güvenilirse
+        (_cancel_known_orders) yalnızca bilinen emir id'leri iptal edilir — sabit
+        bekleme ve doğrulama turu yok. Tam imha başarıyla doğrulandığında defter
+        bu sembol için güvenilir işaretlenir; sonraki iptaller hızlı yoldan gider.
         """
+        fast = await self._cancel_known_orders(symbol)
+        if fast is not None:
+            return fast
+
         max_rounds = 3 if retry else 1
 
         # Market ID'sini al (BTCUSDT formatı, slash'siz)
@@ -779,7 +1612,7 @@ class PumpSnifferBot:
                     if not oid:
                         continue
                     try:
-                        await self._safe_call(
+                        await self._order_call(
                             self.exchange.cancel_order, oid, symbol,
                             params={"type": order_type, "stop": True}
                         )
@@ -797,7 +1630,7 @@ class PumpSnifferBot:
 
             # ── Aşama 1: Basic sekme — standart cancel_all ────────────────────
             try:
-                await self._safe_call(self.exchange.cancel_all_orders, symbol)
+                await self._order_call(self.exchange.cancel_all_orders, symbol)
             except Exception:
                 pass
 
@@ -811,6 +1644,7 @@ class PumpSnifferBot:
 
             # ── Aşama 3: Ultimate Nuke — arka kapı fapi toplu silme ────────
             try:
+                await self._order_limiter.acquire(1)
                 await self.exchange.fapiPrivateDeleteAllOpenOrders({"symbol": mkt_id})
             except Exception:
                 pass
@@ -831,6 +1665,8 @@ class PumpSnifferBot:
                 if not remaining:
                     if cleaned > 0:
                         log.info(f"  🗑️ Full Annihilation OK: {symbol} ({cleaned} emir temizlendi)")
+                    if self.user is not None:
+                        self.user.mark_orders_synced(symbol)
                     return True
 
                 if round_num < max_rounds:
@@ -849,6 +1685,33 @@ class PumpSnifferBot:
 
         return False
 
+    async def _cancel_known_orders(self, symbol: str) -> Optional[bool]:
+        """
+        Yerel emir defterindeki id'leri tek tek iptal et (koşullu emirler algo uç noktası).
+        Defter güvenilir değilse veya beklenmeyen bir hata olursa None → tam imha yolu.
+        """
+        if self.user is None or not self.user.orders_synced(symbol):
+            return None
+        known = dict(self.user.orders.get(symbol, {}))
+        for oid, algo in known.items():
+            try:
+                await self._order_call(self.exchange.cancel_order, oid, symbol,
+                                       params={"stop": True} if algo else {})
+            except Exception as e:
+                if "-2011" not in str(e) and "unknown order" not in str(e).lower():
+                    log.debug(f"  ⚠️ ID iptal hatası ({symbol} {oid}): {e} — tam imhaya geçiliyor")
+                    self.user.unsync_orders(symbol)
+                    return None
+            self.user.drop_order(symbol, oid)
+        if known:
+            log.info(f"  🗑️ {symbol}: {len(known)} emir ID ile iptal edildi (yerel emir defteri)")
+        return True
+
+    def _track_stop(self, symbol: str, order: Optional[dict]):
+        """Yeni koşullu (stop) emrin id'sini yerel emir defterine işle."""
+        if self.user is not None and order:
+            self.user.track_order(symbol, order.get("id"), algo=True)
+
     async def _detect_position_mode(self) -> bool:
         """
         Binance hesabının Hedge Mode'da olup olmadığını tespit eder.
@@ -869,6 +1732,29 @@ class PumpSnifferBot:
         log.info(f"📍 Binance Position Mode: {mode_str}")
         return self._hedge_mode
 
+    async def _arm_symbol(self, symbol: str) -> bool:
+        """
+        Giriş ön hazırlığı (PREP penceresi): eski stop'ları temizle, ISOLATED margin,
+        kaldıraç, market tablosu ve position mode'u kapanıştan ÖNCE ayarla.
+        Başarılıysa open_short tetikte sadece market emri + stop gönderir.
+        """
+        self._armed.pop(symbol, None)
+        try:
+            await self._cancel_algo_orders(symbol, retry=False)
+            try:
+                await self._safe_call(self.exchange.set_margin_mode, "isolated", symbol)
+            except ccxt.ExchangeError as e:
+                if "-4046" not in str(e):
+                    raise
+            await self._safe_call(self.exchange.set_leverage, Config.LEVERAGE, symbol)
+            await self._symbol_spec(symbol)
+            await self._detect_position_mode()
+        except Exception as e:
+            log.warning(f"  ⚠️ [PREP] {symbol} ön hazırlık başarısız — tetikte tam kurulum yapılacak: {e}")
+            return False
+        self._armed[symbol] = Config.LEVERAGE
+        return True
+
     async def open_short(self, symbol: str, entry_price: float,
                          pump_item: WatchlistItem, equity: float,
                          entry_candle_open: float = 0.0) -> Optional[TradeRecord]:
@@ -896,6 +1782,7 @@ class PumpSnifferBot:
             entry_price=entry_price,
             stop_loss=pos["sl"],
             initial_stop_loss=pos["sl"],
+            exchange_stop_loss=pos["sl"],
             tp1_price=0.0,          # TSL ile yönetilir — sabit TP yok
             tp2_price=0.0,
             position_size_usdt=pos["position_size_usdt"],
@@ -910,25 +1797,15 @@ class PumpSnifferBot:
         # ── Exchange emir gönderimi ───────────────────────────────────
         order_placed = False  # Market emri gerçekten açıldı mı?
         try:
-            await self._safe_call(self.exchange.load_markets)
-            market      = self.exchange.markets.get(symbol, {})
-            price_prec  = get_digits(market.get("precision", {}).get("price"))
-            amount_prec = get_digits(market.get("precision", {}).get("amount"))
+            spec        = await self._symbol_spec(symbol)
+            price_prec  = spec.price_digits
 
-            qty = round(pos["qty"], amount_prec)
-            calculated_qty = qty  # Log için orijinal değeri sakla
+            calculated_qty = round(pos["qty"], spec.amount_digits)  # Log için orijinal değeri sakla
 
             # ── maxQty kontrolü (-4005 fix) ───────────────────────────
-            limits  = market.get("limits", {})
-            # limits.amount.max  → genel pozisyon limiti
-            # limits.market.max  → market emrine özel limit (daha kısıtlayıcı olabilir)
-            max_qty_amount = (limits.get("amount") or {}).get("max")
-            max_qty_market = (limits.get("market")  or {}).get("max")
-            caps = [v for v in [max_qty_amount, max_qty_market] if v is not None]
-            max_qty = float(min(caps)) if caps else None
-
-            if max_qty and qty > max_qty:
-                qty = round(max_qty, amount_prec)
+            # spec.max_qty = min(limits.amount.max, limits.market.max) — MarketMeta tablosu
+            max_qty = spec.max_qty
+            qty     = self.meta.round_qty(symbol, pos["qty"])
 
             log.info(
                 f"  🧮 {symbol} Emir Hazırlığı: "
@@ -937,24 +1814,29 @@ class PumpSnifferBot:
                 f"Girilecek={qty}"
             )
 
-            if qty * entry_price < Config.MIN_NOTIONAL_USDT:
-                log.warning(f"  ⚠️ {symbol}: Notional < {Config.MIN_NOTIONAL_USDT} USDT — atlanıyor.")
+            min_notional = max(Config.MIN_NOTIONAL_USDT, spec.min_notional)
+            if qty * entry_price < min_notional:
+                log.warning(f"  ⚠️ {symbol}: Notional < {min_notional} USDT — atlanıyor.")
                 return None
 
-            # Margin modunu ISOLATED olarak ayarla (CROSS değil)
-            try:
-                await self._safe_call(self.exchange.set_margin_mode, "isolated", symbol)
-            except ccxt.ExchangeError as e:
-                if "-4046" not in str(e):
-                    log.warning(f"  ⚠️ Margin mode ayarlanamadı ({symbol}): {e}")
+            # PREP'te hazırlandıysa (margin + kaldıraç + emir temizliği) tetikte tekrar yapma
+            armed = self._armed.pop(symbol, None) == pos["leverage"]
+            if not armed:
+                # Margin modunu ISOLATED olarak ayarla (CROSS değil)
+                try:
+                    await self._safe_call(self.exchange.set_margin_mode, "isolated", symbol)
+                except ccxt.ExchangeError as e:
+                    if "-4046" not in str(e):
+                        log.warning(f"  ⚠️ Margin mode ayarlanamadı ({symbol}): {e}")
 
-            await self._safe_call(self.exchange.set_leverage, pos["leverage"], symbol)
+                await self._safe_call(self.exchange.set_leverage, pos["leverage"], symbol)
 
             # Position mode (hedge vs one-way) belirle — emri doğru params ile gönder
             hedge = await self._detect_position_mode()
 
-            # İşlem açılmadan HEMEN ÖNCE eski algo emirleri temizle (-4130 fix)
-            await self._cancel_algo_orders(symbol)
+            if not armed:
+                # İşlem açılmadan HEMEN ÖNCE eski algo emirleri temizle (-4130 fix)
+                await self._cancel_algo_orders(symbol)
 
             if hedge:
                 open_params = {"positionSide": "SHORT"}
@@ -974,7 +1856,7 @@ class PumpSnifferBot:
             order = None
             for attempt in range(max_retries):
                 try:
-                    order = await self._safe_call(
+                    order = await self._order_call(
                         self.exchange.create_order,
                         symbol, "market", "sell", qty,
                         params=open_params
@@ -1004,23 +1886,27 @@ class PumpSnifferBot:
 
             await self._cancel_algo_orders(symbol)
 
-            sl_price = round(pos["sl"], price_prec)
+            sl_price = self.meta.round_price(symbol, pos["sl"])
             sl_params["stopPrice"] = sl_price
             try:
-                await self._safe_call(
+                sl_order = await self._order_call(
                     self.exchange.create_order,
                     symbol, "stop_market", "buy", None,
                     params=sl_params
                 )
+                self._track_stop(symbol, sl_order)
                 log.info(f"  🟥 SL koyuldu: {sl_price:.{price_prec}f}")
             except ccxt.ExchangeError as e:
                 if "-4130" in str(e):
+                    if self.user is not None:
+                        self.user.unsync_orders(symbol)   # Defter bir stop'u kaçırmış → tam imha
                     await self._cancel_algo_orders(symbol)
-                    await self._safe_call(
+                    sl_order = await self._order_call(
                         self.exchange.create_order,
                         symbol, "stop_market", "buy", None,
                         params=sl_params
                     )
+                    self._track_stop(symbol, sl_order)
                 else:
                     raise
 
@@ -1059,26 +1945,33 @@ class PumpSnifferBot:
     # 2.3.1  FİZİKSEL BİNANCE STOP EMRİ GÜNCELLEME YARDIMCISI
     # ─────────────────────────────────────────────────────────────────
 
-    async def _update_binance_sl(self, symbol: str, new_sl_price: float):
+    async def _update_binance_sl(self, symbol: str, new_sl_price: float) -> bool:
         """
         Binance'teki mevcut STOP_MARKET emrini iptal edip yeni fiyattan tekrar oluşturur.
         BE / TSL tetiklendiğinde çağrılır — SL sadece RAM'de değil, borsada da güncellenir.
 
         v3.8: -4130 hatası için retry mekanizması eklendi.
+        Yerel emir defteri güvenilirse atomik yol (_replace_stop): önce yeni stop, sonra
+        eski stop id ile iptal — pozisyon hiçbir an stopsuz kalmaz, 2 istek, bekleme yok.
+        Döndürür: borsa stop'u güncellendiyse True.
         """
         try:
-            await self._safe_call(self.exchange.load_markets)
-            market     = self.exchange.markets.get(symbol, {})
-            price_prec = get_digits(market.get("precision", {}).get("price"))
-            sl_rounded = round(new_sl_price, price_prec)
+            price_prec = (await self._symbol_spec(symbol)).price_digits
+            sl_rounded = self.meta.round_price(symbol, new_sl_price)
+
+            if await self._replace_stop(symbol, sl_rounded):
+                log.info(f"  🔄 SL GÜNCELLENDI (Binance, atomik): {symbol}  → {sl_rounded:.{price_prec}f}")
+                return True
 
-            # 1) Eski stop emrini sil
+            # 1) Eski stop emrini sil (yerel emir defteri güvenilirse id ile, beklemesiz)
+            fast = self.user is not None and self.user.orders_synced(symbol)
             await self._cancel_algo_orders(symbol, retry=True)
-            await asyncio.sleep(0.2)  # Binance senkronizasyon bekleme
+            if not fast:
+                await asyncio.sleep(0.2)  # Binance senkronizasyon bekleme
 
             # 2) Yeni stop emrini koy
             try:
-                await self._safe_call(
+                sl_order = await self._order_call(
                     self.exchange.create_order,
                     symbol, "stop_market", "buy", None,
                     params={
@@ -1087,14 +1980,18 @@ class PumpSnifferBot:
                         "workingType"  : "MARK_PRICE",
                     }
                 )
+                self._track_stop(symbol, sl_order)
                 log.info(f"  🔄 SL GÜNCELLENDI (Binance): {symbol}  → {sl_rounded:.{price_prec}f}")
+                return True
             except ccxt.ExchangeError as e:
                 if "-4130" in str(e):
                     # -4130: Orphan stop hala duruyor — force temizle ve tekrar dene
                     log.warning(f"  ⚠️ -4130 yakalandı, orphan cleanup + retry: {symbol}")
+                    if self.user is not None:
+                        self.user.unsync_orders(symbol)   # Defter bir stop'u kaçırmış → tam imha
                     await self._cancel_algo_orders(symbol, retry=True)
                     await asyncio.sleep(0.3)
-                    await self._safe_call(
+                    sl_order = await self._order_call(
                         self.exchange.create_order,
                         symbol, "stop_market", "buy", None,
                         params={
@@ -1103,11 +2000,59 @@ class PumpSnifferBot:
                             "workingType"  : "MARK_PRICE",
                         }
                     )
+                    self._track_stop(symbol, sl_order)
                     log.info(f"  🔄 SL GÜNCELLENDI (retry sonrası): {symbol}  → {sl_rounded:.{price_prec}f}")
+                    return True
                 else:
                     raise
         except Exception as e:
             log.error(f"  ❌ Binance SL güncelleme hatası ({symbol}): {e}")
+        return False
+
+    async def _replace_stop(self, symbol: str, sl_price: float) -> bool:
+        """
+        Atomik SL değişimi: yeni STOP_MARKET (pozisyon miktarıyla reduceOnly; hedge modda
+        positionSide=SHORT) ÖNCE konur, ardından eski stop(lar) yerel emir defterindeki
+        id'leriyle iptal edilir. closePosition=True kullanılamaz — aynı yönde ikinci
+        closePosition stop'u -4130 ile reddedilir.
+        Yeni stop konamazsa eski stop yerinde kalır (hata yukarı iletilir).
+        Defter güvenilir değilse veya pozisyon miktarı akıştan bilinmiyorsa False döner.
+
+        Not: Binance'te koşullu emirler algo uç noktasındadır ve batchOrders ile
+        gönderilemez; iki istek sırayla yapılır.
+        """
+        if self.user is None or not self.user.orders_synced(symbol):
+            return False
+        qty = self.user.position(symbol)
+        if not qty:
+            return False
+
+        old = dict(self.user.orders.get(symbol, {}))
+        params = {"stopPrice": sl_price, "workingType": "MARK_PRICE"}
+        if await self._detect_position_mode():
+            params["positionSide"] = "SHORT"
+        else:
+            params["reduceOnly"] = True
+        order = await self._order_call(
+            self.exchange.create_order,
+            symbol, "stop_market", "buy", abs(qty),
+            params=params
+        )
+        self._track_stop(symbol, order)
+
+        for oid, algo in old.items():
+            try:
+                await self._order_call(self.exchange.cancel_order, oid, symbol,
+                                       params={"stop": True} if algo else {})
+            except Exception as e:
+                if "-2011" not in str(e) and "unknown order" not in str(e).lower():
+                    # Eski stop iptal edilemedi → iki stop var (ikisi de reduce-only, güvenli);
+                    # bir sonraki temizlik tam imha yolundan gitsin
+                    log.warning(f"  ⚠️ {symbol}: eski stop iptal edilemedi ({oid}): {e}")
+                    self.user.unsync_orders(symbol)
+                    return True
+            self.user.drop_order(symbol, oid)
+        return True
 
     # ─────────────────────────────────────────────────────────────────
     # 2.3.2  FİZİKSEL MARKET CLOSE YARDIMCISI
@@ -1131,7 +2076,7 @@ class PumpSnifferBot:
                     break
 
             if open_qty > 0:
-                await self._safe_call(
+                await self._order_call(
                     self.exchange.create_order,
                     symbol, "market", "buy", open_qty,
                     params={"reduceOnly": True}
@@ -1149,7 +2094,7 @@ class PumpSnifferBot:
     # 2.3.3  TRADE YÖNETİMİ (Fiziksel Binance Emirleriyle)
     # ─────────────────────────────────────────────────────────────────
 
-    async def manage_open_trades(self, equity: float):
+    async def manage_open_trades(self, equity: float, marks: Dict[str, float] = None):
         """
         The Shadow Tracker v4.0 — TICKER BAZLI Dinamik Stop-Loss Yönetimi.
 
@@ -1164,24 +2109,74 @@ class PumpSnifferBot:
         Stage 3 — SL Kontrol : current_price >= SL → fiziksel market close
         Stage 4 — Zararda yeşil mum → fiziksel market close (sadece KAPANMIŞ mumlar)
 
-        Stage 1-3: TICKER (mark/last price) kullanır — OHLCV çekmez.
-        Stage 4  : Sadece bu aşamada OHLCV çeker (kapanmış mum kontrolü).
-        """
-        closed = []
+        Stage 1-3: MARK PRICE kullanır (WS markPrice@1s; akış yoksa REST ticker).
+        Stage 4  : Kapanmış mum kontrolü (WS kline tamponu; akış yoksa OHLCV).
 
+        EŞZAMANLILIK: Her sembol ayrı bir asyncio görevinde (_manage_trade) ve kendi
+        sembol kilidi altında yönetilir. Bir sembolün yavaş SL güncellemesi diğerlerinin
+        stop kontrolünü bekletmez: önceki turu bitmemiş sembol bu turda atlanır, tur en
+        fazla MANAGER_INTERVAL_SEC bekler, kalan görevler arka planda sürer.
+        Emir çağrıları ORDER_RATE_PER_MIN bütçesini paylaşır (_order_call).
+        marks: turun mark price snapshot'ı (fetch_mark_snapshot); verilmezse sembol başına alınır.
+        """
         # ── KURAL 1: Async-safe iterasyon ──────────────────────────────
+        started = []
         for sym, trade in list(self.active_trades.items()):
+            task = self._manage_tasks.get(sym)
+            if task is not None and not task.done():
+                continue  # Önceki tur hâlâ sürüyor (ör. SL güncellemesi) — bekletme
+            task = self._manage_tasks[sym] = asyncio.create_task(
+                self._manage_trade(sym, trade, equity, marks))
+            started.append(task)
+
+        if started:
+            await asyncio.wait(started, timeout=Config.MANAGER_INTERVAL_SEC)
+        for sym in [s for s, t in self._manage_tasks.items() if t.done()]:
+            del self._manage_tasks[sym]
+
+    @staticmethod
+    def _should_push_sl(trade: TradeRecord) -> bool:
+        """
+        Borsa SL güncelleme kısıcısı. Gönder:
+          • borsadaki stop bilinmiyorsa veya breakeven henüz borsaya yansımadıysa,
+          • değişim ≥ SL_PUSH_MIN_STEP_BPS ise,
+          • son gönderimden bu yana ≥ SL_PUSH_MAX_DELAY_SEC geçtiyse.
+        Hızlı düşüşte her yeni dip için emir trafiği oluşmaz; RAM stop'u
+        (Stage 3) kesin fiyatla korumaya devam eder.
+        """
+        ex_sl = trade.exchange_stop_loss
+        if ex_sl <= 0:
+            return True
+        if trade.breakeven_triggered and ex_sl > trade.entry_price:
+            return True
+        step_bps = abs(ex_sl - trade.stop_loss) / ex_sl * 10_000.0
+        if step_bps >= Config.SL_PUSH_MIN_STEP_BPS:
+            return True
+        return time.monotonic() - trade._sl_pushed_at >= Config.SL_PUSH_MAX_DELAY_SEC
+
+    def _drop_trade(self, sym: str, trade: TradeRecord):
+        """Kapanan trade'i active_trades'ten çıkar (aynı kayıt hâlâ oradaysa)."""
+        if self.active_trades.get(sym) is trade:
+            del self.active_trades[sym]
+
+    def _sym_lock(self, sym: str) -> asyncio.Lock:
+        """Sembol başına emir kilidi — manager, trigger ve orphan temizliği aynı coinde çakışmaz."""
+        lock = self._sym_locks.get(sym)
+        if lock is None:
+            lock = self._sym_locks[sym] = asyncio.Lock()
+        return lock
+
+    async def _manage_trade(self, sym: str, trade: TradeRecord, equity: float,
+                            marks: Dict[str, float] = None):
+        """Tek bir açık trade'in Stage 1-4 yönetimi (manage_open_trades görevi)."""
+        async with self._sym_lock(sym):
+            if self.active_trades.get(sym) is not trade:
+                return  # Bu arada kapanmış
             try:
-                # ── KURAL 2: OHLCV yerine TICKER — anlık mark/last price ──
-                ticker = await self._safe_call(self.exchange.fetch_ticker, sym)
-                if not ticker:
-                    continue
-                current_price = ticker.get("mark") or ticker.get("last")
+                # ── KURAL 2: OHLCV yerine MARK PRICE — WS akışı, yoksa REST ticker ──
+                current_price = await self.fetch_mark_price(sym, marks)
                 if current_price is None:
-                    continue
-                current_price = float(current_price)
-
-                old_sl = trade.stop_loss  # SL değişimini takip etmek için
+                    return
 
                 # ── Stage 1: Breakeven — düşüş >= %BREAKEVEN_DROP_PCT → SL = entry ─
                 if not trade.breakeven_triggered:
@@ -1220,23 +2215,37 @@ class PumpSnifferBot:
                         log.info(f"  📉 TSL GÜNCELLE: {sym}  "
                                  f"YeniLow: {trade.lowest_low_reached:.6f}  SL → {trade.stop_loss:.6f}")
 
-                # ── KURAL 3: SL değiştiyse → ÖNCE temizle, SONRA güncelle ─────
-                if trade.stop_loss != old_sl:
-                    await self._cancel_algo_orders(sym, retry=True)
-                    await asyncio.sleep(0.2)
-                    await self._update_binance_sl(sym, trade.stop_loss)
-
-                # ── Stage 3: SL-Hit Kontrolü — current_price >= SL → kapat ────
-                if current_price >= trade.stop_loss:
-                    # Binance'te gerçek pozisyon var mı kontrol et
-                    real_exit_price = None
+                # ── KURAL 3: SL değiştiyse → borsa stop'unu güncelle (kısılmış) ─────
+                # RAM stop_loss her zaman kesin; borsaya yalnızca _should_push_sl izin
+                # verince gönderilir (bekleyen değişimler birleşir, son değer gider).
+                if trade.stop_loss != trade.exchange_stop_loss and self._should_push_sl(trade):
+                    if await self._update_binance_sl(sym, trade.stop_loss):
+                        trade.exchange_stop_loss = trade.stop_loss
+                        trade._sl_pushed_at = time.monotonic()
+
+                # ── Stage 3: SL-Hit Kontrolü — current_price >= SL veya borsa stop'u doldu → kapat ─
+                fill = None
+                if self.user is not None:
+                    entry_ms = int(datetime.fromisoformat(trade.entry_time).timestamp() * 1000) if trade.entry_time else 0
+                    fill = self.user.exit_fill(sym, after_ms=entry_ms)
+                if fill is not None or current_price >= trade.stop_loss:
+                    # Binance'te gerçek pozisyon var mı kontrol et (user-data akışı, yoksa REST)
+                    # ORDER_TRADE_UPDATE dolumu varsa gerçek çıkış fiyatı odur (her iki dalda da)
+                    real_exit_price = fill["price"] if fill is not None and fill["price"] > 0 else None
                     try:
-                        positions = await self._safe_call(self.exchange.fetch_positions, [sym])
-                        has_position = False
-                        for pos in positions:
-                            if pos.get("symbol") == sym and abs(float(pos.get("contracts", 0))) > 0:
-                                has_position = True
-                                break
+                        pos_amt = self.user.position(sym) if self.user is not None else None
+                        if pos_amt is not None:
+                            has_position = abs(pos_amt) > 0
+                            if has_position and fill is not None and fill["qty"] >= abs(pos_amt):
+                                # ACCOUNT_UPDATE henüz gelmedi — dolum pozisyonun tamamını kapattı
+                                has_position = False
+                        else:
+                            positions = await self._safe_call(self.exchange.fetch_positions, [sym])
+                            has_position = False
+                            for pos in positions:
+                                if pos.get("symbol") == sym and abs(float(pos.get("contracts", 0))) > 0:
+                                    has_position = True
+                                    break
                         if has_position:
                             # KURAL 3: Önce temizle, sonra kapat
                             await self._cancel_algo_orders(sym, retry=True)
@@ -1245,15 +2254,16 @@ class PumpSnifferBot:
                         else:
                             # Binance SL zaten tetiklenmiş — gerçek çıkış fiyatını al
                             log.info(f"  ℹ️ {sym}: Pozisyon zaten Binance SL ile kapanmış.")
-                            try:
-                                recent_trades = await self._safe_call(
-                                    self.exchange.fetch_my_trades, sym, limit=5
-                                )
-                                if recent_trades:
-                                    last_t = recent_trades[-1]
-                                    real_exit_price = float(last_t.get("price", current_price))
-                            except Exception:
-                                pass
+                            if real_exit_price is None:
+                                try:
+                                    recent_trades = await self._safe_call(
+                                        self.exchange.fetch_my_trades, sym, limit=5
+                                    )
+                                    if recent_trades:
+                                        last_t = recent_trades[-1]
+                                        real_exit_price = float(last_t.get("price", current_price))
+                                except Exception:
+                                    pass
                             # Yine de orphan emirleri temizle
                             await self._cancel_algo_orders(sym, retry=False)
                     except Exception:
@@ -1271,7 +2281,7 @@ class PumpSnifferBot:
                     trade.pnl_pct     = round(pnl_pct * 100, 4)
                     trade.pnl_usdt    = round(pnl_usd, 2)
                     self.trade_history.append(trade)
-                    closed.append(sym)
+                    self._drop_trade(sym, trade)
                     self._post_exit_price[sym] = exit_p
                     self._new_push[sym] = False
                     log.info(f"  🔴 {reason}: {sym}  |  PnL: {trade.pnl_usdt:+.2f} USDT")
@@ -1279,20 +2289,17 @@ class PumpSnifferBot:
                         notifier.notify_trade_close(sym, reason, trade.pnl_pct, trade.pnl_usdt)
                     except Exception:
                         pass
-                    continue  # Stage 3'te kapandı — Stage 4'e geçme
+                    return  # Stage 3'te kapandı — Stage 4'e geçme
 
-                # ── KURAL 4: Stage 4 İZOLASYONU — Sadece burada OHLCV çek ─────
-                # İşlem hâlâ açık → kapanmış mum kontrolü için minimal OHLCV
+                # ── KURAL 4: Stage 4 İZOLASYONU — Sadece burada mum verisi ─────
+                # İşlem hâlâ açık → kapanmış mum kontrolü (WS tamponu, yoksa minimal OHLCV)
                 try:
-                    df_raw = await self.fetch_ohlcv(sym, Config.TIMEFRAME, limit=3)
-                    if df_raw.empty:
-                        continue
-                    df_closed = self._remove_live_candle(df_raw, Config.TIMEFRAME)
+                    df_closed = await self.fetch_closed_candles(sym, 2)
                     if df_closed.empty:
-                        continue
+                        return
                     closed_candle = df_closed.iloc[-1]
                 except Exception:
-                    continue
+                    return
 
                 # Aynı kapanmış mumu tekrar saymamak için timestamp kontrolü
                 candle_ts = str(df_closed.index[-1])
@@ -1313,7 +2320,7 @@ class PumpSnifferBot:
                         trade.pnl_pct     = round(pnl_pct * 100, 4)
                         trade.pnl_usdt    = round(pnl_usd, 2)
                         self.trade_history.append(trade)
-                        closed.append(sym)
+                        self._drop_trade(sym, trade)
                         self._post_exit_price[sym] = exit_p
                         self._new_push[sym] = False
                         # KURAL 3: Önce temizle, sonra kapat
@@ -1325,7 +2332,7 @@ class PumpSnifferBot:
                             notifier.notify_trade_close(sym, "GREEN-10", trade.pnl_pct, trade.pnl_usdt)
                         except Exception:
                             pass
-                        continue
+                        return
 
                     # Küçük zararda yeşil → sayacı artır, 2'de kapat
                     trade.consec_green_loss += 1
@@ -1339,7 +2346,7 @@ class PumpSnifferBot:
                         trade.pnl_pct     = round(pnl_pct * 100, 4)
                         trade.pnl_usdt    = round(pnl_usd, 2)
                         self.trade_history.append(trade)
-                        closed.append(sym)
+                        self._drop_trade(sym, trade)
                         self._post_exit_price[sym] = exit_p
                         self._new_push[sym] = False
                         # KURAL 3: Önce temizle, sonra kapat
@@ -1351,7 +2358,7 @@ class PumpSnifferBot:
                             notifier.notify_trade_close(sym, "2xGREEN-LOSS", trade.pnl_pct, trade.pnl_usdt)
                         except Exception:
                             pass
-                        continue
+                        return
                 else:
                     trade._last_checked_ts = candle_ts
                     trade.consec_green_loss = 0  # Kırmızı veya kârda yeşil → sayacı sıfırla
@@ -1359,9 +2366,6 @@ class PumpSnifferBot:
             except Exception as e:
                 log.error(f"  Trade yönetim hatası ({sym}): {e}")
 
-        for sym in closed:
-            del self.active_trades[sym]
-
     # ─────────────────────────────────────────────────────────────────
     # 2.4  ZAMAN AYARLI 4H MİMARİSİ  (v3.9)
     #      3 Asenkron Görev: Prep-Scan + Trigger + Manager
@@ -1430,7 +2434,8 @@ class PumpSnifferBot:
           1. Sonraki 4H kapanışa kalan süreyi hesapla.
           2. Kapanışa 10 dakika kalana kadar uyu.
           3. scan_universe() çalıştır → watchlist hazırla.
-          4. Orphan algo emirleri temizle.
+          4. Orphan algo emirleri temizle + girişe ön hazırlık (PREARM_ENTRY:
+             ISOLATED margin, kaldıraç, market tablosu) → tetikte sadece emir gider.
           5. Kapanış saatini geç → sonraki döngüye devam.
 
         Böylece trigger_loop 4H kapanışında uyanınca watchlist HAZIR olur.
@@ -1462,10 +2467,20 @@ class PumpSnifferBot:
                 await self.scan_universe()
 
                 # 🧹 ORPHAN CLEANER — Watchlist'te olup active trade'i OLMAYAN coinlerin stoplarını temizle
+                #    PREARM_ENTRY açıksa aynı turda margin/kaldıraç da kurulur (_arm_symbol)
+                self._armed.clear()
+                armed = 0
                 for sym in list(self.watchlist.keys()):
                     if sym not in self.active_trades:
-                        await self._cancel_algo_orders(sym, retry=False)
+                        async with self._sym_lock(sym):
+                            if sym not in self.active_trades:
+                                if Config.PREARM_ENTRY:
+                                    armed += await self._arm_symbol(sym)
+                                else:
+                                    await self._cancel_algo_orders(sym, retry=False)
                         await asyncio.sleep(0.1)
+                if Config.PREARM_ENTRY:
+                    log.info(f"🎯 [PREP] {armed} coin girişe hazırlandı (margin + kaldıraç + emir temizliği)")
 
                 # PREP bitti → Trigger'a "watchlist hazır" sinyali ver
                 self._prep_done.set()
@@ -1505,20 +2520,25 @@ class PumpSnifferBot:
 
         MANTIK:
           1. Sonraki 4H kapanışa kalan süre + 2 saniye bekle.
-          2. Watchlist'teki coinlerin OHLCV'sini çek (limit=3 yeterli).
-          3. Canlı mumu at → KAPANMIŞ son mumu al (iloc[-1] after _remove_live_candle).
+          2. Watchlist'teki coinlerin KAPANMIŞ mumlarını al — WS akışı açıksa kapanış
+             anında uyanıp kline 'x' mesajını bekler ve tampondan okur (REST yok);
+             akış yoksa +2sn'de OHLCV çekip canlı mumu atar (fetch_closed_candles).
+          3. KAPANMIŞ son mum = iloc[-1].
           4. check_entry_signal → kırmızı mum kontrolü.
           5. Sinyal varsa open_short.
           6. Sonraki 4H kapanışa kadar tekrar uyu.
 
         NOT: _processed_signals (Tek Kurşun kilidi) kullanılmaya devam eder.
         """
-        TRIGGER_OFFSET_SEC = 2  # Kapanıştan 2 saniye sonra
+        TRIGGER_OFFSET_SEC = 2  # Kapanıştan 2 saniye sonra (WS akışı yoksa)
 
         while self.running:
             try:
                 secs_to_close = self._seconds_until_next_close()
-                wait_secs = secs_to_close + TRIGGER_OFFSET_SEC
+                close_ms = int(self._next_close_utc().timestamp() * 1000)
+                # WS akışı sağlıklıysa kapanış anında uyan, kline 'x' mesajını bekle
+                ws_live = self.market is not None and self.market.healthy
+                wait_secs = secs_to_close + (0 if ws_live else TRIGGER_OFFSET_SEC)
 
                 if wait_secs > 5:
                     trigger_time = datetime.now(timezone.utc) + timedelta(seconds=wait_secs)
@@ -1527,6 +2547,20 @@ class PumpSnifferBot:
 
                 await asyncio.sleep(wait_secs)
 
+                ws_ok = False
+                if ws_live and self.watchlist:
+                    t0 = time.monotonic()
+                    ws_ok = await self.market.wait_closed(list(self.watchlist),
+                                                          close_ms - self.market.tf_ms,
+                                                          timeout=TRIGGER_OFFSET_SEC + 3)
+                    if ws_ok:
+                        log.info(f"📶 [TRIGGER] Kapanış mesajları {(time.monotonic() - t0) * 1000:.0f}ms içinde geldi")
+                if not ws_ok:
+                    # Akış yok / gecikti → REST için eski +2sn ofsetine kadar bekle
+                    lag = close_ms / 1000 + TRIGGER_OFFSET_SEC - time.time()
+                    if lag > 0:
+                        await asyncio.sleep(lag)
+
                 # PREP taraması henüz bitmemişse bekle (max 120 saniye)
                 if self._prep_done and not self._prep_done.is_set():
                     log.info("⏳ [TRIGGER] PREP taraması henüz bitmedi — watchlist hazır olana kadar bekleniyor…")
@@ -1546,12 +2580,8 @@ class PumpSnifferBot:
                     log.info(f"  ℹ️ Tüm slotlar dolu ({Config.MAX_ACTIVE_TRADES}/{Config.MAX_ACTIVE_TRADES}) — atlanıyor")
                     continue
 
-                # Equity al (tüm coinler için tek sefer)
-                try:
-                    balance = await self._safe_call(self.exchange.fetch_balance)
-                    equity = float(balance.get("total", {}).get("USDT", 10_000))
-                except Exception:
-                    equity = 10_000
+                # Equity al (tüm coinler için tek sefer, her zaman taze)
+                equity = await self.fetch_equity()
 
                 # Watchlist'teki her coini kontrol et — en yüksek pump % önce (büyükten küçüğe)
                 sorted_watchlist = sorted(
@@ -1565,9 +2595,7 @@ class PumpSnifferBot:
                     if len(self.active_trades) >= Config.MAX_ACTIVE_TRADES:
                         break
                     try:
-                        df = await self.fetch_ohlcv(sym, Config.TIMEFRAME,
-                                                    limit=Config.BB_LENGTH + 10)
-                        df = self._remove_live_candle(df, Config.TIMEFRAME)
+                        df = await self.fetch_closed_candles(sym, Config.BB_LENGTH + 10)
                         if df.empty:
                             continue
 
@@ -1605,11 +2633,12 @@ class PumpSnifferBot:
                             log.info(f"  🎯 [v3.9] SİNYAL: {sym}  |  {'  '.join(signal['reasons'])}")
                             self._processed_signals[sym] = sig_ts
 
-                            await self.open_short(
-                                sym, signal["entry_price"], item, equity,
-                                entry_candle_open=signal.get("entry_candle_open",
-                                                             signal["entry_price"]),
-                            )
+                            async with self._sym_lock(sym):
+                                await self.open_short(
+                                    sym, signal["entry_price"], item, equity,
+                                    entry_candle_open=signal.get("entry_candle_open",
+                                                                 signal["entry_price"]),
+                                )
                         else:
                             # Sinyal tetiklenmedi → NEDEN olduğunu logla
                             reasons = signal.get("reasons", ["Bilinmeyen"])
@@ -1627,6 +2656,8 @@ class PumpSnifferBot:
         """
         GÖREV 3 — TRADE MANAGER: SADECE açık trade'leri yönetir (SL/TSL/BE/Green çıkış).
         Her 5 saniyede bir çalışır. Rate limit safe — sadece açık pozisyonlar kontrol edilir.
+        Tur başına tek mark price snapshot'ı (WS veya tek premiumIndex isteği) ve
+        BALANCE_CACHE_SEC önbellekli bakiye → N+1 istek yerine en fazla 1.
         Geçmiş fitillere bakmama ve anlık fiyatla TSL/BE hesaplama kuralları korunur.
         """
         while self.running:
@@ -1635,18 +2666,23 @@ class PumpSnifferBot:
                     await asyncio.sleep(Config.MANAGER_INTERVAL_SEC)
                     continue
 
-                try:
-                    balance = await self._safe_call(self.exchange.fetch_balance)
-                    equity  = float(balance.get("total", {}).get("USDT", 10_000))
-                except Exception:
-                    equity = 10_000
-
-                await self.manage_open_trades(equity)
+                # Tur başına tek snapshot: tüm mark price'lar + önbellekli bakiye
+                equity = await self.fetch_equity(max_age=Config.BALANCE_CACHE_SEC)
+                marks  = await self.fetch_mark_snapshot(list(self.active_trades))
+                await self.manage_open_trades(equity, marks)
 
             except Exception as e:
                 log.error(f"🔴 Trade Manager hatası: {e}")
 
-            await asyncio.sleep(Config.MANAGER_INTERVAL_SEC)
+            if self.user is not None:
+                # Borsa stop'u dolarsa beklemeden yeni tur (gerçek çıkış anında yazılır)
+                try:
+                    await asyncio.wait_for(self.user.fill_event.wait(), Config.MANAGER_INTERVAL_SEC)
+                except asyncio.TimeoutError:
+                    pass
+                self.user.fill_event.clear()
+            else:
+                await asyncio.sleep(Config.MANAGER_INTERVAL_SEC)
 
     # ── ANA GİRİŞ NOKTASI ────────────────────────────────────────────
 
@@ -1659,6 +2695,8 @@ class PumpSnifferBot:
           GÖREV 1 • prep_scan_loop  : {tf} kapanıştan önce → Universe taraması
           GÖREV 2 • trigger_loop    : {tf} kapanıştan 2sn SONRA → Sinyal kontrolü + SHORT
           GÖREV 3 • manager_loop    : Her 5 saniye → Açık trade yönetimi (TSL/BE/SL)
+          (opsiyonel) market.run    : WebSocket kline + markPrice akışı (WS_MARKET_DATA)
+          (opsiyonel) user.run      : listenKey user-data akışı — dolum / pozisyon / bakiye (USER_STREAM)
         """
         self.running = True
         tf           = Config.TIMEFRAME.upper()
@@ -1673,103 +2711,701 @@ class PumpSnifferBot:
         log.info(f"  ⏰ Sonraki {tf} kapanış: {next_close.strftime('%H:%M')} UTC  |  "
                  f"Prep: {prep_time.strftime('%H:%M')} UTC")
         log.info(f"  📡 PREP: kapanışa -{prep_offset//60}dk  |  "
-                 f"🎯 TRIGGER: kapanışa +2sn  |  "
+                 f"🎯 TRIGGER: kapanışa {'WS anlık' if self.market else '+2sn'}  |  "
                  f"⚡ MANAGER: {Config.MANAGER_INTERVAL_SEC}s")
         log.info("=" * 75)
 
+        tasks = [
+            self._prep_scan_loop(),
+            self._trigger_loop(),
+            self._manager_loop(),
+        ]
+        if self.market is not None:
+            tasks.append(self.market.run(
+                lambda: set(self.watchlist) | set(self.active_trades),
+                lambda: self.running,
+            ))
+        if self.user is not None:
+            tasks.append(self.user.run(lambda: self.running))
         try:
-            await asyncio.gather(
-                self._prep_scan_loop(),
-                self._trigger_loop(),
-                self._manager_loop(),
-            )
+            await asyncio.gather(*tasks)
         except KeyboardInterrupt:
             log.info("Bot durduruldu (Ctrl+C).")
         finally:
             self.running = False
+            # Yarım kalmış SL değişimi / kapanış emri kapalı oturuma düşmesin:
+            # çalışan _manage_trade görevlerini bekle (en fazla 15sn), kalanları iptal et
+            pending = [t for t in self._manage_tasks.values() if not t.done()]
+            if pending:
+                log.info(f"⏳ {len(pending)} trade yönetim görevi bitmesi bekleniyor…")
+                _, late = await asyncio.wait(pending, timeout=15.0)
+                for t in late:
+                    t.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+            if self.market is not None:
+                await self.market.close()
+            if self.user is not None:
+                await self.user.close()
             await self.exchange.close()
 
 
 # ══════════════════════════════════════════════════════════════════════════
-#  BÖLÜM 3 — BACKTESTER SINIFI
+#  BÖLÜM 2.8 — İNDİRME ZAMANLAYICISI  (request-weight token bucket + worker havuzu)
 # ══════════════════════════════════════════════════════════════════════════
 
-class Backtester:
-    """
-    Pump & Dump Reversion stratejisini geçmiş veri üzerinde simüle eder.
-    • Bar-by-bar iterasyon
-    • Watchlist mantığını simüle eder
-    • Giriş / SL / TP1 / TP2 mantığını uygular
-    • Detaylı terminal raporu çıkarır
-    """
+def klines_weight(limit: int) -> int:
+    """Binance Futures /fapi/v1/klines request weight'i (limit'e göre)."""
+    if limit < 100:
+        return 1
+    if limit < 500:
+        return 2
+    if limit <= 1000:
+        return 5
+    return 10
 
-    def __init__(self, symbols: List[str] = None, days: int = None,
-                 initial_capital: float = None,
-                 start_dt: datetime = None, end_dt: datetime = None):
-        self.symbols   = symbols or Config.BACKTEST_SYMBOLS
-        self.capital   = initial_capital or Config.BACKTEST_INITIAL_CAPITAL
-        self.exchange  = None   # async init'te set edilecek
-        self.all_data: Dict[str, pd.DataFrame] = {}
-        self.all_data_5m: Dict[str, pd.DataFrame] = {}  # sym → 5m DataFrame (intra-bar sim için)
-        self.trades: List[TradeRecord] = []
-        self.equity_curve: List[float] = []
 
-        # Tarih aralığı: start_dt/end_dt verilmişse kullan, yoksa days'e göre
-        if start_dt is not None and end_dt is not None:
-            self.start_dt = start_dt.replace(tzinfo=timezone.utc) if start_dt.tzinfo is None else start_dt
-            self.end_dt   = end_dt.replace(tzinfo=timezone.utc)   if end_dt.tzinfo is None else end_dt
-        else:
-            _days = days or Config.BACKTEST_DAYS
-            self.end_dt   = datetime.now(timezone.utc)
-            self.start_dt = self.end_dt - timedelta(days=_days)
+class WeightLimiter:
+    """
+    Binance IP request-weight bütçesi için token bucket.
 
-    # ─────────────────────────────────────────────────────────────────
-    # 3.1  VERİ ÇEKME
-    # ─────────────────────────────────────────────────────────────────
+    • Kova kapasitesi = dakikalık bütçe (DOWNLOAD_WEIGHT_BUDGET), dolum = bütçe / 60 sn.
+    • acquire(w): w kadar token yoksa sadece gereken süre kadar bekler (sabit sleep yok).
+    • observe(headers): her yanıttaki X-MBX-USED-WEIGHT-1M ile kovayı sunucu gerçeğine
+      çeker (aynı IP'deki başka süreçlerin harcadığı ağırlık da hesaba girer).
+    • penalize(sn): 429 / 418 → Retry-After kadar tüm istekleri durdurur.
+    """
 
-    async def _init_exchange(self):
-        """Public data için exchange bağlantısı (API key gereksiz)."""
-        self.exchange = _make_binance_exchange()
+    def __init__(self, budget_per_min: float = None):
+        self.capacity = float(budget_per_min or Config.DOWNLOAD_WEIGHT_BUDGET)
+        self.rate     = self.capacity / 60.0
+        self.tokens   = self.capacity
+        self._stamp   = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock    = asyncio.Lock()
+        self.used_weight = 0      # son okunan X-MBX-USED-WEIGHT-1M
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    async def acquire(self, weight: int = 1):
+        async with self._lock:   # FIFO: büyük istek küçüklerin arkasında aç kalmasın
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self._blocked_until - now
+                if wait <= 0 and self.tokens >= weight:
+                    self.tokens -= weight
+                    return
+                await asyncio.sleep(max(wait, (weight - self.tokens) / self.rate, 0.01))
+
+    def observe(self, headers) -> None:
+        if not headers:
+            return
+        used = None
+        for key, value in headers.items():
+            if key.lower() == "x-mbx-used-weight-1m":
+                used = value
+                break
+        try:
+            used = int(used)
+        except (TypeError, ValueError):
+            return
+        self.used_weight = used
+        self._refill(time.monotonic())
+        self.tokens = min(self.tokens, self.capacity - used)
 
-    async def _fetch_historical(self, symbol: str) -> pd.DataFrame:
-        """
-        Belirli bir sembolün tarih aralığındaki 4H verilerini çek.
-        Pump window için start_dt'den 6 mum (24 saat) önce başla.
-        """
-        fetch_start = self.start_dt - timedelta(hours=Config.PUMP_WINDOW_CANDLES * 4)
-        since_ms    = int(fetch_start.timestamp() * 1000)
-        until_ms    = int(self.end_dt.timestamp() * 1000)
-        all_candles = []
-        limit = 500
-        since_cur = since_ms
+    def penalize(self, seconds: float) -> None:
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+        self.tokens = 0.0
 
-        while True:
+
+def _retry_after(headers, default: float = 5.0) -> float:
+    for key, value in (headers or {}).items():
+        if key.lower() == "retry-after":
             try:
-                candles = await self.exchange.fetch_ohlcv(
-                    symbol, Config.TIMEFRAME, since=since_cur, limit=limit
-                )
-            except Exception as e:
-                log.warning(f"  {symbol} veri çekme hatası: {e}")
+                return max(float(value), 1.0)
+            except (TypeError, ValueError):
                 break
+    return default
 
-            if not candles:
-                break
-            all_candles.extend(candles)
-            last_ts = candles[-1][0]
-            if last_ts >= until_ms or len(candles) < limit:
-                break
-            since_cur = last_ts + 1
-            await asyncio.sleep(0.3)
 
-        if not all_candles:
+async def fetch_ohlcv_weighted(exchange, limiter: Optional["WeightLimiter"], symbol: str, timeframe: str,
+                               since: int, limit: int, retries: int = 3) -> list:
+    """
+    exchange.fetch_ohlcv, ağırlık bütçesi üzerinden: önce token al, sonra yanıt
+    başlıklarıyla kovayı güncelle. 429/418 → Retry-After kadar bekle ve tekrar dene.
+    Diğer hatalar (BadSymbol vb.) çağırana aynen iletilir.
+    """
+    if limiter is None:   # zamanlayıcısız kullanım (ör. harici exchange nesnesi)
+        return await exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=limit)
+    weight = klines_weight(limit)
+    for attempt in range(retries + 1):
+        await limiter.acquire(weight)
+        try:
+            candles = await exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=limit)
+        except (ccxt.RateLimitExceeded, ccxt.DDoSProtection):
+            headers = getattr(exchange, "last_response_headers", None)
+            limiter.observe(headers)
+            limiter.penalize(_retry_after(headers))
+            if attempt == retries:
+                raise
+            log.warning(f"  {symbol} {timeframe}: rate-limit (429/418) — Retry-After bekleniyor")
+            continue
+        limiter.observe(getattr(exchange, "last_response_headers", None))
+        return candles
+    return []
+
+
+class DownloadPool:
+    """
+    Semaphore ile sınırlı eşzamanlı indirme havuzu. submit() edilen coroutine'ler en fazla
+    `concurrency` kadar aynı anda çalışır; bir iş bitince yenisini submit edebilir
+    (4H → 5m boru hattı). join() kuyruk tamamen boşalana kadar bekler.
+    """
+
+    def __init__(self, concurrency: int = None):
+        self._sem   = asyncio.Semaphore(concurrency or Config.DOWNLOAD_CONCURRENCY)
+        self._tasks: set = set()
+
+    def submit(self, coro) -> "asyncio.Task":
+        async def _run():
+            async with self._sem:
+                return await coro
+        task = asyncio.ensure_future(_run())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def join(self):
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+
+# ══════════════════════════════════════════════════════════════════════════
+#  BÖLÜM 2.9 — YEREL MUM DEPOSU  (CandleStore + offline CSV verisi)
+# ══════════════════════════════════════════════════════════════════════════
+
+def candles_to_frame(candles) -> pd.DataFrame:
+    """ccxt fetch_ohlcv satırları → UTC DatetimeIndex'li, tekilleştirilmiş OHLCV DataFrame."""
+    if candles is None or len(candles) == 0:
+        return pd.DataFrame()
+    df = pd.DataFrame(candles, columns=["timestamp", "open", "high", "low", "close", "volume"])
+    df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms", utc=True)
+    df.drop_duplicates(subset="timestamp", inplace=True)
+    df.sort_values("timestamp", inplace=True)
+    df.set_index("timestamp", inplace=True)
+    return df
+
+
+class CandleStore:
+    """
+    (sembol, timeframe) başına tek sütunlu dosya: int64 ms timestamp + float64 OHLCV.
+
+    • Format: pyarrow varsa Arrow IPC (.arrow), yoksa yapılandırılmış .npy —
+      ikisi de memory-map ile okunur, sadece istenen aralık kopyalanır.
+    • manifest.json: her dosyanın KAPSADIĞI aralık [start, end] (ms). Kapsam,
+      "bu aralıkta borsada olan tüm kapanmış mumlar dosyada" demektir
+      (listelenmeden önceki boş bölge dahil).
+    • fetch(): sadece kapsam dışında kalan baş / son boşluğu indirir; aynı
+      pencerede tekrar koşan backtest hiç network çağrısı yapmaz.
+    """
+
+    COLUMNS = ("timestamp", "open", "high", "low", "close", "volume")
+    _NPY_DTYPE = np.dtype([("timestamp", "<i8"), ("open", "<f8"), ("high", "<f8"),
+                           ("low", "<f8"), ("close", "<f8"), ("volume", "<f8")])
+
+    def __init__(self, root: str = None):
+        self.root = root or Config.CANDLE_STORE_DIR or os.path.join(
+            os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "candle_store")
+        self._manifest_path = os.path.join(self.root, "manifest.json")
+        self._manifest: Dict[str, dict] = self._load_manifest()
+
+    # ── Manifest ────────────────────────────────────────────────────
+    def _load_manifest(self) -> Dict[str, dict]:
+        try:
+            with open(self._manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_manifest(self):
+        tmp = self._manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp, self._manifest_path)
+
+    @staticmethod
+    def _key(symbol: str, timeframe: str) -> str:
+        return f"{symbol}|{timeframe}"
+
+    def _path(self, symbol: str, timeframe: str, fmt: str) -> str:
+        safe = symbol.replace("/", "_").replace(":", "_")
+        return os.path.join(self.root, timeframe, f"{safe}.{fmt}")
+
+    def covered(self, symbol: str, timeframe: str) -> Optional[Tuple[int, int]]:
+        """Manifest'teki kapsam aralığı (start_ms, end_ms) — yoksa None."""
+        entry = self._manifest.get(self._key(symbol, timeframe))
+        if not entry:
+            return None
+        return int(entry["start"]), int(entry["end"])
+
+    # ── Okuma / yazma ───────────────────────────────────────────────
+    def _read_columns(self, symbol: str, timeframe: str,
+                      since_ms: int, until_ms: int) -> Optional[Dict[str, np.ndarray]]:
+        """Dosyayı mmap ile aç, [since_ms, until_ms] dilimini searchsorted ile kopyala."""
+        entry = self._manifest.get(self._key(symbol, timeframe))
+        if not entry:
+            return None
+        fmt  = entry.get("format", "npy")
+        path = self._path(symbol, timeframe, fmt)
+        if not os.path.exists(path):
+            return None
+        if fmt == "arrow":
+            if not HAS_PYARROW:
+                return None
+            with pa.memory_map(path, "r") as source:
+                table = pa.ipc.open_file(source).read_all()
+                ts = table.column("timestamp").to_numpy()
+                lo = int(np.searchsorted(ts, since_ms, side="left"))
+                hi = int(np.searchsorted(ts, until_ms, side="right"))
+                return {c: np.array(table.column(c).to_numpy()[lo:hi]) for c in self.COLUMNS}
+        arr = np.load(path, mmap_mode="r")
+        ts  = arr["timestamp"]
+        lo  = int(np.searchsorted(ts, since_ms, side="left"))
+        hi  = int(np.searchsorted(ts, until_ms, side="right"))
+        cols = {c: np.array(arr[c][lo:hi]) for c in self.COLUMNS}
+        del arr
+        return cols
+
+    def read(self, symbol: str, timeframe: str, since_ms: int, until_ms: int) -> pd.DataFrame:
+        """[since_ms, until_ms] aralığındaki mumları DataFrame olarak döndür (network yok)."""
+        cols = self._read_columns(symbol, timeframe, since_ms, until_ms)
+        if cols is None or len(cols["timestamp"]) == 0:
             return pd.DataFrame()
+        df = pd.DataFrame({c: cols[c] for c in self.COLUMNS[1:]},
+                          index=pd.to_datetime(cols["timestamp"], unit="ms", utc=True))
+        df.index.name = "timestamp"
+        return df
 
-        df = pd.DataFrame(all_candles,
-                          columns=["timestamp", "open", "high", "low", "close", "volume"])
-        df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms", utc=True)
-        df.drop_duplicates(subset="timestamp", inplace=True)
-        df.sort_values("timestamp", inplace=True)
-        df.set_index("timestamp", inplace=True)
+    def write(self, symbol: str, timeframe: str, candles, cov_start: int, cov_end: int):
+        """
+        Yeni mumları mevcut dosyayla birleştir (aynı timestamp → yeni satır kazanır),
+        sıralı yaz ve manifest kapsamını [cov_start, cov_end] ile genişlet.
+        Yazma geçici dosya + os.replace ile atomiktir.
+        """
+        new = np.asarray(candles, dtype=float).reshape(-1, 6) if len(candles) else np.empty((0, 6))
+        old = self._read_columns(symbol, timeframe, np.iinfo(np.int64).min, np.iinfo(np.int64).max)
+        ts  = new[:, 0].astype(np.int64)
+        vals = [new[:, k] for k in range(1, 6)]
+        if old is not None and len(old["timestamp"]):
+            ts   = np.concatenate([ts, old["timestamp"]])
+            vals = [np.concatenate([v, old[c]]) for v, c in zip(vals, self.COLUMNS[1:])]
+        ts, first = np.unique(ts, return_index=True)   # ilk görülen = yeni veri
+        vals = [v[first] for v in vals]
+
+        prev = self.covered(symbol, timeframe)
+        if prev is not None:
+            cov_start, cov_end = min(cov_start, prev[0]), max(cov_end, prev[1])
+
+        fmt  = "arrow" if HAS_PYARROW else "npy"
+        path = self._path(symbol, timeframe, fmt)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp  = path + ".tmp"
+        if fmt == "arrow":
+            table = pa.table({"timestamp": pa.array(ts, type=pa.int64()),
+                              **{c: pa.array(v, type=pa.float64())
+                                 for c, v in zip(self.COLUMNS[1:], vals)}})
+            with pa.OSFile(tmp, "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+        else:
+            rec = np.empty(len(ts), dtype=self._NPY_DTYPE)
+            rec["timestamp"] = ts
+            for c, v in zip(self.COLUMNS[1:], vals):
+                rec[c] = v
+            with open(tmp, "wb") as f:
+                np.save(f, rec)
+        os.replace(tmp, path)
+
+        self._manifest[self._key(symbol, timeframe)] = {
+            "start": int(cov_start), "end": int(cov_end), "rows": int(len(ts)), "format": fmt,
+        }
+        self._save_manifest()
+
+    # ── Boşluk indirme ──────────────────────────────────────────────
+    async def fetch(self, symbol: str, timeframe: str, since_ms: int, until_ms: int,
+                    download) -> pd.DataFrame:
+        """
+        [since_ms, until_ms] aralığını depodan döndür; kapsam dışı baş/son boşluğu
+        `await download(since, until)` (ccxt satır listesi döndüren sayfalama
+        döngüsü) ile indirip depoya ekle. Kapanmamış (canlı) mum asla saklanmaz.
+
+        Sayfalama ileri doğru olduğundan gelen veri her zaman boşluğun başından
+        itibaren kesintisizdir; kapsam sadece gerçekten ulaşılan noktaya kadar
+        genişletilir (yarıda kesilen indirme bir sonraki koşuda tamamlanır).
+        """
+        tf_ms     = ccxt.Exchange.parse_timeframe(timeframe) * 1000
+        closed_ms = int(time.time() * 1000) - tf_ms      # son kapanmış mumun en geç açılışı
+        target    = min(until_ms, closed_ms)
+        cov       = self.covered(symbol, timeframe)
+
+        def _has_candle(a: int, b: int) -> bool:
+            # Binance mumları tf katlarına hizalı: [a, b] içinde açılış zamanı var mı?
+            return -(-a // tf_ms) * tf_ms <= b
+
+        gaps: List[Tuple[str, int, int]] = []
+        if cov is None:
+            gaps.append(("full", since_ms, target))
+        else:
+            if since_ms < cov[0] and _has_candle(since_ms, cov[0] - 1):
+                gaps.append(("head", since_ms, cov[0] - 1))
+            if target > cov[1] and _has_candle(cov[1] + 1, target):
+                gaps.append(("tail", cov[1] + 1, target))
+
+        for kind, g_start, g_end in gaps:
+            if g_start > g_end:
+                continue
+            candles = [c for c in (await download(g_start, g_end) or []) if c[0] <= closed_ms]
+            if not candles:
+                continue
+            last_ts = int(candles[-1][0])
+            if kind == "head":
+                if last_ts < cov[0] - tf_ms:
+                    continue                          # mevcut bloğa ulaşamadı → kapsamı genişletme
+                self.write(symbol, timeframe, candles, g_start, cov[1])
+            else:
+                reached = last_ts + tf_ms > g_end
+                self.write(symbol, timeframe, candles, g_start if kind == "full" else cov[0],
+                           g_end if reached else last_ts)
+            cov = self.covered(symbol, timeframe)
+
+        return self.read(symbol, timeframe, since_ms, until_ms)
+
+
+# ── Offline veri: data_fetcher.py CSV şeması (timestamp, open, high, low, close, volume) ──
+
+def _symbol_from_filename(stem: str) -> str:
+    """data_fetcher dosya adı → sembol: 'TRB_USDT_USDT' → 'TRB/USDT:USDT', 'TRB_USDT' → 'TRB/USDT'."""
+    parts = stem.split("_")
+    if len(parts) >= 3:
+        return f"{parts[0]}/{parts[1]}:{'_'.join(parts[2:])}"
+    if len(parts) == 2:
+        return f"{parts[0]}/{parts[1]}"
+    return stem
+
+
+def _local_symbol_files(data_dir: str) -> Dict[str, str]:
+    """Sembol → CSV yolu. _coin_list.csv varsa oradan (dosya adı data_dir'e göre çözülür), yoksa klasörden."""
+    files: Dict[str, str] = {}
+    coin_list = os.path.join(data_dir, "_coin_list.csv")
+    if os.path.exists(coin_list):
+        cl = pd.read_csv(coin_list)
+        for sym, f in zip(cl["symbol"], cl["file"]):
+            # _coin_list başka makinede mutlak yol ile yazılmış olabilir → sadece dosya adı
+            path = os.path.join(data_dir, os.path.basename(str(f).replace("\\", "/")))
+            if os.path.exists(path):
+                files[str(sym)] = path
+        return files
+    for name in sorted(os.listdir(data_dir)):
+        if name.endswith(".csv") and not name.startswith("_"):
+            files[_symbol_from_filename(name[:-4])] = os.path.join(data_dir, name)
+    return files
+
+
+def read_local_ohlcv(path: str) -> pd.DataFrame:
+    """
+    Tek CSV → UTC DatetimeIndex'li OHLCV DataFrame.
+    timestamp: data_fetcher'daki gibi naive UTC tarih ya da int ms olabilir.
+    """
+    raw = pd.read_csv(path)
+    ts  = raw["timestamp"]
+    if pd.api.types.is_numeric_dtype(ts):
+        idx = pd.to_datetime(ts, unit="ms", utc=True)
+    else:
+        idx = pd.to_datetime(ts, utc=True)
+    df = raw[["open", "high", "low", "close", "volume"]].astype(float)
+    df.index = pd.DatetimeIndex(idx, name="timestamp")
+    return df[~df.index.duplicated(keep="last")].sort_index()
+
+
+def split_local_ohlcv(df: pd.DataFrame, timeframe: str) -> Tuple[pd.DataFrame, Optional[pd.DataFrame]]:
+    """
+    Dosya timeframe'i strateji timeframe'inden (4H) küçükse 4H barlara resample et
+    (UTC 00:00 hizalı, Binance ile aynı) ve ince veriyi intra-bar verisi olarak döndür.
+    Kenarlardaki yarım 4H barlar atılır. Döndürür: (df_tf, df_intra | None)
+    """
+    tf   = pd.Timedelta(seconds=ccxt.Exchange.parse_timeframe(timeframe))
+    step = df.index.to_series().diff().median() if len(df) > 1 else pd.NaT
+    if pd.isna(step) or step >= tf:
+        return df, None
+
+    grp    = df.resample(tf, origin="epoch", label="left", closed="left")
+    bars   = grp.agg({"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"})
+    counts = grp["close"].count()
+    bars, counts = bars[counts > 0], counts[counts > 0]          # veri boşluğu → bar yok
+    full = np.flatnonzero(counts.to_numpy() >= int(tf / step))
+    if len(full) == 0:
+        return bars.iloc[0:0], df
+    return bars.iloc[full[0]:full[-1] + 1], df
+
+
+def local_data_end(data_dir: str) -> Optional[datetime]:
+    """Klasördeki en son mum zamanı (offline modda varsayılan bitiş tarihi için)."""
+    last = None
+    for path in _local_symbol_files(data_dir).values():
+        try:
+            ts = read_local_ohlcv(path).index
+        except (OSError, ValueError, KeyError):
+            continue
+        if len(ts) and (last is None or ts[-1] > last):
+            last = ts[-1]
+    return last.to_pydatetime() if last is not None else None
+
+
+def load_local_backtest_data(data_dir: str, symbols: Optional[List[str]],
+                             fetch_start: datetime, end_dt: datetime,
+                             min_candles: int = 1) -> Tuple[Dict[str, pd.DataFrame], Dict[str, pd.DataFrame]]:
+    """
+    Offline mod: exchange / load_markets olmadan all_data (4H) ve all_data_5m (intra-bar)
+    sözlüklerini yerel CSV'lerden kur. symbols=None → klasördeki tüm coinler.
+    'TRB/USDT' isteği 'TRB/USDT:USDT' dosyasıyla eşleşir (settle eki yok sayılır).
+    """
+    if not os.path.isdir(data_dir):
+        raise FileNotFoundError(f"Veri klasörü bulunamadı: {data_dir}")
+    files = _local_symbol_files(data_dir)
+    if symbols is not None:
+        by_pair = {sym.split(":")[0]: path for sym, path in files.items()}
+        files   = {sym: files.get(sym) or by_pair.get(sym.split(":")[0]) for sym in symbols}
+        for sym in [s for s, p in files.items() if p is None]:
+            log.warning(f"  ⚠️ {sym}: yerel veri dosyası yok — atlanıyor.")
+        files = {s: p for s, p in files.items() if p is not None}
+
+    lo, hi = pd.Timestamp(fetch_start), pd.Timestamp(end_dt)
+    all_data: Dict[str, pd.DataFrame]    = {}
+    all_data_5m: Dict[str, pd.DataFrame] = {}
+    for sym, path in files.items():
+        try:
+            df_tf, df_intra = split_local_ohlcv(read_local_ohlcv(path), Config.TIMEFRAME)
+        except (OSError, ValueError, KeyError) as e:
+            log.warning(f"  ⚠️ {sym}: {os.path.basename(path)} okunamadı ({e}) — atlanıyor.")
+            continue
+        df_tf = df_tf[(df_tf.index >= lo) & (df_tf.index <= hi)]
+        if len(df_tf) < min_candles:
+            continue
+        all_data[sym] = df_tf
+        if df_intra is not None:
+            df_intra = df_intra[(df_intra.index >= lo) & (df_intra.index <= hi)]
+            if not df_intra.empty:
+                all_data_5m[sym] = df_intra
+    return all_data, all_data_5m
+
+
+# ══════════════════════════════════════════════════════════════════════════
+#  BÖLÜM 2.95 — İNTRA-BAR İNDEKSİ  (4H → 5m ofset tablosu + çıkış çekirdeği)
+# ══════════════════════════════════════════════════════════════════════════
+
+def build_intra_bar_index(index_4h: pd.DatetimeIndex, df_5m: pd.DataFrame) -> dict:
+    """
+    Her 4H bar için 5m dizilerindeki [start, end) aralığını searchsorted ile BİR KEZ bulur.
+
+    Eski yol her çağrıda tüm 5m DataFrame üzerinde boolean maske kuruyordu (O(N_5m));
+    bu tabloyla bar başına dilim O(1) okunur. df_5m index'i sıralı olmalıdır.
+    Döndürür: {"ts", "high", "low", "close", "start", "end"}  (start/end → index_4h hizalı)
+    """
+    idx5 = df_5m.index
+    high, low, close = ohlc_arrays(df_5m)
+    return {
+        "ts":    idx5,
+        "high":  high,
+        "low":   low,
+        "close": close,
+        "start": idx5.searchsorted(index_4h, side="left").astype(np.int64),
+        "end":   idx5.searchsorted(index_4h + pd.Timedelta(hours=4), side="left").astype(np.int64),
+    }
+
+
+# ── BE / TSL / SL durum makinesi — TÜM simülatörlerin ortak çekirdeği ────────
+# Her simülatör kendi (tarihsel) kontrol sırasını mod bayraklarıyla seçer:
+STOP_HIT_BEFORE = 1    # güncellemelerden ÖNCE HIGH >= SL → çıkış (4H Kural 1, verify Adım 1)
+STOP_HIT_AFTER  = 2    # güncellemelerden SONRA HIGH >= SL → çıkış (5m intra-bar)
+STOP_BOUNCE     = 4    # TSL aktifken CLOSE >= SL → çıkış (4H Kural 3 — sekme)
+STOP_TSL_FIRST  = 8    # sıra TSL → BE ve BE: SL = min(SL, entry) (verify Adım 2-3)
+STOP_RECHECK    = 16   # bar başında TSL aktifse güncelleme sonrası HIGH >= SL (verify Adım 4)
+
+KERNEL_INTRA_5M  = STOP_HIT_AFTER                                  # simulate_intra_bar_exit
+KERNEL_BAR_4H    = STOP_HIT_BEFORE | STOP_BOUNCE                   # 4H bar-by-bar simülatörler
+KERNEL_SHADOW_4H = STOP_HIT_BEFORE                                 # Backtester 4H gölge tahmini
+KERNEL_VERIFY_5M = STOP_HIT_BEFORE | STOP_TSL_FIRST | STOP_RECHECK  # verify_profits_5m
+
+# Çıkış kodları (neden metni: EXIT_STOP → tsl_on ? "TSL-HIT" : "STOP-LOSS")
+EXIT_NONE, EXIT_STOP, EXIT_BOUNCE, EXIT_RECHECK = 0, 1, 2, 3
+
+
+def trade_exit_kernel(high, low, close, start, end, entry, sl, be_done, tsl_on, lowest,
+                      be_drop_pct, tsl_act_pct, tsl_trail_pct, mode):
+    """
+    SHORT pozisyon için BE → TSL aktivasyon → trailing → stop-hit durum makinesi.
+
+    high/low/close dizilerinin [start, end) aralığını sırayla gezer; 4H simülatörler tek bar
+    (end = start + 1), 5m yolları bar içi / işlem ömrü dilimini verir. Kontrol sırası `mode`
+    bayraklarıyla seçilir (KERNEL_* sabitleri) — böylece 4H, 5m ve doğrulama yolları aynı kodu
+    çalıştırır. Numba kuruluysa njit ile derlenir.
+
+    Döndürür: (çıkış_pozisyonu | -1, çıkış_fiyatı, çıkış_kodu, sl, be_done, tsl_on, lowest)
+    """
+    trail = 1 + tsl_trail_pct / 100.0
+    for k in range(start, end):
+        if mode & STOP_HIT_BEFORE and high[k] >= sl:
+            return k, sl, EXIT_STOP, sl, be_done, tsl_on, lowest
+        tsl_was_on = tsl_on
+        if mode & STOP_TSL_FIRST:
+            if not tsl_on:
+                if (entry - low[k]) / entry * 100.0 >= tsl_act_pct:
+                    tsl_on = True
+                    lowest = low[k]
+                    sl = min(sl, lowest * trail)
+            elif low[k] < lowest:
+                lowest = low[k]
+                sl = min(sl, lowest * trail)
+            if not be_done and (entry - close[k]) / entry * 100.0 >= be_drop_pct:
+                sl = min(sl, entry)
+                be_done = True
+        else:
+            if not be_done and (entry - close[k]) / entry * 100.0 >= be_drop_pct:
+                sl = entry
+                be_done = True
+            if not tsl_on:
+                if (entry - low[k]) / entry * 100.0 >= tsl_act_pct:
+                    tsl_on = True
+                    lowest = low[k]
+                    sl = min(sl, lowest * trail)
+            elif low[k] < lowest:
+                lowest = low[k]
+                sl = min(sl, lowest * trail)
+        if mode & STOP_HIT_AFTER and high[k] >= sl:
+            return k, sl, EXIT_STOP, sl, be_done, tsl_on, lowest
+        if mode & STOP_RECHECK and tsl_was_on and high[k] >= sl:
+            return k, sl, EXIT_RECHECK, sl, be_done, tsl_on, lowest
+        if mode & STOP_BOUNCE and tsl_on and close[k] >= sl:
+            return k, sl, EXIT_BOUNCE, sl, be_done, tsl_on, lowest
+    return -1, sl, EXIT_NONE, sl, be_done, tsl_on, lowest
+
+
+if HAS_NUMBA:
+    trade_exit_kernel = njit(cache=True)(trade_exit_kernel)
+
+
+def apply_exit_kernel(trade: "TradeRecord", high, low, close, start: int, end: int,
+                      be_drop_pct: float, cfg: type, mode: int) -> Tuple[int, int]:
+    """
+    trade_exit_kernel'i TradeRecord state'i ile çalıştırır ve BE / TSL / SL güncellemelerini
+    trade nesnesine geri yazar. Döndürür: (çıkış_pozisyonu | -1, çıkış_kodu).
+    """
+    k, _, code, sl, be_done, tsl_on, lowest = trade_exit_kernel(
+        high, low, close, start, end,
+        float(trade.entry_price), float(trade.stop_loss),
+        bool(trade.breakeven_triggered), bool(trade.tsl_active),
+        float(trade.lowest_low_reached),
+        float(be_drop_pct), float(cfg.TSL_ACTIVATION_DROP_PCT), float(cfg.TSL_TRAIL_PCT), mode)
+    if be_done and not trade.breakeven_triggered:
+        trade.breakeven_triggered = True
+        trade.sl_moved_to_be      = True
+    trade.stop_loss          = float(sl)
+    trade.tsl_active         = bool(tsl_on)
+    trade.lowest_low_reached = float(lowest)
+    return int(k), int(code)
+
+
+def ohlc_arrays(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Kernel girdisi: high / low / close sütunları bitişik float64 dizi olarak."""
+    return tuple(np.ascontiguousarray(df[c].to_numpy(dtype=np.float64))
+                 for c in ("high", "low", "close"))
+
+
+# ══════════════════════════════════════════════════════════════════════════
+#  BÖLÜM 3 — BACKTESTER SINIFI
+# ══════════════════════════════════════════════════════════════════════════
+
+class Backtester:
+    """
+    Pump & Dump Reversion stratejisini geçmiş veri üzerinde simüle eder.
+    • Bar-by-bar iterasyon
+    • Watchlist mantığını simüle eder
+    • Giriş / SL / TP1 / TP2 mantığını uygular
+    • Detaylı terminal raporu çıkarır
+    """
+
+    def __init__(self, symbols: List[str] = None, days: int = None,
+                 initial_capital: float = None,
+                 start_dt: datetime = None, end_dt: datetime = None,
+                 cfg: type = None):
+        # Çalıştırma konfigi: Config veya Config.derive(...) (parametre taraması — global state yok)
+        self.cfg       = cfg or Config
+        self.symbols   = symbols or self.cfg.BACKTEST_SYMBOLS
+        self.capital   = initial_capital or self.cfg.BACKTEST_INITIAL_CAPITAL
+        self.exchange  = None   # async init'te set edilecek
+        self.limiter: Optional[WeightLimiter] = None   # request-weight bütçesi (async init)
+        self.all_data: Dict[str, pd.DataFrame] = {}
+        self.all_data_5m: Dict[str, pd.DataFrame] = {}  # sym → 5m DataFrame (intra-bar sim için)
+        self.trades: List[TradeRecord] = []
+        self.equity_curve: List[float] = []
+        self.candle_store = CandleStore() if self.cfg.CANDLE_STORE_ENABLED else None
+
+        # Tarih aralığı: start_dt/end_dt verilmişse kullan, yoksa days'e göre
+        if start_dt is not None and end_dt is not None:
+            self.start_dt = start_dt.replace(tzinfo=timezone.utc) if start_dt.tzinfo is None else start_dt
+            self.end_dt   = end_dt.replace(tzinfo=timezone.utc)   if end_dt.tzinfo is None else end_dt
+        else:
+            _days = days or self.cfg.BACKTEST_DAYS
+            self.end_dt   = datetime.now(timezone.utc)
+            self.start_dt = self.end_dt - timedelta(days=_days)
+
+    # ─────────────────────────────────────────────────────────────────
+    # 3.1  VERİ ÇEKME
+    # ─────────────────────────────────────────────────────────────────
+
+    async def _init_exchange(self):
+        """Public data için exchange bağlantısı (API key gereksiz). Hız: WeightLimiter (ccxt throttle kapalı)."""
+        self.exchange = _make_binance_exchange({"enableRateLimit": False})
+        self.limiter  = WeightLimiter(self.cfg.DOWNLOAD_WEIGHT_BUDGET)
+
+    async def _fetch_historical(self, symbol: str) -> pd.DataFrame:
+        """
+        Belirli bir sembolün tarih aralığındaki 4H verilerini çek.
+        Pump window için start_dt'den 6 mum (24 saat) önce başla.
+        """
+        fetch_start = self.start_dt - timedelta(hours=self.cfg.PUMP_WINDOW_CANDLES * 4)
+        since_ms    = int(fetch_start.timestamp() * 1000)
+        until_ms    = int(self.end_dt.timestamp() * 1000)
+
+        async def _download(since_cur: int, until_ms: int) -> list:
+            all_candles = []
+            limit = 500
+            while True:
+                try:
+                    candles = await fetch_ohlcv_weighted(
+                        self.exchange, self.limiter, symbol, self.cfg.TIMEFRAME, since_cur, limit
+                    )
+                except Exception as e:
+                    log.warning(f"  {symbol} veri çekme hatası: {e}")
+                    break
+
+                if not candles:
+                    break
+                all_candles.extend(candles)
+                last_ts = candles[-1][0]
+                if last_ts >= until_ms or len(candles) < limit:
+                    break
+                since_cur = last_ts + 1
+            return all_candles
+
+        if self.candle_store is not None:
+            df = await self.candle_store.fetch(symbol, self.cfg.TIMEFRAME, since_ms, until_ms, _download)
+        else:
+            df = candles_to_frame(await _download(since_ms, until_ms))
+        if df.empty:
+            return df
         # end_dt sonrası barlari kes
         df = df[df.index <= pd.Timestamp(self.end_dt)]
         return df
@@ -1779,38 +3415,35 @@ class Backtester:
         5m granüler veri çek — simulate_intra_bar_exit için.
         Her 4H bar içindeki 48 adet 5m mumu SL/TSL tetikleme hassasiyetiyle tarar.
         """
-        fetch_start = self.start_dt - timedelta(hours=Config.PUMP_WINDOW_CANDLES * 4)
+        fetch_start = self.start_dt - timedelta(hours=self.cfg.PUMP_WINDOW_CANDLES * 4)
         since_ms    = int(fetch_start.timestamp() * 1000)
         until_ms    = int(self.end_dt.timestamp() * 1000)
-        all_candles: list = []
-        since_cur   = since_ms
 
-        while True:
-            try:
-                candles = await self.exchange.fetch_ohlcv(
-                    symbol, '5m', since=since_cur, limit=1000
-                )
-            except Exception as e:
-                log.warning(f"  {symbol} 5m veri hatası: {e}")
-                break
-            if not candles:
-                break
-            all_candles.extend(candles)
-            last_ts = candles[-1][0]
-            if last_ts >= until_ms or len(candles) < 1000:
-                break
-            since_cur = last_ts + 1
-            await asyncio.sleep(0.2)
-
-        if not all_candles:
-            return pd.DataFrame()
+        async def _download(since_cur: int, until_ms: int) -> list:
+            all_candles: list = []
+            while True:
+                try:
+                    candles = await fetch_ohlcv_weighted(
+                        self.exchange, self.limiter, symbol, '5m', since_cur, 1000
+                    )
+                except Exception as e:
+                    log.warning(f"  {symbol} 5m veri hatası: {e}")
+                    break
+                if not candles:
+                    break
+                all_candles.extend(candles)
+                last_ts = candles[-1][0]
+                if last_ts >= until_ms or len(candles) < 1000:
+                    break
+                since_cur = last_ts + 1
+            return all_candles
 
-        df5 = pd.DataFrame(all_candles,
-                           columns=["timestamp","open","high","low","close","volume"])
-        df5["timestamp"] = pd.to_datetime(df5["timestamp"], unit="ms", utc=True)
-        df5.drop_duplicates(subset="timestamp", inplace=True)
-        df5.sort_values("timestamp", inplace=True)
-        df5.set_index("timestamp", inplace=True)
+        if self.candle_store is not None:
+            df5 = await self.candle_store.fetch(symbol, '5m', since_ms, until_ms, _download)
+        else:
+            df5 = candles_to_frame(await _download(since_ms, until_ms))
+        if df5.empty:
+            return df5
         df5 = df5[df5.index <= pd.Timestamp(self.end_dt)]
         return df5
 
@@ -1820,24 +3453,51 @@ class Backtester:
         _period = f"{self.days} günlük" if hasattr(self, 'days') else f"{self.start_dt.strftime('%d.%m.%Y')} → {self.end_dt.strftime('%d.%m.%Y')}"
         log.info(f"📥 {len(self.symbols)} sembol için {_period} 4H veri çekiliyor…")
 
-        for sym in self.symbols:
+        # 4H ve 5m indirmeleri aynı havuzda boru hattı: bir sembolün 4H'ı bitince 5m'i
+        # kuyruğa girer, diğer sembollerin 4H'ı sürerken indirilir. Hız: WeightLimiter.
+        pool = DownloadPool(self.cfg.DOWNLOAD_CONCURRENCY)
+        got_4h: Dict[str, pd.DataFrame] = {}
+        got_5m: Dict[str, pd.DataFrame] = {}
+
+        async def _job_5m(sym: str):
+            df5 = await self._fetch_historical_5m(sym)
+            if not df5.empty:
+                got_5m[sym] = df5
+                log.info(f"  ✔ {sym} [5m]: {len(df5)} mum yüklendi")
+
+        async def _job_4h(sym: str):
             df = await self._fetch_historical(sym)
             if df.empty:
                 log.warning(f"  ⚠️ {sym}: Veri bulunamadı — atlanıyor.")
-                continue
-            self.all_data[sym] = df
+                return
+            got_4h[sym] = df
             log.info(f"  ✔ {sym}: {len(df)} mum yüklendi  "
                      f"({df.index[0].strftime('%d.%m.%Y')} → {df.index[-1].strftime('%d.%m.%Y')})")
             # 5m granüler veri (intra-bar SL/TSL simülasyonu için)
-            df5 = await self._fetch_historical_5m(sym)
-            if not df5.empty:
-                self.all_data_5m[sym] = df5
-                log.info(f"  ✔ {sym} [5m]: {len(df5)} mum yüklendi")
-            await asyncio.sleep(0.3)
+            pool.submit(_job_5m(sym))
+
+        for sym in self.symbols:
+            pool.submit(_job_4h(sym))
+        await pool.join()
+
+        # Sembol sırası simülasyonda slot önceliğini belirler → indirme sırasından bağımsız
+        self.all_data    = {sym: got_4h[sym] for sym in self.symbols if sym in got_4h}
+        self.all_data_5m = {sym: got_5m[sym] for sym in self.symbols if sym in got_5m}
 
         await self.exchange.close()
         log.info(f"📦 Toplam {len(self.all_data)} sembol yüklendi ({len(self.all_data_5m)} adet 5m verisi mevcut).\n")
 
+    def load_local_data(self, data_dir: str):
+        """Offline mod: veriyi data_fetcher.py CSV'lerinden yükle (exchange / network yok)."""
+        fetch_start = self.start_dt - timedelta(hours=self.cfg.PUMP_WINDOW_CANDLES * 4)
+        log.info(f"📂 {len(self.symbols)} sembol yerel klasörden yükleniyor: {data_dir}")
+        self.all_data, self.all_data_5m = load_local_backtest_data(
+            data_dir, self.symbols, fetch_start, self.end_dt)
+        for sym, df in self.all_data.items():
+            log.info(f"  ✔ {sym}: {len(df)} mum yüklendi  "
+                     f"({df.index[0].strftime('%d.%m.%Y')} → {df.index[-1].strftime('%d.%m.%Y')})")
+        log.info(f"📦 Toplam {len(self.all_data)} sembol yüklendi ({len(self.all_data_5m)} adet intra-bar verisi mevcut).\n")
+
     # ─────────────────────────────────────────────────────────────────
     # 3.2  5m İNTRA-BAR ÇİKIŞ SİMÜLASYONU
     # ─────────────────────────────────────────────────────────────────
@@ -1848,6 +3508,9 @@ class Backtester:
         trade: "TradeRecord",
         df_5m: "pd.DataFrame",
         be_drop_pct: float,
+        cfg: type = None,
+        intra: dict = None,
+        bar_idx: int = None,
     ) -> "Optional[dict]":
         """
         Look-ahead bias olmadan 4H bar içindeki 48 adet 5m mumu sırasıyla kontrol eder.
@@ -1857,51 +3520,37 @@ class Backtester:
           • Wick Sensitivity   — SL/TSL tetikleyicisi olarak 5m HIGH ve LOW kullanılır.
           • TSL/BE state trade nesnesine doğrudan yazılır (intra-bar granüler güncelleme).
 
+        cfg: çalıştırma konfigi (Config veya Config.derive(...)); None → Config.
+        intra/bar_idx: build_intra_bar_index(df_4h.index, df_5m) tablosu ve 4H bar pozisyonu —
+        verilirse dilim O(1) okunur; verilmezse tek bar için searchsorted yapılır.
+
         Döndürür:
           {"exit_time", "exit_price", "exit_reason"}  — çıkış tetiklendiyse
           None                                         — bu 4H bar içinde çıkış yok
         """
+        cfg = cfg or Config
         if df_5m is None or df_5m.empty:
             return None
 
-        bar_end = bar_4h_ts + pd.Timedelta(hours=4)
-        mask    = (df_5m.index >= bar_4h_ts) & (df_5m.index < bar_end)
-        sub     = df_5m.loc[mask]
-        if sub.empty:
+        if intra is None or bar_idx is None:
+            intra   = build_intra_bar_index(pd.DatetimeIndex([bar_4h_ts]), df_5m)
+            bar_idx = 0
+        start = int(intra["start"][bar_idx])
+        end   = int(intra["end"][bar_idx])
+        if start >= end:
             return None
 
-        for ts5, b5 in sub.iterrows():
-            # ── Break-even (close bazlı, hassas) ─────────────────────
-            if not trade.breakeven_triggered:
-                drop_pct = (trade.entry_price - b5["close"]) / trade.entry_price * 100.0
-                if drop_pct >= be_drop_pct:
-                    trade.stop_loss         = trade.entry_price
-                    trade.breakeven_triggered = True
-                    trade.sl_moved_to_be    = True
-
-            # ── TSL aktivasyon / güncelleme (low bazlı) ──────────────
-            low_drop = (trade.entry_price - b5["low"]) / trade.entry_price * 100.0
-            if not trade.tsl_active:
-                if low_drop >= Config.TSL_ACTIVATION_DROP_PCT:
-                    trade.tsl_active           = True
-                    trade.lowest_low_reached   = b5["low"]
-                    new_sl = trade.lowest_low_reached * (1 + Config.TSL_TRAIL_PCT / 100.0)
-                    trade.stop_loss = min(trade.stop_loss, new_sl)
-            else:
-                if b5["low"] < trade.lowest_low_reached:
-                    trade.lowest_low_reached = b5["low"]
-                    new_sl = trade.lowest_low_reached * (1 + Config.TSL_TRAIL_PCT / 100.0)
-                    trade.stop_loss = min(trade.stop_loss, new_sl)
-
-            # ── Conservative: HIGH >= SL → derhal çıkış ──────────────
-            # (TP ve SL aynı 5m bar'da çakışırsa SL önce kabul edilir)
-            if b5["high"] >= trade.stop_loss:
-                reason = "TSL-HIT" if trade.tsl_active else "STOP-LOSS"
-                return {
-                    "exit_time":   ts5.strftime("%d.%m.%Y %H:%M"),
-                    "exit_price":  trade.stop_loss,
-                    "exit_reason": reason,
-                }
+        k, _ = apply_exit_kernel(trade, intra["high"], intra["low"], intra["close"],
+                                 start, end, be_drop_pct, cfg, KERNEL_INTRA_5M)
+
+        # ── Conservative: HIGH >= SL → derhal çıkış ──────────────
+        # (TP ve SL aynı 5m bar'da çakışırsa SL önce kabul edilir)
+        if k >= 0:
+            return {
+                "exit_time":   intra["ts"][k].strftime("%d.%m.%Y %H:%M"),
+                "exit_price":  trade.stop_loss,
+                "exit_reason": "TSL-HIT" if trade.tsl_active else "STOP-LOSS",
+            }
 
         return None  # Bu 4H bar içinde çıkış tetiklenmedi
 
@@ -1923,44 +3572,24 @@ class Backtester:
 
     @staticmethod
     def detect_pump_at_bar(df: pd.DataFrame, bar_idx: int,
-                           daily_df: pd.DataFrame = None) -> Optional[dict]:
+                           daily_df: pd.DataFrame = None,
+                           scan: Dict[str, np.ndarray] = None,
+                           cfg: type = None) -> Optional[dict]:
         """
-        Module 1 (Backtest): Son 7 adet 4H mumda (28 saatlik rolling pencere)
-        net yükseliş >= %30 ve en az 4 yeşil mum koşulu aranır.
+        Module 1 (Backtest): bar_idx'ten önceki PUMP_WINDOW_CANDLES adet 4H mumda
+        net yükseliş >= %30 ve en az 4 yeşil mum koşulu aranır (rolling_pump_scan).
 
-        rolling_low  = 7 mumun en düşük LOW'ı
-        rolling_high = 7 mumun en yüksek HIGH'ı
-        net_gain = (rolling_high - rolling_low) / rolling_low
+        scan verilirse (rolling_pump_scan_df(df) — sembol başına bir kez) O(1) okunur;
+        verilmezse sadece pencere dilimi taranır.
         daily_df parametresi kullanılmıyor (geriye dönük uyumluluk).
         """
-        n = Config.PUMP_WINDOW_CANDLES  # 7
+        if scan is not None:
+            return pump_info_at(scan, bar_idx)
+        cfg = cfg or Config
+        n = cfg.PUMP_WINDOW_CANDLES
         if bar_idx < n:
             return None
-
-        window = [df.iloc[bar_idx - n + k] for k in range(n)]
-
-        if any(c["low"] <= 0 or pd.isna(c["high"]) for c in window):
-            return None
-
-        # Koşul 1: En az 4 yeşil mum (sıralı olması şart değil)
-        green_count = sum(1 for c in window if c["close"] > c["open"])
-        if green_count < Config.PUMP_MIN_GREEN_COUNT:  # 4
-            return None
-
-        # Koşul 2: 1. mumun gövde tabanı → giriş mumunun kapanışı >= PUMP_MIN_PCT
-        # pump_start_ref : 1. mum kırmızıysa close, yeşilse open  (wick dahil etme)
-        # entry_close    : giriş kırmızı mumunun kapanışı — pump hala ayakta mı diye kontrol
-        pump_high      = max(c["high"] for c in window)
-        pump_start_ref = min(window[0]["open"], window[0]["close"])  # Gövde tabanı
-        pump_start_low = window[0]["low"]   # Rapor/SL referansı için saklanır
-        entry_close    = df.iloc[bar_idx]["close"]   # giriş mumu kapanışı
-        if pump_start_ref <= 0:
-            return None
-        net_gain_pct   = (entry_close - pump_start_ref) / pump_start_ref * 100.0
-        if net_gain_pct < Config.PUMP_MIN_PCT:
-            return None
-
-        return {"pump_pct": net_gain_pct, "pump_low": pump_start_low, "pump_high": pump_high}
+        return pump_info_at(rolling_pump_scan_df(df.iloc[bar_idx - n:bar_idx + 1], cfg=cfg), n)
 
     # ─────────────────────────────────────────────────────────────────
     # 3.3  BAR-BY-BAR SİMÜLASYON (v3 — Refined Scalper)
@@ -1977,19 +3606,22 @@ class Backtester:
         log.info("=" * 68)
         log.info("  BACKTEST v3 — Refined Scalper (Unified Timeline)")
         log.info(f"  Sermaye: {self.capital:.2f} USDT  |  "
-                 f"Kaldıraç: x{Config.LEVERAGE}  |  Risk/trade: %{Config.risk_per_trade_pct()}")
+                 f"Kaldıraç: x{self.cfg.LEVERAGE}  |  Risk/trade: %{self.cfg.risk_per_trade_pct()}")
         log.info("=" * 68)
 
         equity = self.capital
         self.equity_curve = [equity]
         active: Dict[str, TradeRecord] = {}
         max_concurrent = 0
-        be_price_drop_pct = Config.BREAKEVEN_DROP_PCT
+        be_price_drop_pct = self.cfg.BREAKEVEN_DROP_PCT
 
         # Her sembol için ayrı state
         sym_dfs: Dict[str, pd.DataFrame] = {sym: df.copy() for sym, df in self.all_data.items()}
         sym_state: Dict[str, dict] = {}
         sym_ts_to_idx: Dict[str, dict] = {}
+        sym_pump_scan: Dict[str, dict] = {}
+        sym_intra: Dict[str, dict] = {}
+        sym_bars: Dict[str, tuple] = {}
         for sym, df in sym_dfs.items():
             sym_state[sym] = {
                 "in_watchlist": False,
@@ -2004,13 +3636,17 @@ class Backtester:
                 "ll_4h":  0.0,
             }
             sym_ts_to_idx[sym] = {ts: idx for idx, ts in enumerate(df.index)}
+            sym_pump_scan[sym] = rolling_pump_scan_df(df, cfg=self.cfg)   # tüm barlar tek geçişte
+            sym_bars[sym] = ohlc_arrays(df)                                 # BE/TSL/SL kernel girdisi
+            if sym in self.all_data_5m:                                     # 4H → 5m ofsetleri bir kez
+                sym_intra[sym] = build_intra_bar_index(df.index, self.all_data_5m[sym])
 
         # Tüm sembollerin timestamplarını birleştir → kronolojik sıralı
         all_ts = sorted(set().union(*[set(df.index) for df in sym_dfs.values()]))
 
         log.info(f"\n  🕐 Unified timeline: {len(all_ts)} timestamp, {len(sym_dfs)} sembol\n")
 
-        start_bar = Config.BB_LENGTH + 2
+        start_bar = self.cfg.BB_LENGTH + 2
 
         for ts in all_ts:
             for sym, df in sym_dfs.items():
@@ -2029,6 +3665,7 @@ class Backtester:
                 last_exit_price   = state["last_exit_price"]
                 new_push_seen     = state["new_push_seen"]
                 pump_cooldown_ts  = state["pump_cooldown_until_ts"]
+                pump_scan         = sym_pump_scan[sym]
 
                 # ═══════════════════════════════════════════════════════
                 # (A) AKTİF TRADE → TSL / GREEN CANDLE KONTROL
@@ -2045,30 +3682,22 @@ class Backtester:
                         _tsl_4h = sym_state[sym].get("tsl_4h", False)
                         _be_4h  = sym_state[sym].get("be_4h",  False)
                         _ll_4h  = sym_state[sym].get("ll_4h",  0.0)
-                        if bar["high"] >= _sl_4h and trade.pnl_4h_est == 0.0:
+                        # Tahmin bir kez yazılır; sonrasında gölge state sadece güncellenir
+                        _mode   = KERNEL_SHADOW_4H if trade.pnl_4h_est == 0.0 else 0
+                        _, _, _code, _sl_4h, _be_4h, _tsl_4h, _ll_4h = trade_exit_kernel(
+                            *sym_bars[sym], i, i + 1, float(trade.entry_price), float(_sl_4h),
+                            _be_4h, _tsl_4h, float(_ll_4h), float(be_price_drop_pct),
+                            float(self.cfg.TSL_ACTIVATION_DROP_PCT), float(self.cfg.TSL_TRAIL_PCT), _mode)
+                        if _code == EXIT_STOP:
                             _p4h = (trade.position_size_usdt * trade.leverage *
                                     (trade.entry_price - _sl_4h) / trade.entry_price)
                             trade.pnl_4h_est = round(max(_p4h, -trade.position_size_usdt), 2)
-                        else:
-                            if not _be_4h:
-                                if (trade.entry_price - bar["close"]) / trade.entry_price * 100.0 >= be_price_drop_pct:
-                                    _sl_4h = trade.entry_price
-                                    _be_4h = True
-                            _ld = (trade.entry_price - bar["low"]) / trade.entry_price * 100.0
-                            if not _tsl_4h:
-                                if _ld >= Config.TSL_ACTIVATION_DROP_PCT:
-                                    _tsl_4h = True
-                                    _ll_4h  = bar["low"]
-                                    _sl_4h  = min(_sl_4h, _ll_4h * (1 + Config.TSL_TRAIL_PCT / 100.0))
-                            else:
-                                if bar["low"] < _ll_4h:
-                                    _ll_4h = bar["low"]
-                                    _sl_4h = min(_sl_4h, _ll_4h * (1 + Config.TSL_TRAIL_PCT / 100.0))
                         sym_state[sym].update({"sl_4h": _sl_4h, "tsl_4h": _tsl_4h,
                                                "be_4h": _be_4h, "ll_4h":  _ll_4h})
 
                         # ── 5m İNTRA-BAR SİMÜLASYON ──────────────────────────
-                        _exit = self.simulate_intra_bar_exit(ts, trade, _df5m, be_price_drop_pct)
+                        _exit = self.simulate_intra_bar_exit(ts, trade, _df5m, be_price_drop_pct, self.cfg,
+                                                             sym_intra.get(sym), i)
                         if _exit:
                             exit_p  = _exit["exit_price"]
                             exit_t  = _exit["exit_time"]
@@ -2090,7 +3719,7 @@ class Backtester:
                             del active[sym]
                             last_exit_price = exit_p
                             new_push_seen   = False
-                            pump_info       = self.detect_pump_at_bar(df, i, None)
+                            pump_info       = self.detect_pump_at_bar(df, i, None, pump_scan)
                             in_watchlist    = pump_info is not None
                             log.info(f"  [{exit_t}] 🔴 {reason}[5m] — {sym}  Exit: {exit_p:.6f}  PnL: {pnl_usd:+.2f}  Kasa: {equity:.0f}$")
                             sym_state[sym].update({
@@ -2103,7 +3732,10 @@ class Backtester:
 
                     else:
                         # ── 4H FALLBACK: 5m veri yoksa orijinal KURAL 1/2/3 ──
-                        if bar["high"] >= trade.stop_loss:
+                        _be0, _tsl0 = trade.breakeven_triggered, trade.tsl_active
+                        _, _code = apply_exit_kernel(trade, *sym_bars[sym], i, i + 1,
+                                                     be_price_drop_pct, self.cfg, KERNEL_BAR_4H)
+                        if _code == EXIT_STOP:
                             exit_p  = trade.stop_loss
                             pnl_pct = (trade.entry_price - exit_p) / trade.entry_price
                             pnl_usd = trade.position_size_usdt * trade.leverage * pnl_pct
@@ -2122,7 +3754,7 @@ class Backtester:
                             del active[sym]
                             last_exit_price = exit_p
                             new_push_seen   = False
-                            pump_info       = self.detect_pump_at_bar(df, i, None)
+                            pump_info       = self.detect_pump_at_bar(df, i, None, pump_scan)
                             in_watchlist    = pump_info is not None
                             log.info(f"  [{bar_time}] 🔴 {reason} — {sym}  Exit: {exit_p:.6f}  PnL: {pnl_usd:+.2f}  Kasa: {equity:.0f}$")
                             sym_state[sym]["in_watchlist"]    = in_watchlist
@@ -2131,30 +3763,14 @@ class Backtester:
                             sym_state[sym]["new_push_seen"]   = new_push_seen
                             continue
 
-                        if not trade.breakeven_triggered:
+                        if trade.breakeven_triggered and not _be0:
                             drop_pct = (trade.entry_price - bar["close"]) / trade.entry_price * 100.0
-                            if drop_pct >= be_price_drop_pct:
-                                trade.stop_loss = trade.entry_price
-                                trade.breakeven_triggered = True
-                                trade.sl_moved_to_be = True
-                                log.info(f"  [{bar_time}] ⚡ BE: {sym}  Düşüş: %{drop_pct:.1f}")
-
-                        low_drop_pct = (trade.entry_price - bar["low"]) / trade.entry_price * 100.0
-                        if not trade.tsl_active:
-                            if low_drop_pct >= Config.TSL_ACTIVATION_DROP_PCT:
-                                trade.tsl_active = True
-                                trade.lowest_low_reached = bar["low"]
-                                new_sl = trade.lowest_low_reached * (1 + Config.TSL_TRAIL_PCT / 100.0)
-                                trade.stop_loss = min(trade.stop_loss, new_sl)
-                                log.info(f"  [{bar_time}] 🎯 TSL AKTİF: {sym}  "
-                                         f"Low: {trade.lowest_low_reached:.6f}  SL → {trade.stop_loss:.6f}")
-                        else:
-                            if bar["low"] < trade.lowest_low_reached:
-                                trade.lowest_low_reached = bar["low"]
-                                new_sl = trade.lowest_low_reached * (1 + Config.TSL_TRAIL_PCT / 100.0)
-                                trade.stop_loss = min(trade.stop_loss, new_sl)
+                            log.info(f"  [{bar_time}] ⚡ BE: {sym}  Düşüş: %{drop_pct:.1f}")
+                        if trade.tsl_active and not _tsl0:
+                            log.info(f"  [{bar_time}] 🎯 TSL AKTİF: {sym}  "
+                                     f"Low: {trade.lowest_low_reached:.6f}  SL → {trade.stop_loss:.6f}")
 
-                        if trade.tsl_active and bar["close"] >= trade.stop_loss:
+                        if _code == EXIT_BOUNCE:
                             exit_p  = trade.stop_loss
                             pnl_pct = (trade.entry_price - exit_p) / trade.entry_price
                             pnl_usd = trade.position_size_usdt * trade.leverage * pnl_pct
@@ -2172,7 +3788,7 @@ class Backtester:
                             del active[sym]
                             last_exit_price = exit_p
                             new_push_seen   = False
-                            pump_info       = self.detect_pump_at_bar(df, i, None)
+                            pump_info       = self.detect_pump_at_bar(df, i, None, pump_scan)
                             in_watchlist    = pump_info is not None
                             log.info(f"  [{bar_time}] 🎯 TSL-HIT (bounce): {sym}  Exit: {exit_p:.6f}  PnL: {pnl_usd:+.2f}  Kasa: {equity:.0f}$")
                             sym_state[sym]["in_watchlist"]    = in_watchlist
@@ -2184,7 +3800,7 @@ class Backtester:
                     # ── KURAL 4: ZARARDA YEŞİL MUM (GREEN-10) ────────────
                     if bar["close"] > bar["open"] and bar["close"] > trade.entry_price:
                         green_body_pct = (bar["close"] - bar["open"]) / bar["open"] * 100.0
-                        if green_body_pct >= Config.GREEN_LOSS_SINGLE_BODY_PCT:
+                        if green_body_pct >= self.cfg.GREEN_LOSS_SINGLE_BODY_PCT:
                             exit_p  = bar["close"]
                             pnl_pct = (trade.entry_price - exit_p) / trade.entry_price
                             pnl_usd = trade.position_size_usdt * trade.leverage * pnl_pct
@@ -2201,7 +3817,7 @@ class Backtester:
                             del active[sym]
                             last_exit_price = exit_p
                             new_push_seen   = False
-                            pump_info       = self.detect_pump_at_bar(df, i, None)
+                            pump_info       = self.detect_pump_at_bar(df, i, None, pump_scan)
                             in_watchlist    = pump_info is not None
                             log.info(f"  [{bar_time}] 🟠 GREEN-10: {sym}  Gövde: %{green_body_pct:.1f}  Exit: {exit_p:.6f}  PnL: {pnl_usd:+.2f}  Kasa: {equity:.0f}$")
                             sym_state[sym]["in_watchlist"]    = in_watchlist
@@ -2227,7 +3843,7 @@ class Backtester:
                             del active[sym]
                             last_exit_price = exit_p
                             new_push_seen   = False
-                            pump_info       = self.detect_pump_at_bar(df, i, None)
+                            pump_info       = self.detect_pump_at_bar(df, i, None, pump_scan)
                             in_watchlist    = pump_info is not None
                             log.info(f"  [{bar_time}] 🟠 2xGREEN-LOSS: {sym}  Exit: {exit_p:.6f}  PnL: {pnl_usd:+.2f}  Kasa: {equity:.0f}$")
                             sym_state[sym]["in_watchlist"]    = in_watchlist
@@ -2252,14 +3868,14 @@ class Backtester:
                     if pump_cooldown_ts is not None and ts < pump_cooldown_ts:
                         pass  # Cooldown aktif
                     else:
-                        pump_info = self.detect_pump_at_bar(df, i, None)
+                        pump_info = self.detect_pump_at_bar(df, i, None, pump_scan)
                         if pump_info:
                             in_watchlist = True
                             log.info(f"  [{bar_time}] 🚨 Pump: {sym}  "
                                      f"+{pump_info['pump_pct']:.1f}%  "
                                      f"Zirve: {pump_info['pump_high']:.6f}")
                 else:
-                    check = self.detect_pump_at_bar(df, i, None)
+                    check = self.detect_pump_at_bar(df, i, None, pump_scan)
                     if check is None:
                         in_watchlist = False
                         pump_info    = None
@@ -2319,7 +3935,7 @@ class Backtester:
                     sym_state[sym]["new_push_seen"] = new_push_seen
                     continue
 
-                if red_body_pct < Config.ENTRY_RED_BODY_MIN_PCT:
+                if red_body_pct < self.cfg.ENTRY_RED_BODY_MIN_PCT:
                     sym_state[sym]["in_watchlist"] = in_watchlist
                     sym_state[sym]["pump_info"]    = pump_info
                     sym_state[sym]["new_push_seen"] = new_push_seen
@@ -2331,7 +3947,7 @@ class Backtester:
                     sym_state[sym]["new_push_seen"] = new_push_seen
                     continue
                 prev_body_pct = (prev_bar["close"] - prev_bar["open"]) / prev_bar["open"] * 100.0
-                if prev_body_pct >= Config.ANTI_ROCKET_SINGLE_CANDLE_PCT:
+                if prev_body_pct >= self.cfg.ANTI_ROCKET_SINGLE_CANDLE_PCT:
                     sym_state[sym]["in_watchlist"] = in_watchlist
                     sym_state[sym]["pump_info"]    = pump_info
                     sym_state[sym]["new_push_seen"] = new_push_seen
@@ -2341,9 +3957,9 @@ class Backtester:
                 in_watchlist = False
                 pump_info    = None
                 # Cooldown: PUMP_CONSECUTIVE_GREEN × 4H = timestamp
-                pump_cooldown_ts = ts + timedelta(hours=Config.PUMP_CONSECUTIVE_GREEN * 4)
+                pump_cooldown_ts = ts + timedelta(hours=self.cfg.PUMP_CONSECUTIVE_GREEN * 4)
 
-                pos_margin = equity / Config.MAX_ACTIVE_TRADES
+                pos_margin = equity / self.cfg.MAX_ACTIVE_TRADES
                 if pos_margin < 10.0:
                     log.info(f"  [{bar_time}] ⛔ SLOT BOÜÇ ({pos_margin:.0f}$ < 10$): {sym} — sinyal iptal")
                     sym_state[sym]["in_watchlist"]          = in_watchlist
@@ -2352,16 +3968,16 @@ class Backtester:
                     sym_state[sym]["pump_cooldown_until_ts"]= pump_cooldown_ts
                     continue
 
-                if len(active) >= Config.MAX_ACTIVE_TRADES:
-                    log.info(f"  [{bar_time}] ⛔ SLOT DOLU ({len(active)}/{Config.MAX_ACTIVE_TRADES}) — {sym} sinyal iptal")
+                if len(active) >= self.cfg.MAX_ACTIVE_TRADES:
+                    log.info(f"  [{bar_time}] ⛔ SLOT DOLU ({len(active)}/{self.cfg.MAX_ACTIVE_TRADES}) — {sym} sinyal iptal")
                     sym_state[sym]["in_watchlist"]          = in_watchlist
                     sym_state[sym]["pump_info"]             = pump_info
                     sym_state[sym]["new_push_seen"]         = new_push_seen
                     sym_state[sym]["pump_cooldown_until_ts"]= pump_cooldown_ts
                     continue
 
-                lev = Config.LEVERAGE
-                sl  = entry_p * (1 + Config.SL_ABOVE_ENTRY_PCT / 100.0)
+                lev = self.cfg.LEVERAGE
+                sl  = entry_p * (1 + self.cfg.SL_ABOVE_ENTRY_PCT / 100.0)
 
                 trade = TradeRecord(
                     symbol=sym, side="SHORT",
@@ -2386,7 +4002,7 @@ class Backtester:
                          f"Giriş: {entry_p:.6f}  SL: {sl:.6f}  "
                          f"Pump: +{pi_saved['pump_pct']:.1f}%  Kaldıraç: x{lev}  "
                          f"Bağlanan: {pos_margin:.0f}$  Kasa: {equity:.0f}$  "
-                         f"Slot: {len(active)}/{Config.MAX_ACTIVE_TRADES}  [Sinyal: {bar_time}]")
+                         f"Slot: {len(active)}/{self.cfg.MAX_ACTIVE_TRADES}  [Sinyal: {bar_time}]")
 
                 sym_state[sym]["in_watchlist"]           = in_watchlist
                 sym_state[sym]["pump_info"]              = pump_info
@@ -2564,6 +4180,44 @@ class Backtester:
     # 3.4  5m DOĞRULAMA — Kârlı tradeler (backtest bittikten sonra)
     # ─────────────────────────────────────────────────────────────────
 
+    @staticmethod
+    def _verify_trace(idx5: pd.DatetimeIndex, arrs: tuple, start: int, end: int, ep: float,
+                      sl: float, be_p: float, tsl_a: float, tsl_t: float) -> List[str]:
+        """
+        verify_profits_5m trace satırları: KERNEL_VERIFY_5M'i her 5m bar için ayrı çağırıp
+        state farkından olayları (TSL♻ / TSL↓ / BE✓ / EXIT) geri kurar. Sadece büyük farkta çalışır.
+        """
+        high, low, close = arrs
+        be_done, tsl_on, lowest = False, False, 0.0
+        lines = []
+        for k in range(start, end):
+            hi, lo, cl = high[k], low[k], close[k]
+            hm = idx5[k].strftime('%H:%M')
+            bar_txt = f"H={hi:.6f} L={lo:.6f} C={cl:.6f}"
+            _, _, code, sl_a, be_a, tsl_o, low_a = trade_exit_kernel(
+                high, low, close, k, k + 1, float(ep), float(sl), be_done, tsl_on, float(lowest),
+                float(be_p), float(tsl_a), float(tsl_t), KERNEL_VERIFY_5M)
+            if code == EXIT_STOP:
+                reason = "5m_TSL_HIT" if tsl_on else "5m_SL_HIT"
+                lines.append(f"    EXIT  {hm}  {bar_txt}  SL={sl:.6f}  → {reason}")
+                break
+            if tsl_o and (not tsl_on or low_a < lowest):
+                sl_tsl = min(sl, low_a * (1 + tsl_t / 100.0))
+                if not tsl_on:
+                    ld = (ep - lo) / ep * 100.0
+                    lines.append(f"    TSL♻  {hm}  {bar_txt}  ld={ld:.1f}%  "
+                                 f"SL={sl:.6f}→{sl_tsl:.6f}  lowest={low_a:.6f}")
+                else:
+                    lines.append(f"    TSL↓  {hm}  {bar_txt}  SL={sl:.6f}→{sl_tsl:.6f}  lowest={low_a:.6f}")
+            if be_a and not be_done:
+                drop_cl = (ep - cl) / ep * 100.0
+                lines.append(f"    BE✓   {hm}  {bar_txt}  drop={drop_cl:.1f}%  SL={sl:.6f}→{sl_a:.6f}")
+            if code == EXIT_RECHECK:
+                lines.append(f"    EXIT  {hm}  {bar_txt}  SL={sl_a:.6f}  → 5m_TSL_HIT(A4)")
+                break
+            sl, be_done, tsl_on, lowest = sl_a, be_a, tsl_o, low_a
+        return lines
+
     def verify_profits_5m(self):
         """
         İki aşamalı backtest doğrulama motoru.
@@ -2586,10 +4240,10 @@ class Backtester:
           df_5m_results  : 5m doğrulanmış tablo (filtreli işlemler, güncel PnL)
           Net kâr/zarar karşılaştırması
         """
-        be_p  = Config.BREAKEVEN_DROP_PCT
-        tsl_a = Config.TSL_ACTIVATION_DROP_PCT
-        tsl_t = Config.TSL_TRAIL_PCT
-        sl_i  = Config.SL_ABOVE_ENTRY_PCT
+        be_p  = self.cfg.BREAKEVEN_DROP_PCT
+        tsl_a = self.cfg.TSL_ACTIVATION_DROP_PCT
+        tsl_t = self.cfg.TSL_TRAIL_PCT
+        sl_i  = self.cfg.SL_ABOVE_ENTRY_PCT
 
         # ══════════════════════════════════════════════════════════════
         # AŞAMA 1 — 4H Baseline Tablosu
@@ -2700,19 +4354,18 @@ class Backtester:
                 verified.append((trade, None, "zaman parse hatası"))
                 continue
 
-            # Entry ile 4H exit arasındaki 5m mumları izole et
-            sub = df5[(df5.index >= entry_ts) & (df5.index <= exit_ts)]
-            if sub.empty:
+            # Entry ile 4H exit arasındaki 5m mumları izole et (searchsorted — maske yok)
+            idx5  = df5.index
+            start = int(idx5.searchsorted(entry_ts, side="left"))
+            end   = int(idx5.searchsorted(exit_ts, side="right"))
+            if start >= end:
                 print("⚠  izole edilecek 5m veri yok")
                 verified.append((trade, None, "5m veri boş"))
                 continue
 
-            # ── Simülasyon: HIGH-first, kötümser ─────────────────────
+            # ── Simülasyon: HIGH-first, kötümser (ortak kernel, KERNEL_VERIFY_5M) ──
             ep       = trade.entry_price
-            sl       = ep * (1 + sl_i / 100.0)
-            be_done  = False
-            tsl_on   = False
-            lowest   = 0.0
+            sl0      = ep * (1 + sl_i / 100.0)
             exit_info = None
             _pos = trade.position_size_usdt
             _lev = trade.leverage
@@ -2721,54 +4374,15 @@ class Backtester:
                 raw = _pos * _lev * (_ep - xp) / _ep
                 return round(max(raw, -_pos), 2)
 
-            # Büyük fark olasılığı için trace buffer (çıkışta karar veririz)
-            trace_buf = []
-
-            for ts5, b5 in sub.iterrows():
-                hi = b5["high"];  lo = b5["low"];  cl = b5["close"]
-                sl_before   = sl
-                tsl_was_on  = tsl_on   # bu bar başındaki TSL durumu
-
-                # Adım 1: HIGH >= mevcut SL → erken çıkış (BE/TSL henüz değişmeden)
-                if hi >= sl:
-                    reason = "5m_TSL_HIT" if tsl_on else "5m_SL_HIT"
-                    exit_info = {"exit_time": ts5.strftime("%d.%m.%Y %H:%M"),
-                                 "exit_price": sl, "exit_reason": reason,
-                                 "pnl_usdt": _pnl(sl)}
-                    trace_buf.append(f"    EXIT  {ts5.strftime('%H:%M')}  H={hi:.6f} L={lo:.6f} C={cl:.6f}  SL={sl:.6f}  → {reason}")
-                    break
-
-                # Adım 2: TSL aktivasyon / güncelleme — LOW bazlı
-                ld = (ep - lo) / ep * 100.0
-                if not tsl_on:
-                    if ld >= tsl_a:
-                        tsl_on = True;  lowest = lo
-                        sl = min(sl, lowest * (1 + tsl_t / 100.0))
-                        trace_buf.append(f"    TSL♻  {ts5.strftime('%H:%M')}  H={hi:.6f} L={lo:.6f} C={cl:.6f}  ld={ld:.1f}%  SL={sl_before:.6f}→{sl:.6f}  lowest={lowest:.6f}")
-                else:
-                    if lo < lowest:
-                        lowest = lo
-                        sl = min(sl, lowest * (1 + tsl_t / 100.0))
-                        trace_buf.append(f"    TSL↓  {ts5.strftime('%H:%M')}  H={hi:.6f} L={lo:.6f} C={cl:.6f}  SL={sl_before:.6f}→{sl:.6f}  lowest={lowest:.6f}")
-
-                # Adım 3: Breakeven — CLOSE bazlı
-                if not be_done:
-                    drop_cl = (ep - cl) / ep * 100.0
-                    if drop_cl >= be_p:
-                        sl = min(sl, ep)
-                        be_done = True
-                        trace_buf.append(f"    BE✓   {ts5.strftime('%H:%M')}  H={hi:.6f} L={lo:.6f} C={cl:.6f}  drop={drop_cl:.1f}%  SL={sl_before:.6f}→{sl:.6f}")
-
-                # Adım 4: TSL sonrası HIGH hit
-                # SADECE bar başında TSL zaten aktifse kontrol et.
-                # Bu bar içinde yeni aktifleşen TSL'nin SL seviyesi HIGH'tan SONRA
-                # oluştu (HIGH açılış civarında, LOW dip noktada) — aynı barda hit imkansız.
-                if tsl_was_on and hi >= sl:
-                    exit_info = {"exit_time": ts5.strftime("%d.%m.%Y %H:%M"),
-                                 "exit_price": sl, "exit_reason": "5m_TSL_HIT",
-                                 "pnl_usdt": _pnl(sl)}
-                    trace_buf.append(f"    EXIT  {ts5.strftime('%H:%M')}  H={hi:.6f} L={lo:.6f} C={cl:.6f}  SL={sl:.6f}  → 5m_TSL_HIT(A4)")
-                    break
+            arrs = ohlc_arrays(df5)
+            k, exit_p, code, _, _, tsl_on, _ = trade_exit_kernel(
+                *arrs, start, end, float(ep), float(sl0), False, False, 0.0,
+                float(be_p), float(tsl_a), float(tsl_t), KERNEL_VERIFY_5M)
+            if code != EXIT_NONE:
+                reason = "5m_TSL_HIT" if (tsl_on or code == EXIT_RECHECK) else "5m_SL_HIT"
+                exit_info = {"exit_time": idx5[k].strftime("%d.%m.%Y %H:%M"),
+                             "exit_price": exit_p, "exit_reason": reason,
+                             "pnl_usdt": _pnl(exit_p)}
 
             if exit_info is None:
                 print("⚠  5m'de çıkış tetiklenmedi")
@@ -2780,13 +4394,15 @@ class Backtester:
                       f"Fiy: {exit_info['exit_price']:.6f}  "
                       f"5m PnL: {exit_info['pnl_usdt']:>+8.2f}$  "
                       f"Δ{diff:>+7.2f}${warn}")
-                # Büyük fark — bar-by-bar trace bas
-                if abs(diff) > 100 and trace_buf:
+                # Büyük fark — bar-by-bar trace bas (kernel bar bar tekrar oynatılır)
+                trace_buf = (self._verify_trace(idx5, arrs, start, end, ep, sl0, be_p, tsl_a, tsl_t)
+                             if abs(diff) > 100 else [])
+                if trace_buf:
                     print(f"    ┌── TRACE {sym_short} (entry={ep:.6f}  entry_ts={entry_ts})  "
-                          f"sub={len(sub)} bar  İlk bar: {sub.index[0].strftime('%d.%m %H:%M')} ──")
+                          f"sub={end - start} bar  İlk bar: {idx5[start].strftime('%d.%m %H:%M')} ──")
                     for line in trace_buf:
                         print(line)
-                    print(f"    └── sub son bar: {sub.index[-1].strftime('%d.%m %H:%M')}")
+                    print(f"    └── sub son bar: {idx5[end - 1].strftime('%d.%m %H:%M')}")
             verified.append((trade, exit_info, None))
 
         # ══════════════════════════════════════════════════════════════
@@ -2923,21 +4539,30 @@ class FullUniverseBacktester:
     """
 
     def __init__(self, days: int = None, initial_capital: float = None,
-                 start_dt: datetime = None, end_dt: datetime = None):
-        self.capital     = initial_capital or Config.BACKTEST_INITIAL_CAPITAL  # 100
+                 start_dt: datetime = None, end_dt: datetime = None,
+                 vectorized: bool = None, cfg: type = None, event_5m: bool = None):
+        # Çalıştırma konfigi: Config veya Config.derive(...) (parametre taraması — global state yok)
+        self.cfg         = cfg or Config
+        self.capital     = initial_capital or self.cfg.BACKTEST_INITIAL_CAPITAL  # 100
         self.exchange    = None
+        self.limiter: Optional[WeightLimiter] = None     # request-weight bütçesi (async init)
         self.all_data:    Dict[str, pd.DataFrame] = {}   # sym → 4H DataFrame
-        self.all_data_5m: Dict[str, pd.DataFrame] = {}  # sym → 5m DataFrame (sadece kazanılan tradeler)
+        self.all_data_5m: Dict[str, pd.DataFrame] = {}  # sym → 5m DataFrame (event_5m: tüm universe, aksi: kazananlar)
         self.trades: List[TradeRecord] = []
         self.equity_curve: List[float] = []
         self.universe: List[str] = []
+        self.candle_store = CandleStore() if self.cfg.CANDLE_STORE_ENABLED else None
+        # Motor seçimi: True → NumPy motoru, False → bar-by-bar döngü (None → Config)
+        self.vectorized  = self.cfg.BACKTEST_VECTORIZED if vectorized is None else vectorized
+        # True → 5m olay saatli motor: stop yönetimi 5m'de, giriş/watchlist 4H kapanışında
+        self.event_5m    = self.cfg.BACKTEST_EVENT_5M if event_5m is None else event_5m
 
         # Tarih aralığı: start_dt/end_dt verilmişse kullan, yoksa days'e göre hesapla
         if start_dt is not None and end_dt is not None:
             self.start_dt = start_dt.replace(tzinfo=timezone.utc) if start_dt.tzinfo is None else start_dt
             self.end_dt   = end_dt.replace(tzinfo=timezone.utc)   if end_dt.tzinfo is None else end_dt
         else:
-            _days = days or Config.BACKTEST_DAYS
+            _days = days or self.cfg.BACKTEST_DAYS
             self.end_dt   = datetime.now(timezone.utc)
             self.start_dt = self.end_dt - timedelta(days=_days)
 
@@ -2945,7 +4570,8 @@ class FullUniverseBacktester:
     # A) Exchange bağlantısı (public — API key gerekmez)
     # ─────────────────────────────────────────────────────────────────
     async def _init_exchange(self):
-        self.exchange = _make_binance_exchange()
+        self.exchange = _make_binance_exchange({"enableRateLimit": False})
+        self.limiter  = WeightLimiter(self.cfg.DOWNLOAD_WEIGHT_BUDGET)
 
     # ─────────────────────────────────────────────────────────────────
     # B) Aktif universe'ü Binance'den CANLI çek
@@ -2965,7 +4591,7 @@ class FullUniverseBacktester:
             if mkt.get("linear") is not True:
                 continue
             base = mkt.get("base", "")
-            if base in Config.EXCLUDED_BASES:
+            if base in self.cfg.EXCLUDED_BASES:
                 continue
             universe.append(sym)
         print(f"✅ {len(universe)} adet USDT-M futures çifti bulundu (majors hariç).")
@@ -2980,78 +4606,45 @@ class FullUniverseBacktester:
         API key GEREKMİYOR — public endpoint kullanır.
         """
         # pump window için start'tan 6 mum (24 saat) önce başla
-        fetch_start = self.start_dt - timedelta(hours=Config.PUMP_WINDOW_CANDLES * 4)
+        fetch_start = self.start_dt - timedelta(hours=self.cfg.PUMP_WINDOW_CANDLES * 4)
         since_ms    = int(fetch_start.timestamp() * 1000)
         until_ms    = int(self.end_dt.timestamp() * 1000)
-        limit     = 300
-        all_candles: list = []
-        since_cur = since_ms
-
-        while True:
-            try:
-                candles = await self.exchange.fetch_ohlcv(
-                    symbol, Config.TIMEFRAME,
-                    since=since_cur, limit=limit,
-                )
-            except ccxt.BadSymbol:
-                return pd.DataFrame()
-            except Exception as e:
-                log.debug(f"  {symbol}: {e}")
-                break
 
-            if not candles:
-                break
+        async def _download(since_cur: int, until_ms: int) -> list:
+            limit     = 300
+            all_candles: list = []
+            while True:
+                try:
+                    candles = await fetch_ohlcv_weighted(
+                        self.exchange, self.limiter, symbol, self.cfg.TIMEFRAME, since_cur, limit,
+                    )
+                except ccxt.BadSymbol:
+                    return []
+                except Exception as e:
+                    log.debug(f"  {symbol}: {e}")
+                    break
 
-            all_candles.extend(candles)
-            last_ts = candles[-1][0]
+                if not candles:
+                    break
 
-            if last_ts >= until_ms or len(candles) < limit:
-                break
+                all_candles.extend(candles)
+                last_ts = candles[-1][0]
 
-            since_cur = last_ts + 1
-            await asyncio.sleep(0.12)
+                if last_ts >= until_ms or len(candles) < limit:
+                    break
 
-        if not all_candles:
-            return pd.DataFrame()
+                since_cur = last_ts + 1
+            return all_candles
 
-        df = pd.DataFrame(all_candles,
-                          columns=["timestamp", "open", "high", "low", "close", "volume"])
-        df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms", utc=True)
-        df.drop_duplicates(subset="timestamp", inplace=True)
-        df.sort_values("timestamp", inplace=True)
-        df.set_index("timestamp", inplace=True)
-        return df
+        if self.candle_store is not None:
+            return await self.candle_store.fetch(symbol, self.cfg.TIMEFRAME, since_ms, until_ms, _download)
+        return candles_to_frame(await _download(since_ms, until_ms))
 
     # ─────────────────────────────────────────────────────────────────
     # C2) Tek sembol için 5m verisi indır
     # ─────────────────────────────────────────────────────────────────
     async def _fetch_5m(self, symbol: str) -> pd.DataFrame:
-        since_ms = int(self.start_dt.timestamp() * 1000)
-        until_ms = int(self.end_dt.timestamp() * 1000)
-        candles: list = []
-        cur = since_ms
-        while True:
-            try:
-                batch = await self.exchange.fetch_ohlcv(symbol, '5m', since=cur, limit=1000)
-            except Exception as e:
-                log.warning(f"  {symbol} 5m hata: {e}")
-                break
-            if not batch:
-                break
-            candles.extend(batch)
-            last_ts = batch[-1][0]
-            if last_ts >= until_ms or len(batch) < 1000:
-                break
-            cur = last_ts + 1
-            await asyncio.sleep(0.15)
-        if not candles:
-            return pd.DataFrame()
-        df = pd.DataFrame(candles, columns=["timestamp","open","high","low","close","volume"])
-        df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms", utc=True)
-        df.drop_duplicates(subset="timestamp", inplace=True)
-        df.sort_values("timestamp", inplace=True)
-        df.set_index("timestamp", inplace=True)
-        return df
+        return await self._fetch_5m_via(self.exchange, symbol, self.limiter)
 
     async def fetch_winning_5m(self):
         """
@@ -3065,44 +4658,53 @@ class FullUniverseBacktester:
         syms = list(dict.fromkeys(t.symbol for t in winners))  # sıra koruyarak unique
         print(f"\n  📥 5m doğrulama için {len(syms)} sembol çekiliyor: "
               f"{', '.join(s.replace('/USDT','').replace(':USDT','') for s in syms)} ...")
-        exchange = _make_binance_exchange()
-        for sym in syms:
-            df5 = await self._fetch_5m_via(exchange, sym)
+        exchange = _make_binance_exchange({"enableRateLimit": False})
+        limiter  = WeightLimiter(self.cfg.DOWNLOAD_WEIGHT_BUDGET)
+        pool     = DownloadPool(self.cfg.DOWNLOAD_CONCURRENCY)
+        got: Dict[str, pd.DataFrame] = {}
+
+        async def _job(sym: str):
+            df5 = await self._fetch_5m_via(exchange, sym, limiter)
             if not df5.empty:
-                self.all_data_5m[sym] = df5
+                got[sym] = df5
                 print(f"  ✔ {sym.replace('/USDT','').replace(':USDT','')}: {len(df5)} adet 5m mum")
             else:
                 print(f"  ⚠ {sym}: 5m veri boş")
+
+        for sym in syms:
+            pool.submit(_job(sym))
+        await pool.join()
+        self.all_data_5m.update({sym: got[sym] for sym in syms if sym in got})
         await exchange.close()
         print()
 
-    async def _fetch_5m_via(self, exchange, symbol: str) -> pd.DataFrame:
-        since_ms = int(self.start_dt.timestamp() * 1000)
+    async def _fetch_5m_via(self, exchange, symbol: str, limiter: "WeightLimiter") -> pd.DataFrame:
+        since_dt = self.start_dt
+        if self.event_5m:   # girişler pump penceresi başından itibaren olabilir
+            since_dt -= timedelta(hours=self.cfg.PUMP_WINDOW_CANDLES * 4)
+        since_ms = int(since_dt.timestamp() * 1000)
         until_ms = int(self.end_dt.timestamp() * 1000)
-        candles: list = []
-        cur = since_ms
-        while True:
-            try:
-                batch = await exchange.fetch_ohlcv(symbol, '5m', since=cur, limit=1000)
-            except Exception as e:
-                log.warning(f"  {symbol} 5m hata: {e}")
-                break
-            if not batch:
-                break
-            candles.extend(batch)
-            last_ts = batch[-1][0]
-            if last_ts >= until_ms or len(batch) < 1000:
-                break
-            cur = last_ts + 1
-            await asyncio.sleep(0.15)
-        if not candles:
-            return pd.DataFrame()
-        df = pd.DataFrame(candles, columns=["timestamp","open","high","low","close","volume"])
-        df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms", utc=True)
-        df.drop_duplicates(subset="timestamp", inplace=True)
-        df.sort_values("timestamp", inplace=True)
-        df.set_index("timestamp", inplace=True)
-        return df
+
+        async def _download(cur: int, until_ms: int) -> list:
+            candles: list = []
+            while True:
+                try:
+                    batch = await fetch_ohlcv_weighted(exchange, limiter, symbol, '5m', cur, 1000)
+                except Exception as e:
+                    log.warning(f"  {symbol} 5m hata: {e}")
+                    break
+                if not batch:
+                    break
+                candles.extend(batch)
+                last_ts = batch[-1][0]
+                if last_ts >= until_ms or len(batch) < 1000:
+                    break
+                cur = last_ts + 1
+            return candles
+
+        if self.candle_store is not None:
+            return await self.candle_store.fetch(symbol, '5m', since_ms, until_ms, _download)
+        return candles_to_frame(await _download(since_ms, until_ms))
 
     # ─────────────────────────────────────────────────────────────────
     # D) Tüm universe için veri indir (batch — rate-limit dostu)
@@ -3122,43 +4724,79 @@ class FullUniverseBacktester:
 
         print(f"\n📥 {total} sembol için {start_str} → {end_str} arasındaki 4H veri indiriliyor…")
         print("   (Binance public API — API key gerekmez)")
-        print("   (Bu işlem 3-8 dakika sürebilir — sabırlı olun ☕)\n")
-
-        batch_size = 4  # aynı anda 4 sembol (rate-limit dostu)
-        loaded = 0
-        skipped = 0
-
-        for i in range(0, total, batch_size):
-            batch   = self.universe[i : i + batch_size]
-            tasks   = [self._fetch_ohlcv(sym) for sym in batch]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-
-            # Minimum mum: pump window (6) + en az 2 analiz mumu = 8
-            min_candles = Config.PUMP_WINDOW_CANDLES + 2
-
-            for sym, df in zip(batch, results):
-                if isinstance(df, Exception):
-                    skipped += 1
-                    continue
-                if not isinstance(df, pd.DataFrame) or df.empty or len(df) < min_candles:
-                    skipped += 1
-                    continue
-                self.all_data[sym] = df
-                loaded += 1
-
-            # İlerleme çubuğu
-            done    = min(i + batch_size, total)
+        print(f"   (Ağırlık bütçesi: {self.cfg.DOWNLOAD_WEIGHT_BUDGET}/dk  |  "
+              f"eşzamanlı sembol: {self.cfg.DOWNLOAD_CONCURRENCY})\n")
+
+        # Minimum mum: pump window (6) + en az 2 analiz mumu = 8
+        min_candles = self.cfg.PUMP_WINDOW_CANDLES + 2
+        pool   = DownloadPool(self.cfg.DOWNLOAD_CONCURRENCY)
+        got_4h: Dict[str, pd.DataFrame] = {}
+        got_5m: Dict[str, pd.DataFrame] = {}
+        counts = {"done": 0, "skipped": 0}
+
+        def _progress():
+            done    = counts["done"]
             bar_len = 45
-            filled  = int(bar_len * done / total)
+            filled  = int(bar_len * done / total) if total else bar_len
             bar     = "█" * filled + "░" * (bar_len - filled)
-            print(f"\r  [{bar}] {done}/{total}  ✔ {loaded} yüklendi  ✗ {skipped} atlandı",
+            extra   = f"  5m: {len(got_5m)}" if self.event_5m else ""
+            print(f"\r  [{bar}] {done}/{total}  ✔ {len(got_4h)} yüklendi  ✗ {counts['skipped']} atlandı{extra}",
                   end="", flush=True)
 
-            await asyncio.sleep(0.25)
+        async def _job_5m(sym: str):
+            try:
+                df5 = await self._fetch_5m(sym)
+            except Exception as e:
+                log.debug(f"  {sym} 5m: {e}")
+                return
+            if not df5.empty:
+                got_5m[sym] = df5
+            _progress()
 
-        print(f"\n\n✅ {loaded} sembol hazır ({skipped} atlandı, yetersiz veri veya hata).")
+        async def _job_4h(sym: str):
+            try:
+                df = await self._fetch_ohlcv(sym)
+            except Exception as e:
+                log.debug(f"  {sym}: {e}")
+                df = None
+            counts["done"] += 1
+            if not isinstance(df, pd.DataFrame) or df.empty or len(df) < min_candles:
+                counts["skipped"] += 1
+            else:
+                got_4h[sym] = df
+                if self.event_5m:       # 4H → 5m boru hattı (event_5m: tüm universe)
+                    pool.submit(_job_5m(sym))
+            _progress()
+
+        for sym in self.universe:
+            pool.submit(_job_4h(sym))
+        await pool.join()
+
+        # Universe sırası korunur (slot önceliği indirme sırasına bağlı olmasın)
+        self.all_data    = {sym: got_4h[sym] for sym in self.universe if sym in got_4h}
+        self.all_data_5m = {sym: got_5m[sym] for sym in self.universe if sym in got_5m}
+        print(f"\n\n✅ {len(self.all_data)} sembol hazır ({counts['skipped']} atlandı, yetersiz veri veya hata)."
+              + (f"  5m: {len(self.all_data_5m)} sembol" if self.event_5m else ""))
         await self.exchange.close()
 
+    def load_local_data(self, data_dir: str):
+        """
+        Offline mod: universe + 4H veri + intra-bar verisi yerel CSV'lerden
+        (data_fetcher.py şeması). Exchange / load_markets / rate-limit beklemesi yok.
+        """
+        fetch_start = self.start_dt - timedelta(hours=self.cfg.PUMP_WINDOW_CANDLES * 4)
+        print(f"\n📂 Yerel veri klasörü: {data_dir}")
+        all_data, all_data_5m = load_local_backtest_data(
+            data_dir, None, fetch_start, self.end_dt,
+            min_candles=self.cfg.PUMP_WINDOW_CANDLES + 2,
+        )
+        # Canlı universe ile aynı kural: major-cap'ler hariç
+        self.all_data    = {s: df for s, df in all_data.items()
+                            if s.split("/")[0] not in self.cfg.EXCLUDED_BASES}
+        self.all_data_5m = {s: df for s, df in all_data_5m.items() if s in self.all_data}
+        self.universe    = list(self.all_data)
+        print(f"✅ {len(self.universe)} sembol hazır ({len(self.all_data_5m)} adet intra-bar verisi).")
+
     # ─────────────────────────────────────────────────────────────────
     # E) Cross-sembol bar-by-bar simülasyon  (v3 — Refined Scalper)
     # ─────────────────────────────────────────────────────────────────
@@ -3175,9 +4813,9 @@ class FullUniverseBacktester:
         print("\n" + "=" * 68)
         print("  ✦ FULL UNIVERSE BACKTEST v3 — Refined Scalper")
         print(f"  Sermaye    : {self.capital:.2f}$")
-        print(f"  Kaldıraç   : x{Config.LEVERAGE}")
-        print(f"  Max Trade  : {Config.MAX_ACTIVE_TRADES}  (aynı anda)")
-        risk_pct = Config.risk_per_trade_pct()
+        print(f"  Kaldıraç   : x{self.cfg.LEVERAGE}")
+        print(f"  Max Trade  : {self.cfg.MAX_ACTIVE_TRADES}  (aynı anda)")
+        risk_pct = self.cfg.risk_per_trade_pct()
         print(f"  Risk/Trade : %{risk_pct}  ({self.capital * risk_pct / 100:.2f}$ başlangıç)")
         print(f"  Sembol     : {len(self.all_data)} adet")
         print(f"  Dönem      : {self.start_dt.strftime('%d.%m.%Y')} → {self.end_dt.strftime('%d.%m.%Y')} (4H barlar)")
@@ -3187,12 +4825,15 @@ class FullUniverseBacktester:
         # 1) Tüm 4H timestamp birleşimi
         #    sim_start: pump penceresi için start_dt'den 6 mum (24 saat) önce başla.
         #    Böylece start_dt sınırına denk gelen pump+ilk kırmızı senaryosu kaçırılmaz.
-        sim_start = self.start_dt - timedelta(hours=Config.PUMP_WINDOW_CANDLES * 4)
+        sim_start = self.start_dt - timedelta(hours=self.cfg.PUMP_WINDOW_CANDLES * 4)
         all_timestamps = sorted(
             ts for ts in set().union(*[set(df.index) for df in self.all_data.values()])
             if sim_start <= ts <= self.end_dt
         )
 
+        if self.vectorized or self.event_5m:
+            return self._run_backtest_vectorized(all_timestamps)
+
         equity         = self.capital
         self.equity_curve = [equity]
         active: Dict[str, TradeRecord] = {}
@@ -3204,7 +4845,11 @@ class FullUniverseBacktester:
         total_bars     = len(all_timestamps)
 
         # Breakeven price drop threshold: %4 düşüş
-        be_price_drop_pct = Config.BREAKEVEN_DROP_PCT
+        be_price_drop_pct = self.cfg.BREAKEVEN_DROP_PCT
+
+        # Pump penceresi sembol başına tek geçişte (O(n)) — bar döngüsü sadece okur
+        pump_scans = {sym: rolling_pump_scan_df(df, cfg=self.cfg) for sym, df in self.all_data.items()}
+        bar_arrays = {sym: ohlc_arrays(df) for sym, df in self.all_data.items()}   # BE/TSL/SL kernel girdisi
 
         for bar_num, ts in enumerate(all_timestamps):
             # İlerleme (her 100 barda bir)
@@ -3233,7 +4878,11 @@ class FullUniverseBacktester:
                 # tetiklenir; LOW'daki TSL aktivasyonundan ÖNCE gelmiş olabilir.
                 # Bu yüzden HIGH stop'a değdiyse → TSL/BE hesabına bakmadan
                 # direkt zarar ile kapat. Sahte kârlı TSL çıkışını engeller.
-                if bar["high"] >= trade.stop_loss:
+                _pos = df.index.get_loc(ts)
+                _be0, _tsl0 = trade.breakeven_triggered, trade.tsl_active
+                _, _code = apply_exit_kernel(trade, *bar_arrays[sym], _pos, _pos + 1,
+                                             be_price_drop_pct, self.cfg, KERNEL_BAR_4H)
+                if _code == EXIT_STOP:
                     exit_p  = trade.stop_loss
                     raw_pnl = (trade.entry_price - exit_p) / trade.entry_price
                     pnl_usd = trade.position_size_usdt * trade.leverage * raw_pnl
@@ -3258,34 +4907,19 @@ class FullUniverseBacktester:
 
                 # ── KURAL 2: TSL VE BE HESAPLAMASI ───────────────────
                 # HIGH stop'a değmediyse fiyat güvenli bölgededir.
-                # Artık bar["low"] bazlı Breakeven ve Trailing Stop
-                # güncellemelerini güvenle yapabiliriz.
+                # bar["low"] bazlı Breakeven ve Trailing Stop güncellemeleri
+                # trade_exit_kernel içinde yapıldı — burada sadece loglanır.
 
                 # Breakeven — %BE_DROP düşüşte SL = entry
-                if not trade.breakeven_triggered:
+                if trade.breakeven_triggered and not _be0:
                     drop_pct = (trade.entry_price - bar["close"]) / trade.entry_price * 100.0
-                    if drop_pct >= be_price_drop_pct:
-                        trade.stop_loss = trade.entry_price
-                        trade.sl_moved_to_be = True
-                        trade.breakeven_triggered = True
-                        print(f"\n  [{bar_str}] ⚡ BE {sym:<16}"
-                              f" Düşüş: %{drop_pct:.1f}")
+                    print(f"\n  [{bar_str}] ⚡ BE {sym:<16}"
+                          f" Düşüş: %{drop_pct:.1f}")
 
                 # TSL aktivasyonu ve güncelleme (low bazlı)
-                low_drop_pct = (trade.entry_price - bar["low"]) / trade.entry_price * 100.0
-                if not trade.tsl_active:
-                    if low_drop_pct >= Config.TSL_ACTIVATION_DROP_PCT:
-                        trade.tsl_active = True
-                        trade.lowest_low_reached = bar["low"]
-                        new_sl = trade.lowest_low_reached * (1 + Config.TSL_TRAIL_PCT / 100.0)
-                        trade.stop_loss = min(trade.stop_loss, new_sl)
-                        print(f"\n  [{bar_str}] 🎯 TSL-AKT {sym:<14}"
-                              f" Low: {trade.lowest_low_reached:.6f}  SL → {trade.stop_loss:.6f}")
-                else:
-                    if bar["low"] < trade.lowest_low_reached:
-                        trade.lowest_low_reached = bar["low"]
-                        new_sl = trade.lowest_low_reached * (1 + Config.TSL_TRAIL_PCT / 100.0)
-                        trade.stop_loss = min(trade.stop_loss, new_sl)
+                if trade.tsl_active and not _tsl0:
+                    print(f"\n  [{bar_str}] 🎯 TSL-AKT {sym:<14}"
+                          f" Low: {trade.lowest_low_reached:.6f}  SL → {trade.stop_loss:.6f}")
 
                 # ── KURAL 3: MUM İÇİ BOUNCE (SEKME) KONTROLÜ ─────────
                 # TSL aktifleşti/güncellendi ve yeni bir stop belirlendi.
@@ -3293,7 +4927,7 @@ class FullUniverseBacktester:
                 # fiyat dip yapıp sekerken TSL'i patlatmış demektir → kapat.
                 # (Kural 1'den farkı: burada HIGH değil CLOSE kullanılır;
                 #  çünkü stop yeni OLUŞTU ve close zaten üstte kapandı.)
-                if trade.tsl_active and bar["close"] >= trade.stop_loss:
+                if _code == EXIT_BOUNCE:
                     exit_p  = trade.stop_loss
                     raw_pnl = (trade.entry_price - exit_p) / trade.entry_price
                     pnl_usd = trade.position_size_usdt * trade.leverage * raw_pnl
@@ -3320,7 +4954,7 @@ class FullUniverseBacktester:
                 if bar["close"] > bar["open"] and bar["close"] > trade.entry_price:
                     green_body_pct = (bar["close"] - bar["open"]) / bar["open"] * 100.0
                     # Zararda tek yeşil mum gövdesi >= %10 → anında kapat (reversal olmadı)
-                    if green_body_pct >= Config.GREEN_LOSS_SINGLE_BODY_PCT:
+                    if green_body_pct >= self.cfg.GREEN_LOSS_SINGLE_BODY_PCT:
                         exit_p  = bar["close"]
                         raw_pnl = (trade.entry_price - exit_p) / trade.entry_price
                         pnl_usd = trade.position_size_usdt * trade.leverage * raw_pnl
@@ -3372,7 +5006,6 @@ class FullUniverseBacktester:
 
             # ══ (2) WATCHLİST GÜNCELLE (6-bar rolling window net pump) ═══════════════
             candidates: List[tuple] = []  # (gain_pct, sym, pump_info)
-            n = Config.PUMP_WINDOW_CANDLES  # 6
 
             for sym, df in self.all_data.items():
                 if sym in active:
@@ -3380,36 +5013,12 @@ class FullUniverseBacktester:
                 if ts not in df.index:
                     continue
 
-                ts_idx = df.index.get_loc(ts)
-                if ts_idx < n:
-                    continue
-
-                window = [df.iloc[ts_idx - n + k] for k in range(n)]
-
-                if any(c["low"] <= 0 or pd.isna(c["high"]) for c in window):
-                    continue
-
-                # Koşul 1: En az 4 yeşil mum (sıralı olması şart değil)
-                green_count = sum(1 for c in window if c["close"] > c["open"])
-                if green_count < Config.PUMP_MIN_GREEN_COUNT:  # 4
+                # Pencere koşulları (≥4 yeşil, gövde tabanından ≥ PUMP_MIN_PCT) —
+                # sembol başına önceden hesaplanmış rolling_pump_scan'den O(1) okunur
+                pump_info = pump_info_at(pump_scans[sym], df.index.get_loc(ts))
+                if pump_info is None:
                     continue
-
-                # Koşul 2: pencere başlangıcının gövde tabanı → mevcut barın kapanışı >= PUMP_MIN_PCT
-                pump_high      = max(c["high"] for c in window)
-                pump_start_low = window[0]["low"]   # Rapor/SL referansı için saklanır
-                pump_start_ref = min(window[0]["open"], window[0]["close"])  # Gövde tabanı (wick dahil değil)
-                current_close  = df.iloc[ts_idx]["close"]
-                if pump_start_ref <= 0:
-                    continue
-                net_gain_pct   = (current_close - pump_start_ref) / pump_start_ref * 100.0
-                if net_gain_pct < Config.PUMP_MIN_PCT:
-                    continue
-
-                candidates.append((net_gain_pct, sym, {
-                    "pump_pct": net_gain_pct,
-                    "pump_low": pump_start_low,
-                    "pump_high": pump_high,
-                }))
+                candidates.append((pump_info["pump_pct"], sym, pump_info))
 
             # Top 10 gainer seç
             candidates.sort(key=lambda x: x[0], reverse=True)
@@ -3418,7 +5027,7 @@ class FullUniverseBacktester:
 
             # TOP_N dışındaki pump adaylarının ilk geçerli kırmızı mumunu tüket
             # (coin ileride TOP_N'e girdiğinde 2. kırmızıdan açılmasını önler — VVV bug fix)
-            _top_n_syms = {sym for _, sym, _ in candidates[:Config.TOP_N_GAINERS]}
+            _top_n_syms = {sym for _, sym, _ in candidates[:self.cfg.TOP_N_GAINERS]}
             for _, _sym, _info in candidates:
                 if _sym in _top_n_syms or _sym in consumed_signals:
                     continue
@@ -3431,14 +5040,14 @@ class FullUniverseBacktester:
                 if _b2["close"] >= _b2["open"]:
                     continue  # yeşil mum, giriş şartı yok
                 _rb2 = (_b2["open"] - _b2["close"]) / _b2["open"] * 100.0
-                if _rb2 < Config.ENTRY_RED_BODY_MIN_PCT:
+                if _rb2 < self.cfg.ENTRY_RED_BODY_MIN_PCT:
                     continue  # gövde yeterli değil
                 if _b2["close"] >= _info["pump_high"]:
                     continue  # kapanış pump_high'ın üstünde
                 consumed_signals.add(_sym)  # ilk kırmızı tüketildi
 
             new_watchlist: Dict[str, dict] = {}
-            for _, sym, info in candidates[:Config.TOP_N_GAINERS]:
+            for _, sym, info in candidates[:self.cfg.TOP_N_GAINERS]:
                 if sym in consumed_signals:
                     continue  # İlk kırmızısı tüketildi — yeni pump oluşana kadar bekle
                 # Mevcut pump_high'ı koru (sürekli güncelle)
@@ -3496,7 +5105,7 @@ class FullUniverseBacktester:
 
                 # ─── İLK GEÇERLİ KIRMIZI MUM — sinyal bu bar tüketildi ────────────────
                 # Gövde küçükse (≤%2) sinyal yanmaz, bir sonraki kırmızı mumda tekrar değerlendirilir
-                if red_body_pct < Config.ENTRY_RED_BODY_MIN_PCT:
+                if red_body_pct < self.cfg.ENTRY_RED_BODY_MIN_PCT:
                     continue  # Cılız kırmızı: bekle, sinyal yanmadı
                 # Önceki mum yeşil ve gövdesi max %30 olmalı (sahte kırmızı filtresi)
                 _ts_idx = df.index.get_loc(ts)
@@ -3506,7 +5115,7 @@ class FullUniverseBacktester:
                 if prev_bar["close"] <= prev_bar["open"]:
                     continue  # önceki mum yeşil değil — giriş yok
                 prev_body_pct = (prev_bar["close"] - prev_bar["open"]) / prev_bar["open"] * 100.0
-                if prev_body_pct >= Config.ANTI_ROCKET_SINGLE_CANDLE_PCT:  # >= : canlı bot ile aynı
+                if prev_body_pct >= self.cfg.ANTI_ROCKET_SINGLE_CANDLE_PCT:  # >= : canlı bot ile aynı
                     continue  # önceki yeşil mum fazla büyük — sahte kırmızı riski
 
                 consumed_signals.add(sym)
@@ -3515,21 +5124,365 @@ class FullUniverseBacktester:
                     print(f"\n  [{bar_str}] ⛔ EQUİTY<100$ ({equity:.0f}$): {sym} — sinyal iptal")
                     continue
 
-                if len(active) >= Config.MAX_ACTIVE_TRADES:
+                if len(active) >= self.cfg.MAX_ACTIVE_TRADES:
                     print(f"\n  [{bar_str}] ⛔ SLOT DOLU — ilk kırmızı kaçırıldı: {sym} — sinyal iptal")
                     continue
 
                 # Dinamik kaldıraç: 100-200$ arası → 4x, 200$+ → 3x
-                lev = 4 if equity < 200.0 else Config.LEVERAGE
+                lev = 4 if equity < 200.0 else self.cfg.LEVERAGE
 
                 # SL: Giriş fiyatının %15 üstü (entry × 1.15)
-                sl = entry_p * (1 + Config.SL_ABOVE_ENTRY_PCT / 100.0)
+                sl = entry_p * (1 + self.cfg.SL_ABOVE_ENTRY_PCT / 100.0)
 
                 # Pozisyon büyüklüğü
                 if equity < 200.0:
                     pos_margin = equity  # Tek pozisyon, tüm equity
                 else:
-                    pos_margin = equity / Config.MAX_ACTIVE_TRADES
+                    pos_margin = equity / self.cfg.MAX_ACTIVE_TRADES
+
+                trade = TradeRecord(
+                    symbol             = sym,
+                    side               = "SHORT",
+                    entry_time         = entry_time_fu,
+                    entry_price        = entry_p,
+                    stop_loss          = sl,
+                    initial_stop_loss  = sl,
+                    tp1_price          = 0.0,
+                    tp2_price          = 0.0,
+                    position_size_usdt = pos_margin,
+                    remaining_pct      = 1.0,
+                    pump_pct           = pump_info["pump_pct"],
+                    pump_high          = pump_info["pump_high"],
+                    pump_low           = pump_info["pump_low"],
+                    entry_candle_open  = entry_p,
+                    leverage           = lev,
+                )
+                active[sym] = trade
+                max_concurrent = max(max_concurrent, len(active))
+
+                print(f"\n  [{entry_time_fu}] ✅ SHORT {sym:<16}"
+                      f" Giriş: {entry_p:.6f}  SL: {sl:.6f}"
+                      f"  Pump: +{pump_info['pump_pct']:.1f}%  [Sinyal: {bar_str}]")
+
+        self._finalize_backtest(active, equity, max_concurrent, total_bars)
+
+    # ─────────────────────────────────────────────────────────────────
+    # E2) NumPy motoru — run_backtest döngüsüyle birebir aynı trade listesi
+    # ─────────────────────────────────────────────────────────────────
+    def _build_signal_panel(self, all_timestamps: list) -> dict:
+        """
+        Tüm sembollerin bar sinyallerini tek seferde (n_ts × n_sym) dizilere döker.
+
+        Pump penceresi ortak rolling_pump_scan ile, ilk-kırmızı gövde filtresi
+        vektörel olarak sembol başına bir kez hesaplanır. Sinyaller sembolün KENDİ
+        satır indeksine göredir (döngü motorundaki df.index.get_loc ile aynı).
+        NaN davranışı korunur: döngüdeki `if x < esik: continue` kontrolleri
+        burada `~(x < esik)` olarak yazıldı.
+        """
+        syms  = list(self.all_data.keys())
+        shape = (len(all_timestamps), len(syms))
+        ts_ix = pd.DatetimeIndex(all_timestamps)
+
+        panel = {
+            "syms":      syms,
+            "open":      np.full(shape, np.nan),
+            "high":      np.full(shape, np.nan),
+            "low":       np.full(shape, np.nan),
+            "close":     np.full(shape, np.nan),
+            "row":       np.full(shape, -1, dtype=np.int64),   # sembolün kendi satır no (-1 = bar yok)
+            "is_pump":   np.zeros(shape, dtype=bool),
+            "gain":      np.full(shape, np.nan),
+            "pump_high": np.full(shape, np.nan),
+            "pump_low":  np.full(shape, np.nan),
+            "red_ok":    np.zeros(shape, dtype=bool),          # geçerli ilk kırmızı (gövde ≥ min)
+            "own":       [],                                   # j → (open, close, index) ham diziler
+        }
+
+        for j, sym in enumerate(syms):
+            df = self.all_data[sym]
+            o  = df["open"].to_numpy(dtype=float)
+            h  = df["high"].to_numpy(dtype=float)
+            l  = df["low"].to_numpy(dtype=float)
+            c  = df["close"].to_numpy(dtype=float)
+            panel["own"].append((o, c, df.index))
+
+            scan = rolling_pump_scan(o, h, l, c, cfg=self.cfg)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                red_body = (o - c) / o * 100.0
+            red_ok = ~(c >= o) & ~(red_body < self.cfg.ENTRY_RED_BODY_MIN_PCT)
+
+            pos = ts_ix.get_indexer(df.index)       # sembol satırı → global bar no
+            own = np.flatnonzero(pos >= 0)
+            at  = pos[own]
+            panel["open"][at, j]      = o[own]
+            panel["high"][at, j]      = h[own]
+            panel["low"][at, j]       = l[own]
+            panel["close"][at, j]     = c[own]
+            panel["row"][at, j]       = own
+            panel["is_pump"][at, j]   = scan["is_pump"][own]
+            panel["gain"][at, j]      = scan["pump_pct"][own]
+            panel["pump_high"][at, j] = scan["pump_high"][own]
+            panel["pump_low"][at, j]  = scan["pump_low"][own]
+            panel["red_ok"][at, j]    = red_ok[own]
+
+        return panel
+
+    def _run_backtest_vectorized(self, all_timestamps: list):
+        """
+        run_backtest'in NumPy motoru (self.cfg.BACKTEST_VECTORIZED / vectorized=True).
+
+        Sinyaller _build_signal_panel ile önceden dizilere dökülür; zaman döngüsü
+        sadece slot / equity durum makinesini yürütür ve her barda yalnızca açık
+        trade'lere, o barın pump adaylarına ve watchlist'e dokunur. Kurallar ve
+        sıralama döngü motoruyla birebir aynıdır (aynı trade listesi, aynı equity).
+
+        event_5m=True → olay saatli mod: 4H bar kapanışları watchlist + girişleri,
+        5m mumlar stop yönetimini (BE / TSL / SL, KERNEL_INTRA_5M) sürer. Her 4H bar
+        penceresinde açık trade'lerin 5m dilimi çekirdekten geçer; çıkış olayları
+        sembollerden bağımsız bir min-heap'te (zaman, sıra) kronolojik birleştirilir ve
+        4H kapanışından ÖNCE işlenir → equity ve slotlar 5m çözünürlükte doğru.
+        Her trade'in 5m imleci sadece ileri gider (veri üzerinde tek geçiş). O bar için
+        5m verisi olmayan sembollerde 4H kuralları (KERNEL_BAR_4H) kullanılır.
+        """
+        panel = self._build_signal_panel(all_timestamps)
+        syms  = panel["syms"]
+        col   = {sym: j for j, sym in enumerate(syms)}
+        O, H, L, C = panel["open"], panel["high"], panel["low"], panel["close"]
+        ROW, IS_PUMP, RED_OK = panel["row"], panel["is_pump"], panel["red_ok"]
+        GAIN, PHIGH, PLOW    = panel["gain"], panel["pump_high"], panel["pump_low"]
+
+        equity         = self.capital
+        self.equity_curve = [equity]
+        active: Dict[str, TradeRecord] = {}
+        watchlist: Dict[str, dict]     = {}
+        post_exit_price: Dict[str, float] = {}
+        new_push: Dict[str, bool]         = {}
+        consumed_signals: set             = set()
+        max_concurrent = 0
+        total_bars     = len(all_timestamps)
+        be_price_drop_pct = self.cfg.BREAKEVEN_DROP_PCT
+        all_data_5m    = getattr(self, "all_data_5m", {})
+        event_5m       = getattr(self, "event_5m", False)
+        bar_td         = pd.Timedelta(hours=4)
+        intra5: Dict[str, dict] = {}   # sym → {"ts", "high", "low", "close"} (event_5m)
+        cursor5: Dict[str, int] = {}   # sym → açık trade'in sıradaki 5m pozisyonu
+        if event_5m:
+            for sym, df5 in all_data_5m.items():
+                high5, low5, close5 = ohlc_arrays(df5)
+                intra5[sym] = {"ts": df5.index, "high": high5, "low": low5, "close": close5}
+
+        for i, ts in enumerate(all_timestamps):
+            if i % 100 == 0:
+                pct = i / total_bars * 100 if total_bars else 0
+                print(f"\r  Sim: %{pct:5.1f}  Bar {i}/{total_bars}"
+                      f"  Equity: {equity:8.4f}$  Aktif: {len(active)}  "
+                      f"Watchlist: {len(watchlist)}",
+                      end="", flush=True)
+
+            bar_str = ts.strftime("%d.%m.%Y %H:%M")
+
+            # ══ (0) event_5m: bar içi 5m stop olayları — heap ile kronolojik ══
+            managed_5m = set()
+            if event_5m and active:
+                bar_end = ts + bar_td
+                events: List[tuple] = []
+                for seq, (sym, trade) in enumerate(active.items()):
+                    d5 = intra5.get(sym)
+                    if d5 is None:
+                        continue
+                    start5 = cursor5[sym]
+                    end5   = int(d5["ts"].searchsorted(bar_end, side="left"))
+                    if start5 >= end5:
+                        continue                    # bu bar için 5m yok → 4H kuralları
+                    cursor5[sym] = end5
+                    managed_5m.add(sym)
+                    k, _code = apply_exit_kernel(trade, d5["high"], d5["low"], d5["close"], start5, end5,
+                                                 be_price_drop_pct, self.cfg, KERNEL_INTRA_5M)
+                    if _code != EXIT_NONE:
+                        heapq.heappush(events, (d5["ts"][k].value, seq, sym, k))
+                while events:
+                    _, _, sym, k = heapq.heappop(events)
+                    trade   = active.pop(sym)
+                    exit_p  = trade.stop_loss
+                    reason  = "TSL-HIT" if trade.tsl_active else "STOP-LOSS"
+                    exit_t  = intra5[sym]["ts"][k].strftime("%d.%m.%Y %H:%M")
+                    raw_pnl = (trade.entry_price - exit_p) / trade.entry_price
+                    pnl_usd = trade.position_size_usdt * trade.leverage * raw_pnl
+                    pnl_usd = max(pnl_usd, -trade.position_size_usdt)  # Max kayıp = margin
+                    trade.exit_time   = exit_t
+                    trade.exit_price  = exit_p
+                    trade.exit_reason = reason
+                    trade.pnl_pct     = round(raw_pnl * 100, 4)
+                    trade.pnl_usdt    = round(pnl_usd, 4)
+                    equity += pnl_usd
+                    self.equity_curve.append(equity)
+                    self.trades.append(trade)
+                    consumed_signals.discard(sym)
+                    post_exit_price[sym] = exit_p
+                    new_push[sym] = False
+                    print(f"\n  [{exit_t}] 🔴 {reason + '[5m]':<13} {sym:<16}"
+                          f" exit: {exit_p:.6f}  PnL: {pnl_usd:>+8.4f}$"
+                          f"  Equity: {equity:.4f}$")
+
+            # ══ (1) AÇIK TRADE'LER — Kural 1 (HIGH≥SL) → BE → TSL → bounce → GREEN ══
+            closed = []
+            for sym, trade in list(active.items()):
+                j = col.get(sym)
+                if j is None or ROW[i, j] < 0:
+                    continue
+                b_open, b_high, b_low, b_close = O[i, j], H[i, j], L[i, j], C[i, j]
+
+                exit_ = None   # (exit_p, reason, log etiketi)
+                _be0, _tsl0 = trade.breakeven_triggered, trade.tsl_active
+                _code = EXIT_NONE
+                if sym not in managed_5m:           # 5m ile yönetildiyse stop kuralları bitti
+                    _, _code = apply_exit_kernel(trade, H[:, j], L[:, j], C[:, j], i, i + 1,
+                                                 be_price_drop_pct, self.cfg, KERNEL_BAR_4H)
+                if _code == EXIT_STOP:
+                    reason = "TSL-HIT" if trade.tsl_active else "STOP-LOSS"
+                    exit_  = (trade.stop_loss, reason, f"🔴 {reason:<8} {sym:<16}")
+                else:
+                    if trade.breakeven_triggered and not _be0:
+                        drop_pct = (trade.entry_price - b_close) / trade.entry_price * 100.0
+                        print(f"\n  [{bar_str}] ⚡ BE {sym:<16}"
+                              f" Düşüş: %{drop_pct:.1f}")
+                    if trade.tsl_active and not _tsl0:
+                        print(f"\n  [{bar_str}] 🎯 TSL-AKT {sym:<14}"
+                              f" Low: {trade.lowest_low_reached:.6f}  SL → {trade.stop_loss:.6f}")
+
+                    if _code == EXIT_BOUNCE:
+                        exit_ = (trade.stop_loss, "TSL-HIT", f"🎯 TSL-HIT (bounce) {sym:<12}")
+                    elif b_close > b_open and b_close > trade.entry_price:
+                        green_body_pct = (b_close - b_open) / b_open * 100.0
+                        if green_body_pct >= self.cfg.GREEN_LOSS_SINGLE_BODY_PCT:
+                            exit_ = (b_close, "GREEN-10",
+                                     f"🟠 GREEN-10  {sym:<16} Gövde: %{green_body_pct:.1f} ")
+                        else:
+                            trade.consec_green_loss += 1
+                            if trade.consec_green_loss >= 2:
+                                exit_ = (b_close, "2xGREEN-LOSS", f"🟠 2xGREEN-LOSS {sym:<16}")
+                    else:
+                        trade.consec_green_loss = 0
+
+                if exit_ is None:
+                    continue
+                exit_p, reason, label = exit_
+                raw_pnl = (trade.entry_price - exit_p) / trade.entry_price
+                pnl_usd = trade.position_size_usdt * trade.leverage * raw_pnl
+                pnl_usd = max(pnl_usd, -trade.position_size_usdt)  # Max kayıp = margin
+                trade.exit_time   = bar_str
+                trade.exit_price  = exit_p
+                trade.exit_reason = reason
+                trade.pnl_pct     = round(raw_pnl * 100, 4)
+                trade.pnl_usdt    = round(pnl_usd, 4)
+                equity += pnl_usd
+                self.equity_curve.append(equity)
+                self.trades.append(trade)
+                closed.append(sym)
+                consumed_signals.discard(sym)
+                post_exit_price[sym] = exit_p
+                new_push[sym] = False
+                print(f"\n  [{bar_str}] {label}"
+                      f" exit: {exit_p:.6f}  PnL: {pnl_usd:>+8.4f}$"
+                      f"  Equity: {equity:.4f}$")
+
+            for sym in closed:
+                del active[sym]
+
+            # ══ (2) WATCHLİST — sadece bu barda pump sinyali olan sütunlar ══
+            candidates: List[tuple] = []
+            for j in np.flatnonzero(IS_PUMP[i]):
+                sym = syms[j]
+                if sym in active:
+                    continue
+                candidates.append((GAIN[i, j], sym, {
+                    "pump_pct": GAIN[i, j],
+                    "pump_low": PLOW[i, j],
+                    "pump_high": PHIGH[i, j],
+                }))
+            candidates.sort(key=lambda x: x[0], reverse=True)
+
+            _top_n_syms = {sym for _, sym, _ in candidates[:self.cfg.TOP_N_GAINERS]}
+            for _, _sym, _info in candidates:
+                if _sym in _top_n_syms or _sym in consumed_signals:
+                    continue
+                j = col[_sym]
+                if RED_OK[i, j] and not C[i, j] >= _info["pump_high"]:
+                    consumed_signals.add(_sym)
+
+            new_watchlist: Dict[str, dict] = {}
+            for _, sym, info in candidates[:self.cfg.TOP_N_GAINERS]:
+                if sym in consumed_signals:
+                    continue
+                if sym in watchlist:
+                    info["pump_high"] = max(info["pump_high"], watchlist[sym]["pump_high"])
+                new_watchlist[sym] = info
+            watchlist = new_watchlist
+
+            # ══ (3) GİRİŞ: Kırmızı mum → SHORT ════════════════════
+            sorted_wl = sorted(watchlist.items(), key=lambda x: x[1]["pump_pct"], reverse=True)
+
+            for sym, pump_info in sorted_wl:
+                if sym in active:
+                    continue
+                j = col[sym]
+                r = ROW[i, j]
+                if r < 0:
+                    continue
+                b_open, b_high, b_close = O[i, j], H[i, j], C[i, j]
+
+                if sym in post_exit_price:
+                    if b_high > post_exit_price[sym]:
+                        new_push[sym] = True
+                    if not new_push.get(sym, True):
+                        continue
+
+                if b_close >= b_open:
+                    continue
+
+                red_body_pct = (b_open - b_close) / b_open * 100.0
+
+                own_o, own_c, own_idx = panel["own"][j]
+                _entry_ts_fu = ts + pd.Timedelta(hours=4)
+                _df5m_fu     = all_data_5m.get(sym)
+                if _df5m_fu is not None and _entry_ts_fu in _df5m_fu.index:
+                    entry_p       = _df5m_fu.loc[_entry_ts_fu]["open"]
+                    entry_time_fu = _entry_ts_fu.strftime("%d.%m.%Y %H:%M")
+                elif r + 1 < len(own_o):
+                    entry_p       = own_o[r + 1]
+                    entry_time_fu = own_idx[r + 1].strftime("%d.%m.%Y %H:%M")
+                else:
+                    entry_p       = b_close
+                    entry_time_fu = bar_str
+
+                if entry_p >= pump_info["pump_high"]:
+                    pump_info["pump_high"] = max(pump_info["pump_high"], b_high)
+                    continue
+
+                if red_body_pct < self.cfg.ENTRY_RED_BODY_MIN_PCT:
+                    continue
+                if r == 0:
+                    continue
+                prev_o, prev_c = own_o[r - 1], own_c[r - 1]
+                if prev_c <= prev_o:
+                    continue
+                prev_body_pct = (prev_c - prev_o) / prev_o * 100.0
+                if prev_body_pct >= self.cfg.ANTI_ROCKET_SINGLE_CANDLE_PCT:
+                    continue
+
+                consumed_signals.add(sym)
+
+                if equity < 100.0:
+                    print(f"\n  [{bar_str}] ⛔ EQUİTY<100$ ({equity:.0f}$): {sym} — sinyal iptal")
+                    continue
+
+                if len(active) >= self.cfg.MAX_ACTIVE_TRADES:
+                    print(f"\n  [{bar_str}] ⛔ SLOT DOLU — ilk kırmızı kaçırıldı: {sym} — sinyal iptal")
+                    continue
+
+                lev = 4 if equity < 200.0 else self.cfg.LEVERAGE
+                sl  = entry_p * (1 + self.cfg.SL_ABOVE_ENTRY_PCT / 100.0)
+                pos_margin = equity if equity < 200.0 else equity / self.cfg.MAX_ACTIVE_TRADES
 
                 trade = TradeRecord(
                     symbol             = sym,
@@ -3550,12 +5503,18 @@ class FullUniverseBacktester:
                 )
                 active[sym] = trade
                 max_concurrent = max(max_concurrent, len(active))
+                if sym in intra5:   # 5m stop yönetimi giriş mumundan başlar
+                    cursor5[sym] = int(intra5[sym]["ts"].searchsorted(ts + bar_td, side="left"))
 
                 print(f"\n  [{entry_time_fu}] ✅ SHORT {sym:<16}"
                       f" Giriş: {entry_p:.6f}  SL: {sl:.6f}"
                       f"  Pump: +{pump_info['pump_pct']:.1f}%  [Sinyal: {bar_str}]")
 
-        # ── Backtest sonu: açık trade'leri kapat ─────────────────────
+        self._finalize_backtest(active, equity, max_concurrent, total_bars)
+
+    def _finalize_backtest(self, active: Dict[str, TradeRecord], equity: float,
+                           max_concurrent: int, total_bars: int):
+        """Backtest sonu: açık kalan trade'leri BT-END ile kapat ve özet bas (her iki motor)."""
         print("\n\n  ── Açık kalan tradeler kapatılıyor (BT-END) ──")
         for sym, trade in list(active.items()):
             if sym not in self.all_data:
@@ -3588,7 +5547,7 @@ class FullUniverseBacktester:
             print("═" * 68)
             print(f"  İncelenen sembol: {len(self.all_data)}")
             print(f"  Toplam 4H bar: {total_bars}")
-            print(f"  Pump kriteri: Günlük mum kazancı ≥ %{Config.PUMP_MIN_PCT}")
+            print(f"  Pump kriteri: Günlük mum kazancı ≥ %{self.cfg.PUMP_MIN_PCT}")
             print(f"  → Öneri: PUMP_MIN_PCT değerini düşürün (örn. 20.0)")
             print("═" * 68)
 
@@ -3598,6 +5557,7 @@ class FullUniverseBacktester:
     def print_report(self):
         """Backtester.print_report'u yeniden kullan (aynı veri formatı)."""
         _dummy = Backtester.__new__(Backtester)
+        _dummy.cfg          = self.cfg
         _dummy.trades       = self.trades
         _dummy.equity_curve = self.equity_curve
         _dummy.capital      = self.capital
@@ -3610,6 +5570,7 @@ class FullUniverseBacktester:
     def verify_profits_5m(self):
         """FullUniverse için 5m doğrulama — Backtester.verify_profits_5m'i yeniden kullanır."""
         _dummy = Backtester.__new__(Backtester)
+        _dummy.cfg          = self.cfg
         _dummy.trades       = self.trades
         _dummy.equity_curve = self.equity_curve
         _dummy.capital      = self.capital
@@ -3617,6 +5578,174 @@ class FullUniverseBacktester:
         Backtester.verify_profits_5m(_dummy)
 
 
+# ══════════════════════════════════════════════════════════════════════════
+#  BÖLÜM 3.7 — PARAMETRE TARAMASI  (çok çekirdekli, paylaşımlı bellek)
+# ══════════════════════════════════════════════════════════════════════════
+
+def _pack_candles(frames: Dict[str, pd.DataFrame]) -> Tuple[shared_memory.SharedMemory, dict]:
+    """
+    Sembol DataFrame'lerini tek paylaşımlı bellek bloğuna yaz:
+    [int64 ms timestamp × N][float64 OHLCV × N×5]. Worker'lar kopyasız bağlanır.
+    """
+    syms  = list(frames)
+    total = sum(len(frames[s]) for s in syms)
+    shm   = shared_memory.SharedMemory(create=True, size=max(total, 1) * 6 * 8)
+    ts    = np.ndarray((total,), dtype=np.int64, buffer=shm.buf)
+    vals  = np.ndarray((total, 5), dtype=np.float64, buffer=shm.buf, offset=total * 8)
+    layout, pos = [], 0
+    for sym in syms:
+        df = frames[sym]
+        n  = len(df)
+        ts[pos:pos + n]   = df.index.as_unit("ms").asi8
+        vals[pos:pos + n] = df[["open", "high", "low", "close", "volume"]].to_numpy(dtype=float)
+        layout.append((sym, pos, n))
+        pos += n
+    return shm, {"name": shm.name, "total": total, "layout": layout}
+
+
+def _unpack_candles(meta: dict) -> Tuple[Dict[str, pd.DataFrame], shared_memory.SharedMemory]:
+    """_pack_candles bloğuna bağlan → sembol DataFrame'leri (OHLCV paylaşımlı belleğe view)."""
+    shm   = shared_memory.SharedMemory(name=meta["name"])
+    total = meta["total"]
+    ts    = np.ndarray((total,), dtype=np.int64, buffer=shm.buf)
+    vals  = np.ndarray((total, 5), dtype=np.float64, buffer=shm.buf, offset=total * 8)
+    frames: Dict[str, pd.DataFrame] = {}
+    for sym, pos, n in meta["layout"]:
+        idx = pd.DatetimeIndex(pd.to_datetime(ts[pos:pos + n], unit="ms", utc=True), name="timestamp")
+        frames[sym] = pd.DataFrame(vals[pos:pos + n], index=idx,
+                                   columns=["open", "high", "low", "close", "volume"], copy=False)
+    return frames, shm
+
+
+def backtest_metrics(trades: List[TradeRecord], equity_curve: List[float], capital: float) -> dict:
+    """Tarama tablosu metrikleri: net PnL, profit factor, max drawdown (%), trade sayısı, win rate."""
+    pnls  = [t.pnl_usdt for t in trades]
+    gross_win  = sum(p for p in pnls if p > 0)
+    gross_loss = -sum(p for p in pnls if p < 0)
+    if gross_loss > 0:
+        pf = gross_win / gross_loss
+    else:
+        pf = float("inf") if gross_win > 0 else 0.0
+    eq   = np.asarray(equity_curve if equity_curve else [capital], dtype=float)
+    peak = np.maximum.accumulate(eq)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dd = np.where(peak > 0, (peak - eq) / peak * 100.0, 0.0)
+    return {
+        "pnl":        round(float(eq[-1] - capital), 2),
+        "pf":         round(pf, 3),
+        "max_dd_pct": round(float(dd.max()), 2),
+        "trades":     len(trades),
+        "win_rate":   round(sum(1 for p in pnls if p > 0) / len(pnls) * 100.0, 1) if pnls else 0.0,
+    }
+
+
+def sweep_combinations(grid: Dict[str, list] = None, space: Dict[str, list] = None,
+                       samples: int = 0, seed: int = 0) -> List[dict]:
+    """
+    Parametre kombinasyonları.
+      grid  : {"PUMP_MIN_PCT": [25, 30, 35], ...}  → kartezyen çarpım
+      space : {"TSL_TRAIL_PCT": [2.0, 6.0], "TOP_N_GAINERS": [5, 10, 15]}
+              2 elemanlı sayı aralığı → uniform (iki uç int ise randint), diğer listeler → seçim
+      samples: rastgele arama örnek sayısı (space ile)
+    """
+    combos: List[dict] = []
+    if grid:
+        keys = list(grid)
+        combos.extend(dict(zip(keys, vals)) for vals in itertools.product(*(grid[k] for k in keys)))
+    if space and samples:
+        rng = random.Random(seed)
+        for _ in range(samples):
+            combo = {}
+            for k, v in space.items():
+                if len(v) == 2 and all(isinstance(x, (int, float)) for x in v):
+                    lo, hi = v
+                    combo[k] = rng.randint(lo, hi) if isinstance(lo, int) and isinstance(hi, int) \
+                        else round(rng.uniform(lo, hi), 4)
+                else:
+                    combo[k] = rng.choice(v)
+            combos.append(combo)
+    return combos
+
+
+_SWEEP_STATE: dict = {}   # worker süreci başına: paylaşımlı veri + backtester argümanları
+
+
+def _sweep_worker_init(kind: str, meta_tf: dict, meta_5m: Optional[dict], bt_kwargs: dict):
+    """Worker başlangıcı: paylaşımlı belleğe bir kez bağlan, log gürültüsünü kapat."""
+    logging.getLogger("PumpDumpBot").setLevel(logging.WARNING)
+    all_data, shm_tf = _unpack_candles(meta_tf)
+    all_data_5m, shm_5m = _unpack_candles(meta_5m) if meta_5m else ({}, None)
+    _SWEEP_STATE.update(kind=kind, all_data=all_data, all_data_5m=all_data_5m,
+                        bt_kwargs=bt_kwargs, shms=(shm_tf, shm_5m))
+
+
+def _sweep_run_one(params: dict) -> dict:
+    """Tek kombinasyon: Config.derive ile izole konfig → run_backtest → metrikler."""
+    import contextlib
+    import io
+    st  = _SWEEP_STATE
+    cfg = Config.derive(CANDLE_STORE_ENABLED=False, **params)
+    cls = FullUniverseBacktester if st["kind"] == "full" else Backtester
+    bt  = cls(cfg=cfg, **st["bt_kwargs"])
+    bt.all_data, bt.all_data_5m = st["all_data"], st["all_data_5m"]
+    with contextlib.redirect_stdout(io.StringIO()):
+        bt.run_backtest()
+    return {**params, **backtest_metrics(bt.trades, bt.equity_curve, bt.capital)}
+
+
+def run_param_sweep(bt, combos: List[dict], workers: int = None,
+                    sort_by: str = "pnl", top: int = 20) -> pd.DataFrame:
+    """
+    Verisi yüklenmiş şablon backtester (Backtester / FullUniverseBacktester) üzerinde
+    her kombinasyonu ProcessPoolExecutor'da koştur. Mum verisi paylaşımlı belleğe
+    bir kez yazılır; her çalıştırma kendi Config.derive konfigini kullanır.
+    Döndürür: sıralı sonuç tablosu (DataFrame) — ilk `top` satır ekrana basılır.
+    """
+    kind = "full" if isinstance(bt, FullUniverseBacktester) else "symbols"
+    bt_kwargs = {"start_dt": bt.start_dt, "end_dt": bt.end_dt}
+    if kind == "symbols":
+        bt_kwargs["symbols"] = list(bt.all_data)
+    else:
+        bt_kwargs["vectorized"] = bt.vectorized
+        bt_kwargs["event_5m"]   = bt.event_5m
+
+    shm_tf, meta_tf = _pack_candles(bt.all_data)
+    shm_5m, meta_5m = _pack_candles(bt.all_data_5m) if bt.all_data_5m else (None, None)
+    rows: List[dict] = []
+    print(f"\n🧪 Parametre taraması: {len(combos)} kombinasyon  |  "
+          f"{len(bt.all_data)} sembol  |  worker: {workers or os.cpu_count()}")
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_sweep_worker_init,
+                                 initargs=(kind, meta_tf, meta_5m, bt_kwargs)) as pool:
+            futures = [pool.submit(_sweep_run_one, combo) for combo in combos]
+            for done, fut in enumerate(as_completed(futures), 1):
+                try:
+                    rows.append(fut.result())
+                except Exception as e:
+                    log.warning(f"  Tarama çalıştırması hata verdi: {e}")
+                print(f"\r  ⏳ {done}/{len(combos)} tamamlandı", end="", flush=True)
+    finally:
+        for shm in (shm_tf, shm_5m):
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+
+    table = pd.DataFrame(rows)
+    if table.empty:
+        print("\n  ⚠️ Hiç sonuç yok.")
+        return table
+    metric_cols = ["pnl", "pf", "max_dd_pct", "trades", "win_rate"]
+    table = table[metric_cols + [c for c in table.columns if c not in metric_cols]]
+    table = table.sort_values(sort_by, ascending=(sort_by == "max_dd_pct")).reset_index(drop=True)
+    table.index += 1
+    print("\n\n" + "═" * 100)
+    print(f"  🏆 EN İYİ {min(top, len(table))} KOMBİNASYON  (sıralama: {sort_by})")
+    print("═" * 100)
+    print(table.head(top).to_string())
+    print("═" * 100)
+    return table
+
+
 # ══════════════════════════════════════════════════════════════════════════
 #  BÖLÜM 4 — YALNIZCA TARAMA (SCAN) MODU
 # ══════════════════════════════════════════════════════════════════════════
@@ -3663,28 +5792,85 @@ async def run_scan_only():
 #  BÖLÜM 5 — MAIN (Giriş Noktası)
 # ══════════════════════════════════════════════════════════════════════════
 
+async def _prepare_backtester(full_universe: bool, start_dt: datetime = None,
+                              end_dt: datetime = None, data_dir: str = None,
+                              event_5m: bool = None):
+    """
+    Backtester'ı kur ve verisini yükle (online veya data_dir'den offline). Hata → None.
+    event_5m → FullUniverse 5m olay saatli motor (None: Config.BACKTEST_EVENT_5M).
+    """
+    if data_dir and start_dt is None:
+        end_dt = local_data_end(data_dir)
+        if end_dt is None:
+            log.error(f"❌ {data_dir}: okunabilir CSV bulunamadı.")
+            return None
+        start_dt = end_dt - timedelta(days=Config.BACKTEST_DAYS)
+    if full_universe:
+        bt = FullUniverseBacktester(start_dt=start_dt, end_dt=end_dt, event_5m=event_5m)
+    else:
+        bt = Backtester(start_dt=start_dt, end_dt=end_dt)
+    if data_dir:
+        bt.load_local_data(data_dir)
+    else:
+        await bt.load_data()
+    return bt
+
+
 async def main_backtest(full_universe: bool = False,
-                        start_dt: datetime = None, end_dt: datetime = None):
+                        start_dt: datetime = None, end_dt: datetime = None,
+                        data_dir: str = None, event_5m: bool = None):
     """
     Backtest modunu çalıştır.
     full_universe=True → Binance'den canlı universe çek, tüm coinleri test et.
     full_universe=False → Sadece Config.BACKTEST_SYMBOLS listesini test et.
     start_dt/end_dt → Belirli tarih aralığı (None ise son BACKTEST_DAYS gün kullanılır).
+    data_dir → Offline mod: universe ve mumlar bu klasördeki data_fetcher.py
+               CSV'lerinden okunur, exchange nesnesi hiç oluşturulmaz.
+               Tarih verilmezse verideki son mumdan geriye BACKTEST_DAYS gün.
+    event_5m → FullUniverse 5m olay saatli motor (None: Config.BACKTEST_EVENT_5M).
     """
-    if full_universe:
-        bt = FullUniverseBacktester(start_dt=start_dt, end_dt=end_dt)
-    else:
-        bt = Backtester(start_dt=start_dt, end_dt=end_dt)
-    await bt.load_data()
+    bt = await _prepare_backtester(full_universe, start_dt, end_dt, data_dir, event_5m)
+    if bt is None:
+        return
     bt.run_backtest()
     bt.print_report()
     # Kârlı tradeler 5m ile yeniden doğrula
-    # FullUniverse: önce yalnızca kazanılan tradeler için 5m çek
-    if full_universe and hasattr(bt, 'fetch_winning_5m'):
+    # FullUniverse: önce yalnızca kazanılan tradeler için 5m çek (offline: yerel intra-bar verisi)
+    # (event_5m: tüm universe'ün 5m verisi zaten yüklü)
+    if full_universe and not data_dir and hasattr(bt, 'fetch_winning_5m') and not bt.event_5m:
         await bt.fetch_winning_5m()
     bt.verify_profits_5m()
 
 
+async def main_sweep(spec_path: str, full_universe: bool = True,
+                     start_dt: datetime = None, end_dt: datetime = None,
+                     data_dir: str = None, workers: int = None, event_5m: bool = None):
+    """
+    Parametre taraması: veriyi BİR KEZ yükle, kombinasyonları tüm çekirdeklerde koştur.
+    spec_path (JSON):
+      {"grid":   {"PUMP_MIN_PCT": [25, 30, 35], "SL_ABOVE_ENTRY_PCT": [10, 15]},
+       "random": {"TSL_TRAIL_PCT": [2.0, 6.0]}, "samples": 50, "seed": 1,
+       "sort_by": "pnl", "top": 20, "out": "sweep_sonuc.csv"}
+    """
+    with open(spec_path, "r", encoding="utf-8") as f:
+        spec = json.load(f)
+    combos = sweep_combinations(spec.get("grid"), spec.get("random"),
+                                spec.get("samples", 0), spec.get("seed", 0))
+    if not combos:
+        log.error("❌ Tarama dosyasında kombinasyon yok (grid / random + samples).")
+        return
+    for combo in combos:
+        Config.derive(**combo)   # yazım hatalarını worker'lara gitmeden yakala
+    bt = await _prepare_backtester(full_universe, start_dt, end_dt, data_dir, event_5m)
+    if bt is None:
+        return
+    table = run_param_sweep(bt, combos, workers=workers,
+                            sort_by=spec.get("sort_by", "pnl"), top=spec.get("top", 20))
+    if spec.get("out") and not table.empty:
+        table.to_csv(spec["out"], index_label="rank")
+        print(f"  💾 Sonuçlar kaydedildi: {spec['out']}")
+
+
 async def main_live():
     """Canlı bot modunu çalıştır."""
     bot = PumpSnifferBot()
@@ -3692,6 +5878,39 @@ async def main_live():
 
 
 def main():
+    # ══════════════════════════════════════════════════════════════════════════
+    # Offline backtest (komut satırı): --data-dir <klasör> → menü yok, network yok
+    #   python "18.02.2026.py" --data-dir data/backtest_data [--quick] [--start 01.01.2026 --end 31.01.2026]
+    # Parametre taraması: --sweep tarama.json [--workers 8] [--data-dir ...]
+    # 5m olay saatli motor: --event-5m (sadece bu çalıştırma; Config değiştirilmez)
+    # ══════════════════════════════════════════════════════════════════════════
+    import argparse
+    parser = argparse.ArgumentParser(add_help=True)
+    parser.add_argument("--data-dir", help="data_fetcher.py CSV klasörü (offline backtest)")
+    parser.add_argument("--quick", action="store_true", help="Sadece BACKTEST_SYMBOLS (8 coin)")
+    parser.add_argument("--start", help="Başlangıç tarihi GG.AA.YYYY")
+    parser.add_argument("--end", help="Bitiş tarihi GG.AA.YYYY")
+    parser.add_argument("--sweep", help="Parametre taraması JSON dosyası (grid / random)")
+    parser.add_argument("--workers", type=int, default=None, help="Tarama süreç sayısı (varsayılan: CPU)")
+    parser.add_argument("--event-5m", action="store_true",
+                        help="FullUniverse: 5m olay saatli motor (tüm universe için 5m veri)")
+    args, _ = parser.parse_known_args()
+    event_5m = True if args.event_5m else None   # None → Config.BACKTEST_EVENT_5M
+    if args.data_dir or args.sweep:
+        bt_start_dt = datetime.strptime(args.start, "%d.%m.%Y") if args.start else None
+        bt_end_dt   = None
+        if bt_start_dt:
+            bt_end_dt = datetime.strptime(args.end, "%d.%m.%Y") if args.end else datetime.now()
+            bt_end_dt = bt_end_dt.replace(hour=23, minute=59, second=59)
+        if args.sweep:
+            asyncio.run(main_sweep(args.sweep, full_universe=not args.quick, start_dt=bt_start_dt,
+                                   end_dt=bt_end_dt, data_dir=args.data_dir, workers=args.workers,
+                                   event_5m=event_5m))
+        else:
+            asyncio.run(main_backtest(full_universe=not args.quick, start_dt=bt_start_dt,
+                                      end_dt=bt_end_dt, data_dir=args.data_dir, event_5m=event_5m))
+        return
+
     # ══════════════════════════════════════════════════════════════════════════
     # Container/Northflank için otomatik canlı mod (interaktif menü atlama)
     # ══════════════════════════════════════════════════════════════════════════
@@ -3772,7 +5991,8 @@ def main():
             print(f"  Başlatılıyor: TÜM coinler  |  "
                   f"{Config.BACKTEST_INITIAL_CAPITAL}$  |  "
                   f"{bt_start_dt.strftime('%d.%m.%Y')} → {bt_end_dt.strftime('%d.%m.%Y')}")
-            asyncio.run(main_backtest(full_universe=True, start_dt=bt_start_dt, end_dt=bt_end_dt))
+            asyncio.run(main_backtest(full_universe=True, start_dt=bt_start_dt, end_dt=bt_end_dt,
+                                      event_5m=event_5m))
         else:
             days_input = input(
                 f"  Kaç günlük backtest? [Enter = {Config.BACKTEST_DAYS} gün]: "
@@ -3785,7 +6005,7 @@ def main():
             print()
             print(f"  Başlatılıyor: TÜM coinler  |  "
                   f"{Config.BACKTEST_INITIAL_CAPITAL}$  |  son {Config.BACKTEST_DAYS} gün")
-            asyncio.run(main_backtest(full_universe=True))
+            asyncio.run(main_backtest(full_universe=True, event_5m=event_5m))
 
     elif secim == "2":
         print()
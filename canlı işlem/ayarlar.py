@@ -44,6 +44,22 @@ TOP_N_GAINERS = 20
 MIN_VOLUME_USDT = 10_000_000.0
 # İzlenecek coinin minimum 24 saatlik hacmi (USDT cinsinden).
 # Örnek: 10_000_000 → 10 milyon dolar altı hacimli coinler elenir.
+# Not: Eşik sadece PUMP_PREFILTER_VOLUME = True iken (canlı ön filtrede) uygulanır.
+
+PUMP_PREFILTER_VOLUME = False
+# Canlı taramada OHLCV çekmeden önce 24h hacmi MIN_VOLUME_USDT altındaki coinler elensin mi?
+# False → Hacim eşiği uygulanmaz (ÖNERİLEN — backtest universe'ü de uygulamaz).
+# True  → Düşük hacimli coinlerin mum verisi hiç çekilmez; canlı coin seçimi
+#         backtest'ten farklılaşır (backtest bu eşiği görmez).
+
+PUMP_PREFILTER_RATIO = 0
+# Canlı taramada OHLCV çekmeden önceki toplu 24h ticker ön filtresinin FİYAT testi.
+# 0  → Fiyat testi kapalı (ÖNERİLEN — kayıpsız).
+# >0 → 24h değişimi veya 24h high/low aralığı PUMP_MIN_PCT × bu oran kadar
+#      hareket etmeyen coinlerin mum verisi hiç çekilmez.
+# DİKKAT (kayıplı): Pump, 28–32 saat önceki mumun gövde tabanından ölçülür; 24h
+# ticker bu referansı görmez. Ör. 30 saat önce 1.00 → 1.30 yapıp yatay giden coin
+# %30 pump'tır ama 24h hareketi %15'in altında kalır ve elenir.
 
 PUMP_CONSECUTIVE_GREEN = 0
 # Pump sonrası aynı coine tekrar giriş için gereken bekleme süresi (cooldown).
@@ -96,6 +112,16 @@ TSL_TRAIL_PCT = 4.0
 # Küçük değer → Erken çıkış (daha az kâr ama daha güvenli)
 # Büyük değer → Geç çıkış (daha fazla kâr potansiyeli ama kâr erimesi riski)
 
+SL_PUSH_MIN_STEP_BPS = 25.0
+# Canlı botta trailing stop her yeni dipte RAM'de hemen güncellenir, ancak borsadaki
+# stop emri ancak bu kadar baz puan (1 bps = %0.01) değişince yeniden gönderilir.
+# Örnek: 25.0 → Stop en az %0.25 aşağı indiyse borsa emri güncellenir.
+# Hızlı düşüşte her 5 saniyede bir emir iptal/koy trafiğini önler; RAM stop'u kesin kalır.
+# 0 → Her değişimde borsa stop'u güncellenir (eski davranış).
+
+SL_PUSH_MAX_DELAY_SEC = 30.0
+# Eşiğin altında kalan bekleyen SL değişimi en geç bu kadar saniye sonra borsaya gönderilir.
+
 GREEN_LOSS_SINGLE_BODY_PCT = 10.0
 # Zararda iken kapanmış yeşil mumun gövdesi bu değere ulaşırsa anında kapat (GREEN-10).
 # Örnek: 10.0 → Zararda, yeşil mum gövdesi ≥ %10 → pozisyon kapatılır (SL beklenmez).
@@ -147,6 +173,59 @@ MANAGER_INTERVAL_SEC = 5
 # Açık pozisyonların SL/TSL güncellemesi için kontrol aralığı (saniye).
 # Örnek: 5 → Her 5 saniyede bir açık pozisyonlar kontrol edilir.
 
+WS_MARKET_DATA = True
+# Canlı bot piyasa verisini WebSocket akışından alsın mı?
+# True  → Watchlist + açık trade coinleri için <coin>@kline_<TF> ve <coin>@markPrice@1s
+#         akışına abone olunur. Trigger mum kapanış mesajıyla (ms içinde) uyanır,
+#         manager mark price'ı bellekten okur — REST çağrısı yapılmaz.
+#         Akış koparsa / veri bayatlarsa otomatik REST'e düşülür.
+# False → Eski davranış: her kontrol fetch_ohlcv / fetch_ticker ile REST'ten çekilir.
+
+WS_BUFFER_CANDLES = 100
+# WebSocket tamponunda coin başına tutulacak mum sayısı (sinyal için ~30 yeterli).
+
+WS_STALE_SEC = 10
+# Bu kadar saniyedir akıştan mesaj gelmediyse veri bayat sayılır ve REST kullanılır.
+
+CANDLE_CACHE_SIZE = 200
+# Canlı botun REST mum önbelleği: coin + zaman dilimi başına bellekte tutulan mum sayısı.
+# Aynı coinin mumları tekrar istendiğinde yalnızca son mumdan sonrası çekilir
+# (tarama, trigger ve trade yönetimi aynı veriyi tekrar tekrar indirmez).
+# 0 → Önbellek kapalı, her istekte tam veri çekilir (eski davranış).
+
+ORDER_RATE_PER_MIN = 300
+# Açık trade'ler eşzamanlı yönetilir; tüm coinlerin emir oluşturma + iptal çağrıları
+# bu dakikalık bütçeyi paylaşır (Binance hesap emir limiti: 300 / 10 sn, 1200 / dk).
+# Bütçe dolarsa yeni emir sadece gereken süre kadar bekler, hata alınmaz.
+
+BALANCE_CACHE_SEC = 60
+# Trade manager'ın kullandığı bakiye bu kadar saniye önbellekte tutulur.
+# Manager her turda mark price'ları tek istekte (veya WebSocket'ten) alır;
+# bakiye önbelleğiyle birlikte tur başına en fazla 1 REST isteği yapılır.
+# Bu sayede MANAGER_INTERVAL_SEC güvenle 1 saniyeye indirilebilir.
+# Not: Giriş (trigger) pozisyon boyutu için bakiye her zaman taze çekilir.
+
+USER_STREAM = True
+# Binance kullanıcı veri akışı (listenKey WebSocket) açık mı? API anahtarı gerekir.
+# True  → Emir dolumları, borsa stop tetiklenmeleri, pozisyonlar ve cüzdan bakiyesi
+#         anlık gelir: borsa SL'i dolunca gerçek çıkış fiyatı/PnL hemen yazılır,
+#         manager fetch_positions / fetch_balance sorgulamaz.
+# False → Eski davranış: fetch_positions + fetch_my_trades ile kontrol edilir.
+
+USER_STREAM_KEEPALIVE_MIN = 30
+# listenKey'in kaç dakikada bir uzatılacağı (Binance listenKey ömrü 60 dakika).
+
+MARKET_META_REFRESH_SEC = 3600
+# Market bilgisi (tick size, adım, maxQty, min notional) kaç saniyede bir yenilenir.
+# Emirler bu önbellek tablosunu kullanır; -1121 (geçersiz sembol) veya
+# -4005 (maxQty aşıldı) hatasında tablo süreyi beklemeden yeniden yüklenir.
+
+PREARM_ENTRY = True
+# Watchlist coinleri kapanıştan ÖNCE (PREP taramasında) girişe hazırlansın mı?
+# True  → Eski stop'lar temizlenir, ISOLATED margin + kaldıraç ayarlanır, market
+#         bilgisi önbelleğe alınır; tetikte sadece market emri + SL gider.
+# False → Eski davranış: hepsi tetik anında, market emrinden önce yapılır.
+
 
 # ══════════════════════════════════════════════════════════════════════════
 #  BÖLÜM 7 — BACKTEST AYARLARI
@@ -173,3 +252,42 @@ BACKTEST_SYMBOLS = [
 # Backtest'te test edilecek coin listesi.
 # Menüde "1. Backtest Başlat" seçilince bu coinler kullanılır.
 # "2. Full Universe Backtest" seçilirse Binance'deki tüm coinler taranır.
+
+BACKTEST_VECTORIZED = True
+# Full Universe backtest motoru seçimi.
+# True  → NumPy motoru: tüm bar sinyalleri (pump %, yeşil sayısı, kırmızı gövde,
+#         anti-rocket) tek seferde dizi olarak hesaplanır, sadece slot/equity
+#         durum makinesi sıralı döner. ~400 coinde dakikalar yerine saniyeler.
+# False → Orijinal bar-by-bar döngü motoru (karşılaştırma / hata ayıklama için).
+# İki motor da birebir aynı trade listesini üretir.
+
+BACKTEST_EVENT_5M = False
+# Full Universe backtest'te 5m olay saatli motor.
+# True  → Universe'ün TAMAMI için 5m veri indirilir; 4H bar kapanışları
+#         watchlist ve girişleri, 5m mumlar stop yönetimini (BE / TSL / SL)
+#         sürer. Kaybeden tradeler de 5m hassasiyetinde simüle edilir, equity
+#         ve slot kullanımı 5m çözünürlükte doğru olur.
+# False → 4H motor + sadece kârlı tradeler için sonradan 5m doğrulama (eski davranış).
+# Komut satırından: --event-5m
+
+CANDLE_STORE_ENABLED = True
+# Backtest mum verisini yerel depoda sakla (sembol × timeframe başına tek dosya).
+# True  → İlk koşuda indirilen 4H / 5m mumlar diske yazılır; sonraki koşularda
+#         sadece eksik kalan baş/son aralık indirilir. Aynı tarih aralığında
+#         tekrar backtest → hiç API çağrısı yok, saniyeler içinde başlar.
+# False → Her backtest tüm veriyi Binance'ten yeniden indirir (eski davranış).
+# pyarrow kuruluysa Arrow (.arrow) formatı, değilse .npy kullanılır.
+
+CANDLE_STORE_DIR = ""
+# Mum deposunun klasörü. Boş bırakılırsa: <proje kökü>/data/candle_store
+# Örnek: "/mnt/veri/candle_store" → depoyu başka bir diske taşı.
+
+DOWNLOAD_WEIGHT_BUDGET = 2000
+# Backtest indiricisinin dakikalık Binance IP ağırlık bütçesi.
+# Binance limiti 2400/dk; aradaki pay canlı bot ve diğer istekler için bırakılır.
+# İndirici her yanıttaki X-MBX-USED-WEIGHT-1M başlığını okuyarak bütçeyi
+# sunucudaki gerçek kullanımla senkron tutar; 429/418 gelirse Retry-After kadar bekler.
+
+DOWNLOAD_CONCURRENCY = 8
+# Aynı anda uçuşta olabilecek en fazla mum isteği sayısı.
+# Hızı bütçe belirler; bu değer yalnızca eşzamanlı bağlantı sayısını sınırlar.
@@ -5,18 +5,91 @@ BINANCE REPLAY MODE - Geçmiş Veri Replay
 ==============================================================================
 """
 import pandas as pd
+import numpy as np
 import logging
-import json
-import hashlib
+import struct
+import heapq
 import aiohttp
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 import asyncio
 import ccxt.async_support as ccxt
 from .redis_client import redis_client
 
+try:
+    import lz4.frame as lz4f
+    HAS_LZ4 = True
+except ImportError:
+    HAS_LZ4 = False
+
 logger = logging.getLogger("replay")
 
+# ── Replay cache kodlaması ────────────────────────────────────────────
+# Başlık: magic(4) + codec(1) + satır sayısı(4) + kapsanan aralık (ilk/son mum açılışı, ms),
+# ardından sütun tamponları:
+#   timestamp int64 (ms) | open | high | low | close | volume  (float64, little-endian)
+# codec 1 → gövde lz4 ile sıkıştırılmış (lz4 kurulu değilse ham yazılır).
+_CACHE_MAGIC = b"RPC2"
+_CACHE_HEADER = struct.Struct("<4sBIqq")
+_CACHE_COLS = ('open', 'high', 'low', 'close', 'volume')
+_CODEC_RAW, _CODEC_LZ4 = 0, 1
+
+
+def _ts_ms(df: pd.DataFrame) -> np.ndarray:
+    """timestamp sütunu → int64 ms"""
+    return df['timestamp'].to_numpy().astype('datetime64[ms]').astype('<i8')
+
+
+def encode_ohlcv(df: pd.DataFrame, lo_ms: int = 0, hi_ms: int = 0) -> bytes:
+    """OHLCV DataFrame'ini paketlenmiş sütun tamponlarına çevir ([lo_ms, hi_ms] = kapsanan aralık)"""
+    ts = _ts_ms(df)
+    cols = np.ascontiguousarray(df[list(_CACHE_COLS)].to_numpy(dtype='<f8').T)
+    body = ts.tobytes() + cols.tobytes()
+    codec = _CODEC_RAW
+    if HAS_LZ4:
+        body, codec = lz4f.compress(body), _CODEC_LZ4
+    return _CACHE_HEADER.pack(_CACHE_MAGIC, codec, len(ts), lo_ms, hi_ms) + body
+
+
+def cached_range(blob: bytes) -> Optional[tuple[int, int]]:
+    """Sadece başlığı oku → kapsanan [lo_ms, hi_ms] (format tanınmazsa None)"""
+    if not blob or len(blob) < _CACHE_HEADER.size:
+        return None
+    magic, codec, _, lo_ms, hi_ms = _CACHE_HEADER.unpack_from(blob)
+    if magic != _CACHE_MAGIC or (codec == _CODEC_LZ4 and not HAS_LZ4):
+        return None
+    return lo_ms, hi_ms
+
+
+def decode_ohlcv(blob: bytes) -> Optional[pd.DataFrame]:
+    """encode_ohlcv çıktısını DataFrame'e çevir (format tanınmazsa None)"""
+    magic, codec, rows, _, _ = _CACHE_HEADER.unpack_from(blob)
+    if magic != _CACHE_MAGIC:
+        return None
+    body = memoryview(blob)[_CACHE_HEADER.size:]
+    if codec == _CODEC_LZ4:
+        if not HAS_LZ4:
+            return None
+        body = lz4f.decompress(body)
+    ts = np.frombuffer(body, dtype='<i8', count=rows)
+    cols = np.frombuffer(body, dtype='<f8', offset=rows * 8).reshape(len(_CACHE_COLS), rows)
+    df = pd.DataFrame(dict(zip(_CACHE_COLS, cols)))
+    df.insert(0, 'timestamp', pd.to_datetime(ts, unit='ms'))
+    return df
+
+
+def _month_slices(lo_ms: int, hi_ms: int) -> list[tuple[str, int, int]]:
+    """[lo_ms, hi_ms] aralığını UTC takvim aylarına böl → (YYYY-MM, dilim başı, dilim sonu)"""
+    out = []
+    month = datetime.fromtimestamp(lo_ms / 1000, tz=timezone.utc).replace(
+        day=1, hour=0, minute=0, second=0, microsecond=0)
+    while int(month.timestamp() * 1000) <= hi_ms:
+        nxt = month.replace(year=month.year + month.month // 12, month=month.month % 12 + 1)
+        m0, m1 = int(month.timestamp() * 1000), int(nxt.timestamp() * 1000) - 1
+        out.append((month.strftime('%Y-%m'), max(lo_ms, m0), min(hi_ms, m1)))
+        month = nxt
+    return out
+
 
 def _make_binance_replay_exchange(demo: bool = False) -> ccxt.binance:
     """
@@ -58,7 +131,12 @@ class BinanceReplayProvider:
     Binance Futures API'den geçmiş veri çekerek replay yapar.
     18.02.2026.py stratejisiyle tam uyumlu.
     Redis cache + paralel fetching ile hızlı başlangıç.
+    Cache coin × takvim ayı dilimleri halinde tutulur: pencere kayınca
+    sadece kapsanmayan aralık Binance'ten çekilir.
     """
+    TIMEFRAME = '4h'                 # Ana strateji timeframe
+    MAX_SPEED = 0.0                  # speed <= 0 → bekleme yok, mumdan muma atla
+    SEGMENT_TTL = 30 * 86400         # Ay dilimleri 30 gün cache'de tutulur
     
     def __init__(self, speed_multiplier: float = 100.0, demo: bool = False):
         self.speed_multiplier = speed_multiplier
@@ -68,52 +146,59 @@ class BinanceReplayProvider:
         self.data_cache: dict[str, pd.DataFrame] = {}
         self.symbols: list[str] = []
         self._running = False
+        self._tf_ms = int(pd.Timedelta(self.TIMEFRAME).total_seconds() * 1000)
+        
+        # Replay imleçleri: sembol başına zaman / OHLCV dizileri + current_time'a kadar olan mum sayısı
+        self._ts: dict[str, np.ndarray] = {}
+        self._cols: dict[str, dict[str, np.ndarray]] = {}
+        self._cursor: dict[str, int] = {}
+        self._cursor_ms: Optional[int] = None     # İmleçlerin hizalı olduğu zaman (ms)
+        self._events: list[tuple[int, str]] = []  # Min-heap: (sembolün sıradaki mum zamanı ms, sembol)
         
         # Binance bağlantısı (public - API key gerekmez)
         self.exchange = _make_binance_replay_exchange(demo=demo)
         
-    def _get_cache_key(self, symbol: str, start: datetime, end: datetime) -> str:
-        """Cache key oluştur: symbol + tarih aralığı"""
-        key_data = f"{symbol}:{start.isoformat()}:{end.isoformat()}"
-        return f"replay:cache:{hashlib.md5(key_data.encode()).hexdigest()}"
+    def _segment_key(self, symbol: str, month: str) -> str:
+        """Cache key: symbol + timeframe + takvim ayı (YYYY-MM) — tarih penceresinden bağımsız"""
+        return f"replay:ohlcv:{self.TIMEFRAME}:{symbol}:{month}"
     
-    async def _get_cached_data(self, symbol: str, start: datetime, end: datetime) -> Optional[pd.DataFrame]:
-        """Redis'ten cache'lenmiş veriyi al"""
+    async def _get_cached_blobs(self, keys: list[str]) -> list[Optional[bytes]]:
+        """Tüm ay dilimlerini tek MGET ile sorgula (bulunmayanlar None)"""
         try:
-            cache_key = self._get_cache_key(symbol, start, end)
-            cached = await redis_client.get(cache_key)
-            
-            if cached and 'data' in cached:
-                # JSON'dan DataFrame'e çevir
-                df_data = json.loads(cached['data'])
-                df = pd.DataFrame(df_data)
-                df['timestamp'] = pd.to_datetime(df['timestamp'])
-                logger.info(f"💾 {symbol}: Cache'den yüklendi ({len(df)} mum)")
-                return df
+            return await redis_client.mget_raw(keys)
         except Exception as e:
-            logger.debug(f"Cache okuma hatası {symbol}: {e}")
-        return None
+            logger.debug(f"Cache okuma hatası: {e}")
+            return [None] * len(keys)
     
-    async def _cache_data(self, symbol: str, start: datetime, end: datetime, df: pd.DataFrame):
-        """Veriyi Redis'e cachele"""
+    async def _cache_many(self, items: dict[str, bytes]):
+        """Güncellenen ay dilimlerini tek pipeline ile Redis'e yaz"""
         try:
-            cache_key = self._get_cache_key(symbol, start, end)
-            # DataFrame'i JSON'a çevir
-            df_copy = df.copy()
-            df_copy['timestamp'] = df_copy['timestamp'].astype(str)
-            cache_data = {
-                'symbol': symbol,
-                'start': start.isoformat(),
-                'end': end.isoformat(),
-                'data': df_copy.to_json(orient='records'),
-                'cached_at': datetime.now().isoformat()
-            }
-            # 7 gün cache'de tut
-            await redis_client.set(cache_key, cache_data, expire=604800)
-            logger.debug(f"💾 {symbol}: Cache'lendi")
+            await redis_client.mset_raw(items, expire=self.SEGMENT_TTL)
+            logger.debug(f"💾 {len(items)} ay dilimi cache'lendi")
         except Exception as e:
-            logger.debug(f"Cache yazma hatası {symbol}: {e}")
-        
+            logger.debug(f"Cache yazma hatası: {e}")
+    
+    @staticmethod
+    def _find_gaps(slices: list[tuple[str, int, int]], blobs: list[Optional[bytes]]) -> list[tuple[int, int]]:
+        """Ay dilimlerinde cache'in kapsamadığı aralıklar (bitişikler birleştirilir)"""
+        gaps = []
+        for (_, lo, hi), blob in zip(slices, blobs):
+            cov = cached_range(blob)
+            if cov is None:
+                parts = [(lo, hi)]
+            else:
+                parts = []
+                if cov[0] > lo:
+                    parts.append((lo, cov[0] - 1))
+                if cov[1] < hi:
+                    parts.append((cov[1] + 1, hi))
+            for g_lo, g_hi in parts:
+                if gaps and g_lo <= gaps[-1][1] + 1:
+                    gaps[-1] = (gaps[-1][0], max(gaps[-1][1], g_hi))
+                else:
+                    gaps.append((g_lo, g_hi))
+        return gaps
+    
     async def initialize(self, symbols: list[str], start_date: datetime, 
                          end_date: datetime, speed: float = 100.0,
                          top_coins: int = 0):
@@ -148,49 +233,94 @@ class BinanceReplayProvider:
         logger.info(f"   🚀 {speed}x hız")
         logger.info(f"   📊 {len(self.symbols)} coin")
         
-        # Önce cache kontrolü yap, eksik coinleri belirle
-        cached_count = 0
-        fetch_symbols = []
+        # Önce cache kontrolü yap (tek MGET, coin × ay dilimi), eksik aralıkları belirle
+        start_ms = int(start_date.timestamp() * 1000)
+        end_ms = int(end_date.timestamp() * 1000)
+        slices = _month_slices(start_ms, end_ms)
+        keys = [self._segment_key(sym, month) for sym in self.symbols for month, _, _ in slices]
+        blobs = await self._get_cached_blobs(keys)
+        n = len(slices)
+        seg_blobs = {sym: blobs[i * n:(i + 1) * n] for i, sym in enumerate(self.symbols)}
+        gaps = {sym: g for sym in self.symbols if (g := self._find_gaps(slices, seg_blobs[sym]))}
         
+        # Eksik aralıkları hemen paralel çekmeye başla — cache çözümü bu sırada yapılır
+        fetch_task = None
+        if gaps:
+            gap_bars = sum(hi - lo + 1 for g in gaps.values() for lo, hi in g) // self._tf_ms
+            logger.info(f"🌐 {len(gaps)} coin için ~{gap_bars} eksik mum API'den çekiliyor (paralel)...")
+            fetch_task = asyncio.create_task(self._fetch_all_history_parallel(gaps))
+        
+        cached: dict[str, list[Optional[pd.DataFrame]]] = {}
         for symbol in self.symbols:
-            cached_df = await self._get_cached_data(symbol, start_date, end_date)
-            if cached_df is not None:
-                self.data_cache[symbol] = cached_df
-                cached_count += 1
-            else:
-                fetch_symbols.append(symbol)
+            cached[symbol] = [decode_ohlcv(b) if cached_range(b) else None for b in seg_blobs[symbol]]
+            await asyncio.sleep(0)          # Fetch görevine sıra ver
         
+        fetched = await fetch_task if fetch_task is not None else {}
+        cached_count = len(self.symbols) - len(gaps)
         if cached_count > 0:
-            logger.info(f"💾 {cached_count} coin cache'den yüklendi")
+            logger.info(f"💾 {cached_count} coin tamamen cache'den yüklendi")
+        
+        # Cache + yeni mumları birleştir, değişen ay dilimlerini geri yaz
+        closed_ms = int(datetime.now(timezone.utc).timestamp() * 1000) - self._tf_ms  # son kapanmış mum
+        writes: dict[str, bytes] = {}
+        for symbol in self.symbols:
+            pieces = [df for df in cached[symbol] if df is not None]
+            if symbol in fetched:
+                pieces.append(fetched[symbol])
+            if not pieces:
+                continue
+            full = pd.concat(pieces, ignore_index=True)
+            full = full.drop_duplicates('timestamp', keep='last').sort_values('timestamp', ignore_index=True)
+            ts = _ts_ms(full)
+            
+            if symbol in fetched:           # Çekim başarısızsa boşluğu cache'leme
+                for (month, lo, hi), blob in zip(slices, seg_blobs[symbol]):
+                    cov = cached_range(blob)
+                    seg_lo = min(lo, cov[0]) if cov else lo
+                    seg_hi = max(cov[1], min(hi, closed_ms)) if cov else min(hi, closed_ms)
+                    if seg_hi < seg_lo or (cov and cov == (seg_lo, seg_hi)):
+                        continue            # Açık mum / değişiklik yok → yazma
+                    seg = full[(ts >= seg_lo) & (ts <= seg_hi)]
+                    writes[self._segment_key(symbol, month)] = encode_ohlcv(seg, seg_lo, seg_hi)
+            
+            df = full[(ts >= start_ms) & (ts <= end_ms)].reset_index(drop=True)
+            if not df.empty:
+                self.data_cache[symbol] = df
         
-        # Eksik coinleri paralel çek
-        if fetch_symbols:
-            logger.info(f"🌐 {len(fetch_symbols)} coin API'den çekiliyor (paralel)...")
-            await self._fetch_all_history_parallel(fetch_symbols, start_date, end_date)
+        if writes:
+            await self._cache_many(writes)
         
         if not self.data_cache:
             raise ValueError("Hiçbir coin verisi çekilemedi!")
         
+        self._build_cursors()
+        
         logger.info(f"✅ Replay hazır: {len(self.data_cache)} coin yüklendi")
     
-    async def _fetch_all_history_parallel(self, symbols: list[str], start: datetime, end: datetime):
+    async def _fetch_all_history_parallel(self, gaps: dict[str, list[tuple[int, int]]]) -> dict[str, pd.DataFrame]:
         """
-        Tüm coinleri paralel olarak çek - hızlı başlangıç için
+        Eksik aralıkları paralel olarak çek - hızlı başlangıç için
+        gaps: {symbol: [(başlangıç_ms, bitiş_ms), ...]}
+        Dönüş: sadece tüm aralıkları başarıyla çekilen coinler (mum yoksa boş DataFrame)
         """
         semaphore = asyncio.Semaphore(5)  # Aynı anda max 5 istek
+        fetched: dict[str, pd.DataFrame] = {}
         
         async def fetch_with_limit(symbol: str):
             async with semaphore:
-                df = await self._fetch_history(symbol, start, end)
-                if not df.empty:
-                    self.data_cache[symbol] = df
-                    # Cache'e kaydet
-                    await self._cache_data(symbol, start, end, df)
+                try:
+                    parts = [await self._fetch_range(symbol, lo, hi) for lo, hi in gaps[symbol]]
+                except Exception as e:
+                    logger.error(f"❌ {symbol} veri hatası: {e}")
+                    return
+                fetched[symbol] = pd.concat(parts, ignore_index=True)
+                logger.info(f"📊 {symbol}: {len(fetched[symbol])} mum yüklendi")
                 await asyncio.sleep(0.1)  # Kısa bekleme
         
         # Tüm coinleri paralel başlat
-        tasks = [fetch_with_limit(sym) for sym in symbols]
+        tasks = [fetch_with_limit(sym) for sym in gaps]
         await asyncio.gather(*tasks, return_exceptions=True)
+        return fetched
     
     async def _fetch_top_coins(self, count: int = 50) -> list[str]:
         """
@@ -226,80 +356,59 @@ class BinanceReplayProvider:
                 key=lambda s: float(tickers.get(s, {}).get('quoteVolume', 0) or 0),
                 reverse=True
             )
-         inance Futures'ten geçmiş OHLCV verisi çek
+
+            logger.info(f"🏆 Top {count} coin (24h hacim): {sorted_symbols[:5]}...")
+            return sorted_symbols[:count]
+
+        except Exception as e:
+            logger.error(f"❌ Top coin listesi alınamadı: {e}")
+            return []
+
+    async def _fetch_range(self, symbol: str, since: int, until: int) -> pd.DataFrame:
+        """
+        Binance Futures'ten [since, until] (ms) aralığındaki OHLCV verisini çek
         Ana dosyadaki (18.02.2026.py) fetch_ohlcv mantığıyla uyumlu
+        Hata yukarı iletilir — başarısız çekim boş aralık olarak cache'lenmesin.
         """
-        try:
-            # Sembol formatı kontrolü (CCXT standart: BTC/USDT)
-            if '/' not in symbol:
-                # BTCUSDT formatı -> BTC/USDT'ye çevir
-                ccxt_symbol = f"{symbol.replace('USDT', '')}/USDT"
-            else:
-                ccxt_symbol = symbol
-                
-            since = int(start.timestamp() * 1000)
-            
-            # Veriyi çek (pagination ile) - 4H timeframe (ana strateji)
-            all_ohlcv = []
-            current_since = since
-            
-            while True:
-                ohlcv = await self.exchange.fetch_ohlcv(
-                    ccxt_symbol, 
-                    timeframe='4h',  # Ana strateji timeframe
-                    since=current_since,
-                    limit=1000  # Binance max limit
-                )
-                
-                if not ohlcv:
-                    break
-                    
-                all_ohlcv.extend(ohlcv)
-                
-                # Sonraki batch
-                current_since = ohlcv[-1][0] + 1
-                
-                # Bitiş tarihini geçtik mi?
-                if current_since > int(end.timestamp() * 1000):
-                    break
-                    
-                await asyncio.sleep(0.3)  # Rate limit (Binance)
-            
-            if not all_ohlcv:
-                logger.warning(f"⚠️ {symbol}: Veri alınamadı")
-                return pd.DataFrame()
-            
-            # DataFrame oluştur (18.02.2026.py formatı)
-            df = pd.DataFrame(all_ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms', utc=True)
-            df.set_index('timestamp', inplace=True)
+        # Sembol formatı kontrolü (CCXT standart: BTC/USDT)
+        if '/' not in symbol:
+            # BTCUSDT formatı -> BTC/USDT'ye çevir
+            ccxt_symbol = f"{symbol.replace('USDT', '')}/USDT"
+        else:
+            ccxt_symbol = symbol
+
+        # Veriyi çek (pagination ile) - 4H timeframe (ana strateji)
+        all_ohlcv = []
+        current_since = since
+
+        while True:
+            ohlcv = await self.exchange.fetch_ohlcv(
+                ccxt_symbol,
+                timeframe=self.TIMEFRAME,  # Ana strateji timeframe
+                since=current_since,
+                limit=1000  # Binance max limit
+            )
+
+            if not ohlcv:
+                break
+
+            all_ohlcv.extend(ohlcv)
+
+            # Sonraki batch
+            current_since = ohlcv[-1][0] + 1
             
-            # Tarih filtresi
-            df = df[(df.index >= start) & (df.index
+            # Bitiş tarihini geçtik mi?
+            if current_since > until:
+                break
                 
-                # Bitiş tarihini geçtik mi?
-                if current_since > int(end.timestamp() * 1000):
-                    break
-                    
-                await asyncio.sleep(0.2)  # Rate limit
-            
-            if not all_ohlcv:
-                logger.warning(f"⚠️ {symbol}: Veri alınamadı")
-                return pd.DataFrame()
-            
-            # DataFrame oluştur
-            df = pd.DataFrame(all_ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            
-            # Tarih filtresi
-            df = df[(df['timestamp'] >= start) & (df['timestamp'] <= end)]
-            
-            logger.info(f"📊 {symbol}: {len(df)} mum yüklendi")
-            return df
-            
-        except Exception as e:
-            logger.error(f"❌ {symbol} veri hatası: {e}")
-            return pd.DataFrame()
+            await asyncio.sleep(0.2)  # Rate limit
+        
+        # DataFrame oluştur (aralıkta mum yoksa boş ama tipli)
+        df = pd.DataFrame(all_ohlcv or np.empty((0, 6)),
+                          columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+        df = df[(df['timestamp'] >= since) & (df['timestamp'] <= until)]
+        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+        return df.reset_index(drop=True)
     
     def start(self):
         """Replay'i başlat"""
@@ -325,33 +434,94 @@ class BinanceReplayProvider:
             return 100.0
         return min(100.0, (current / total) * 100)
     
+    def _build_cursors(self):
+        """data_cache → NumPy dizileri (bir kez) + imleçleri current_time'a hizala"""
+        self._ts = {sym: _ts_ms(df) for sym, df in self.data_cache.items()}
+        self._cols = {sym: {c: df[c].to_numpy(dtype=np.float64) for c in _CACHE_COLS}
+                      for sym, df in self.data_cache.items()}
+        self._cursor = dict.fromkeys(self._ts, 0)
+        self._cursor_ms = None
+        self._events = []
+        self._sync_cursors()
+    
+    def _sync_cursors(self):
+        """
+        İmleçleri current_time'a taşı. İleri giderken sadece olay heap'inde zamanı gelmiş
+        semboller son konumdan searchsorted ile ilerletilir; geri sarıldıysa (seek) baştan
+        arama + heap yeniden kurulur. Tick başına maliyet geçmiş uzunluğundan bağımsız.
+        """
+        if self.current_time is None:
+            return
+        now_ms = pd.Timestamp(self.current_time).value // 1_000_000
+        if now_ms == self._cursor_ms:
+            return
+        if self._cursor_ms is not None and now_ms > self._cursor_ms:
+            events = self._events
+            while events and events[0][0] <= now_ms:
+                _, sym = heapq.heappop(events)
+                ts, pos = self._ts[sym], self._cursor[sym]
+                pos += int(np.searchsorted(ts[pos:], now_ms, side='right'))
+                self._cursor[sym] = pos
+                if pos < len(ts):
+                    heapq.heappush(events, (int(ts[pos]), sym))
+        else:
+            for sym, ts in self._ts.items():
+                self._cursor[sym] = int(np.searchsorted(ts, now_ms, side='right'))
+            self._events = [(int(ts[self._cursor[sym]]), sym)
+                            for sym, ts in self._ts.items() if self._cursor[sym] < len(ts)]
+            heapq.heapify(self._events)
+        self._cursor_ms = now_ms
+    
+    def next_event_time(self) -> Optional[datetime]:
+        """
+        Bir sonraki mum olayı: herhangi bir sembolde yeni mumun görünür olacağı an
+        (önceki mumun kapanışı = yeni mumun açılışı). Olay kalmadıysa None.
+        """
+        self._sync_cursors()
+        if not self._events:
+            return None
+        ts = pd.Timestamp(self._events[0][0], unit='ms')
+        if self.current_time.tzinfo is not None:
+            ts = ts.tz_localize('UTC')
+        return ts.to_pydatetime()
+    
+    def get_current_arrays(self, symbol: str, lookback: int = 50) -> Optional[dict[str, np.ndarray]]:
+        """
+        Mevcut replay zamanına kadar olan son `lookback` mum — kopyasız NumPy görünümleri
+        (timestamp: int64 ms, open/high/low/close/volume: float64)
+        """
+        if symbol not in self._ts:
+            return None
+        self._sync_cursors()
+        end = self._cursor[symbol]
+        start = max(0, end - lookback)
+        out = {c: arr[start:end] for c, arr in self._cols[symbol].items()}
+        out['timestamp'] = self._ts[symbol][start:end]
+        return out
+    
     def get_current_data(self, symbol: str, lookback: int = 50) -> pd.DataFrame:
         """
-        Mevcut replay zamanına kadar olan veriyi getir
+        Mevcut replay zamanına kadar olan veriyi getir (imleç ile, maske taraması yok)
         """
-        if symbol not in self.data_cache:
+        if symbol not in self._ts:
             return pd.DataFrame()
-        
-        df = self.data_cache[symbol]
-        mask = df['timestamp'] <= self.current_time
-        available = df[mask]
-        
-        if len(available) < lookback:
-            return available
-        
-        return available.tail(lookback)
+        self._sync_cursors()
+        end = self._cursor[symbol]
+        return self.data_cache[symbol].iloc[max(0, end - lookback):end]
     
     def get_current_ticker(self, symbol: str) -> Optional[dict]:
         """
         Mevcut zamandaki son fiyat
         Ana dosyadaki fetch_ticker formatıyla uyumlu
         """
-        df = self.get_current_data(symbol, lookback=1)
-        if df.empty:
+        if symbol not in self._ts:
+            return None
+        self._sync_cursors()
+        end = self._cursor[symbol]
+        if end == 0:
             return None
         
-        last = df.iloc[-1]
-        last_price = float(last['close'])
+        last_price = float(self._cols[symbol]['close'][end - 1])
         
         return {
             'symbol': symbol,
@@ -366,55 +536,86 @@ class BinanceReplayProvider:
     async def tick(self, real_time_seconds: float = 1.0) -> bool:
         """
         Replay zamanını ilerlet
-        
-    18.02.2026.py PumpSnifferBot ile uyumlu
-    """
-    
-    def __init__(self, data_provider: Binance
+
+        Args:
+            real_time_seconds: Gerçekte geçen süre (saniye) — speed_multiplier ile çarpılır
+                               (maksimum hız modunda kullanılmaz)
+
+        Returns:
+            Replay devam ediyor mu?
+        """
         if not self._running or self.current_time >= self.end_time:
             return False
         
-        # Hızlandırılmış zaman
-        time_step = timedelta(seconds=real_time_seconds * self.speed_multiplier)
-        self.current_time += time_step
+        nxt = self.next_event_time()
+        if self.speed_multiplier <= self.MAX_SPEED:
+            # Maksimum hız: doğrudan bir sonraki mum olayına atla
+            self.current_time = nxt if nxt is not None else self.end_time
+        else:
+            # Hızlandırılmış zaman — ama hiçbir mum olayının üzerinden atlama
+            self.current_time += timedelta(seconds=real_time_seconds * self.speed_multiplier)
+            if nxt is not None and nxt < self.current_time:
+                self.current_time = nxt
         
         if self.current_time > self.end_time:
             self.current_time = self.end_time
+            self._sync_cursors()
             return False
         
+        self._sync_cursors()
         return True
+    
+    async def advance(self) -> bool:
+        """
+        Olay güdümlü ilerleme: bir sonraki mum olayına geç.
+        Tempolu modda sadece olaylar arasındaki süre (speed_multiplier ile ölçeklenmiş) kadar
+        uyunur; maksimum hız modunda hiç beklenmez.
+
+        Returns:
+            Replay devam ediyor mu?
+        """
+        if not self._running or self.current_time >= self.end_time:
+            return False
+        
+        nxt = self.next_event_time()
+        target = min(nxt, self.end_time) if nxt is not None else self.end_time
+        if self.speed_multiplier > self.MAX_SPEED:
+            await asyncio.sleep((target - self.current_time).total_seconds() / self.speed_multiplier)
+        
+        self.current_time = target
+        self._sync_cursors()
+        return self.current_time < self.end_time
 
 
 class ReplayExchangeClient:
     """
     Replay için simüle edilmiş exchange client
+    18.02.2026.py PumpSnifferBot ile uyumlu
     """
-    
-    def __init__(self, data_provider: BybitReplayProvider):
+
+    def __init__(self, data_provider: BinanceReplayProvider):
         self.data_provider = data_provider
         self.simulated_positions: dict = {}
         self.balance = {'total': 10000.0, 'free': 10000.0, 'used': 0.0}
-        4h', limit: int = 100) -> list:
+
+    def fetch_ticker(self, symbol: str) -> Optional[dict]:
+        """Replay zamanındaki son fiyat"""
+        return self.data_provider.get_current_ticker(symbol)
+
+    def fetch_ohlcv(self, symbol: str, timeframe: str = '4h', limit: int = 100) -> list:
         """Ana strateji timeframe: 4h"""
-        df = self.data_provider.get_current_data(symbol, lookback=limit)
-        if df.empty:
+        arrs = self.data_provider.get_current_arrays(symbol, lookback=limit)
+        if arrs is None:
             return []
         
-        ohlcv = []
-        for idx, row in df.iterrows():
-            ohlcv.append([
-                int(idx.timestamp() * 1000),  # index = timestamp
-        ohlcv = []
-        for _, row in df.iterrows():
-            ohlcv.append([
-                int(row['timestamp'].timestamp() * 1000),
-                float(row['open']),
-                float(row['high']),
-                float(row['low']),
-                float(row['close']),
-                float(row['volume'])
-            ])
-        return ohlcv
+        return [list(row) for row in zip(
+            arrs['timestamp'].tolist(),
+            arrs['open'].tolist(),
+            arrs['high'].tolist(),
+            arrs['low'].tolist(),
+            arrs['close'].tolist(),
+            arrs['volume'].tolist(),
+        )]
     
     def get_balance(self) -> dict:
         return self.balance
@@ -487,7 +688,10 @@ class ReplayExchangeClient:
         if amount <= 0:
             return 0.0
         # Minimum 0.001, maksimum 1M limit
-        ret
+        return min(max(round(amount, 3), 0.001), 1_000_000.0)
+
+    def fetch_tickers(self) -> list:
+        """
         Binance Futures API formatında ticker listesi
         Ana dosyadaki universe taraması için gerekli
         """
@@ -500,11 +704,12 @@ class ReplayExchangeClient:
                 tickers.append({
                     'symbol': raw_symbol,
                     'lastPrice': str(ticker['last']),
-                    'quoteVolume': '10000000',  # Simulated - min volume içinrs for replay symbols"""
-        tickers = []
-        for symbol in self.data_provider.symbols:
-            ticker = self.fetch_ticker(symbol)
-           
+                    'quoteVolume': '10000000',  # Simulated - min volume için
+                })
+        return tickers
+
+    def fetch_markets(self) -> dict:
+        """
         Binance Futures market yapısı
         Ana dosyadaki fetch_universe için gerekli
         """
@@ -530,16 +735,4 @@ class ReplayExchangeClient:
     
     def load_markets(self, reload: bool = False):
         """Market yükleme (simüle edilmiş)"""
-        return self.market symbol in self.data_provider.symbols:
-            markets[symbol] = {
-                'symbol': symbol,
-                'active': True,
-                'limits': {
-                    'amount': {'min': 0.001, 'max': 1000000}
-                }
-            }
-        return markets
-    
-    def load_markets(self, reload: bool = False):
-        """Scanner compatibility - no-op"""
-        pass
+        return self.fetch_markets()
@@ -3,12 +3,24 @@ GERÇEK CANLI TOP 10 PUMP SCANNER
 Bot kodundaki detect_pump() mantığını kullanarak Top 10'u bulur
 """
 import asyncio
+import importlib.util
+import os
 import ccxt.async_support as ccxt
 import aiohttp
 import socket
 from datetime import datetime, timedelta, timezone
+import numpy as np
 import pandas as pd
 
+# Ana bot modülü — pump kararı bot ile aynı ortak dedektörden (rolling_pump_scan)
+_spec = importlib.util.spec_from_file_location(
+    "bot_module",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "canlı işlem", "18.02.2026.py"),
+)
+bot = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(bot)
+N = bot.Config.PUMP_WINDOW_CANDLES
+
 async def scan_top10():
     # DNS fallback
     connector = aiohttp.TCPConnector(
@@ -25,7 +37,7 @@ async def scan_top10():
         all_symbols = [s for s in exchange.symbols if '/USDT' in s and ':USDT' not in s]
         
         print('\n' + '='*120)
-        print(f'🔍 {len(all_symbols)} USDT COIN TARANACAK (6×4H Rolling Pump)')
+        print(f'🔍 {len(all_symbols)} USDT COIN TARANACAK ({N}×4H Rolling Pump)')
         print('='*120)
         
         pump_results = []
@@ -35,8 +47,8 @@ async def scan_top10():
                 if i % 50 == 0:
                     print(f'  ⏳ {i}/{len(all_symbols)} tamamlandı...')
                 
-                ohlcv = await exchange.fetch_ohlcv(symbol, '4h', limit=7)
-                if len(ohlcv) < 7:
+                ohlcv = await exchange.fetch_ohlcv(symbol, '4h', limit=N + 2)
+                if len(ohlcv) < N + 1:
                     continue
                 
                 # Son mum canlı mı kontrolü (basit)
@@ -47,36 +59,31 @@ async def scan_top10():
                 
                 # Canlı mumu at
                 if now_ts < candle_end_ts:
-                    analysis_candles = ohlcv[-7:-1]  # Son 6 kapanan
-                else:
-                    analysis_candles = ohlcv[-6:]  # Son 6 kapanan
+                    ohlcv = ohlcv[:-1]
                 
-                if len(analysis_candles) < 6:
+                if len(ohlcv) < N + 1:
                     continue
                 
-                # Yeşil mum sayısı
-                green_count = sum(1 for c in analysis_candles if c[4] > c[1])
-                
-                # Pump %
-                highs = [c[2] for c in analysis_candles]
-                lows = [c[3] for c in analysis_candles]
-                pump_pct = ((max(highs) - min(lows)) / min(lows)) * 100
+                # Pump kararı: son kapanan mum için ortak dedektör (bot.detect_pump ile aynı)
+                arr  = np.asarray(ohlcv, dtype=float)
+                scan = bot.rolling_pump_scan(arr[:, 1], arr[:, 2], arr[:, 3], arr[:, 4])
+                info = bot.pump_info_at(scan, len(arr) - 1)
                 
                 # Anti-Rocket: bir önceki mumun tek başına yükselişi
-                prev_candle = analysis_candles[-1]  # tetikleyiciden önceki mum
+                prev_candle = ohlcv[-1]  # tetikleyiciden önceki mum
                 if prev_candle[1] > 0:
                     prev_body_pct = (prev_candle[4] - prev_candle[1]) / prev_candle[1] * 100.0
                 else:
                     prev_body_pct = 0.0
 
                 # Kriterleri kontrol et
-                if green_count >= 4 and pump_pct >= 30:
+                if info is not None:
                     pump_results.append({
                         'symbol': symbol,
-                        'green': green_count,
-                        'pump': pump_pct,
-                        'high': max(highs),
-                        'low': min(lows),
+                        'green': int(scan['green_count'][-1]),
+                        'pump': info['pump_pct'],
+                        'high': info['pump_high'],
+                        'low': info['pump_low'],
                         'prev_body_pct': prev_body_pct,
                     })
                     
@@ -88,7 +95,7 @@ async def scan_top10():
         blocked = [r for r in pump_results if r['prev_body_pct'] >= ANTI_ROCKET_PCT]
 
         print(f'\n✅ Tarama tamamlandı!')
-        print(f'📊 {len(pump_results)} coin ≥4 yeşil + ≥30% pump → '
+        print(f'📊 {len(pump_results)} coin ≥{bot.Config.PUMP_MIN_GREEN_COUNT} yeşil + ≥{bot.Config.PUMP_MIN_PCT:.0f}% pump → '
               f'{len(valid)} GEÇERLİ / {len(blocked)} ANTI-ROCKET (önceki mum ≥%{ANTI_ROCKET_PCT})')
         print('\n' + '='*130)
         print('✅ GEÇERLİ COINLER (Bot watchlist adayları)')
@@ -97,7 +104,7 @@ async def scan_top10():
         print('-'*130)
         valid.sort(key=lambda x: x['pump'], reverse=True)
         for i, r in enumerate(valid[:10], 1):
-            print(f'{i:<6} {r["symbol"]:<18} {r["green"]}/6     {r["pump"]:>8.2f}%    {r["prev_body_pct"]:>+10.1f}%      {r["high"]:<15.8f} {r["low"]:<15.8f}')
+            print(f'{i:<6} {r["symbol"]:<18} {r["green"]}/{N}     {r["pump"]:>8.2f}%    {r["prev_body_pct"]:>+10.1f}%      {r["high"]:<15.8f} {r["low"]:<15.8f}')
         if not valid:
             print('  (Geçerli coin yok)')
 
@@ -108,7 +115,7 @@ async def scan_top10():
             print('-'*130)
             blocked.sort(key=lambda x: x['pump'], reverse=True)
             for i, r in enumerate(blocked, 1):
-                print(f'{i:<6} {r["symbol"]:<18} {r["green"]}/6     {r["pump"]:>8.2f}%    {r["prev_body_pct"]:>+10.1f}%  ❌  {r["high"]:<15.8f} {r["low"]:<15.8f}')
+                print(f'{i:<6} {r["symbol"]:<18} {r["green"]}/{N}     {r["pump"]:>8.2f}%    {r["prev_body_pct"]:>+10.1f}%  ❌  {r["high"]:<15.8f} {r["low"]:<15.8f}')
 
         print('\n' + '='*130)
 
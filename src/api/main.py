@@ -26,7 +26,7 @@ class ReplayStatus(str, Enum):
 class ReplayConfig(BaseModel):
     start_date: str = Field(..., description="Başlangıç tarihi (YYYY-MM-DD)")
     end_date: str = Field(..., description="Bitiş tarihi (YYYY-MM-DD)")
-    speed: float = Field(100.0, description="Hız çarpanı (1.0 = gerçek zaman)")
+    speed: float = Field(100.0, description="Hız çarpanı (1.0 = gerçek zaman, 0 = maksimum hız: mumdan muma atla)")
     symbols: List[str] = Field([], description="Test edilecek coinler (boş = otomatik)")
     top_coins: int = Field(0, description="Otomatik coin sayısı (50/100/200, 0=symbols kullan)")
     initial_balance: float = Field(10000.0, description="Başlangıç bakiyesi")
@@ -14,6 +14,7 @@ class RedisClient:
         self.url = REDIS_URL
         self._redis = None
         self._pool = None
+        self._raw = None      # decode_responses=False → ikili (bytes) değerler
 
     async def connect(self):
         """Redis bağlantısını başlat (connection pool ile)"""
@@ -36,8 +37,23 @@ class RedisClient:
                 self._redis = None
                 self._pool = None
 
+    async def _raw_client(self):
+        """Binary değerler için ayrı bağlantı (JSON / utf-8 çözme yok)"""
+        if self._raw is None:
+            try:
+                self._raw = redis.Redis.from_url(self.url, decode_responses=False,
+                                                 max_connections=10, socket_keepalive=True)
+                await self._raw.ping()
+            except Exception as e:
+                logger.error(f"❌ Redis (binary) bağlantı hatası: {e}")
+                self._raw = None
+        return self._raw
+
     async def close(self):
         """Bağlantıyı kapat"""
+        if self._raw is not None:
+            await self._raw.aclose()
+            self._raw = None
         if self._pool:
             await self._pool.disconnect()
             self._pool = None
@@ -61,6 +77,30 @@ class RedisClient:
         except Exception as e:
             logger.error(f"Redis SET hatası ({key}): {e}")
 
+    async def mget_raw(self, keys: list) -> list:
+        """Birden fazla binary değeri tek MGET ile çek (yoksa None)"""
+        if not keys:
+            return []
+        raw = await self._raw_client()
+        try:
+            return await raw.mget(keys)
+        except Exception as e:
+            logger.error(f"Redis MGET hatası ({len(keys)} key): {e}")
+            return [None] * len(keys)
+
+    async def mset_raw(self, items: dict, expire: int = None):
+        """Birden fazla binary değeri tek pipeline ile kaydet"""
+        if not items:
+            return
+        raw = await self._raw_client()
+        try:
+            async with raw.pipeline(transaction=False) as pipe:
+                for key, value in items.items():
+                    pipe.set(key, value, ex=expire)
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Redis MSET (pipeline) hatası ({len(items)} key): {e}")
+
     async def hset(self, key: str, field: str, value: any):
         """Hash set"""
         if not self._redis: await self.connect()